@@ -0,0 +1,633 @@
+"""
+Benchmark of history query, chart opening, tick throughput and indicator cost.
+
+Run headless with synthetic data, results are saved as JSON of flat metrics
+so that runs of different releases can be compared:
+
+    python benchmarks/benchmark.py --output result.json --baseline last.json
+
+Benchmarks of the same harness are run by pytest-benchmark in test_benchmark.py.
+"""
+
+import json
+import os
+import platform
+from argparse import ArgumentParser, Namespace
+from copy import copy
+from datetime import datetime, timedelta
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter, sleep
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple, Type
+
+import numpy as np
+
+from vnpy.event import Event, EventEngine
+from vnpy.trader.constant import Exchange, Interval, Product
+from vnpy.trader.database import DB_TZ, BarOverview, BaseDatabase, TickOverview
+from vnpy.trader.datafeed import BaseDatafeed
+from vnpy.trader.engine import MainEngine
+from vnpy.trader.event import EVENT_CONTRACT, EVENT_TICK
+from vnpy.trader.object import BarData, ContractData, HistoryRequest, TickData
+from vnpy.trader.utility import BarGenerator, extract_vt_symbol
+from vnpy_spreadtrading.base import EVENT_SPREAD_DATA, SpreadItem
+
+from vnpy_chartwizard.engine import EVENT_CHART_HISTORY, ChartWizardEngine, split_history
+from vnpy_chartwizard.generator import SpreadBarGenerator
+from vnpy_chartwizard.monitor import monitor
+from vnpy_chartwizard.store import BarColumns
+
+if TYPE_CHECKING:
+    from vnpy_chartwizard.ui.chart import ChartWidget
+    from vnpy_chartwizard.ui.widget import ChartWizardWidget
+
+
+# Counts of bars benchmarked by default
+QUERY_COUNTS = (10_000, 100_000)
+OPEN_COUNTS = (10_000, 100_000, 1_000_000)
+INDICATOR_COUNTS = (10_000, 100_000)
+TICK_COUNT = 100_000
+
+# Ticks and spreads are generated at this rate, and flushed in frames of update_fps
+EVENT_RATE = 10_000
+
+# Bars fed one by one to measure indicator update cost
+UPDATE_COUNT = 1000
+
+GATEWAY_NAME = "BENCHMARK"
+
+
+def generate_columns(vt_symbol: str, start: datetime, count: int, seed: int = 0) -> BarColumns:
+    """
+    Generate 1-minute bars of random walk from start.
+    """
+    rng: np.random.Generator = np.random.default_rng(seed)
+
+    close: np.ndarray = 100 + np.cumsum(rng.normal(0, 0.1, count))
+    open_: np.ndarray = np.concatenate(([close[0]], close[:-1]))
+    volume: np.ndarray = rng.integers(1, 100, count).astype(float)
+
+    columns: BarColumns = BarColumns(vt_symbol, Interval.MINUTE, DB_TZ, GATEWAY_NAME)
+    columns.set_arrays({
+        "datetime": start.timestamp() + 60 * np.arange(count, dtype=float),
+        "open_price": open_,
+        "high_price": np.maximum(open_, close) + np.abs(rng.normal(0, 0.05, count)),
+        "low_price": np.minimum(open_, close) - np.abs(rng.normal(0, 0.05, count)),
+        "close_price": close,
+        "volume": volume,
+        "turnover": volume * close,
+        "open_interest": np.full(count, 1000.0),
+    })
+    return columns
+
+
+def generate_ticks(vt_symbol: str, start: datetime, count: int, rate: int = EVENT_RATE, seed: int = 0) -> List[TickData]:
+    """
+    Generate ticks of random walk from start, at rate per second.
+    """
+    rng: np.random.Generator = np.random.default_rng(seed)
+    symbol, exchange = extract_vt_symbol(vt_symbol)
+
+    prices: List[float] = (100 + np.cumsum(rng.normal(0, 0.01, count))).tolist()
+    volumes: List[int] = np.cumsum(rng.integers(0, 5, count)).tolist()
+    step: timedelta = timedelta(seconds=1 / rate)
+
+    return [
+        TickData(
+            symbol=symbol,
+            exchange=exchange,
+            datetime=start + step * i,
+            last_price=price,
+            volume=volume,
+            turnover=volume * price,
+            open_interest=1000,
+            gateway_name=GATEWAY_NAME
+        )
+        for i, (price, volume) in enumerate(zip(prices, volumes))
+    ]
+
+
+def generate_spreads(name: str, start: datetime, count: int, rate: int = EVENT_RATE, seed: int = 0) -> List[SpreadItem]:
+    """
+    Generate spread data of random walk from start, at rate per second.
+    """
+    rng: np.random.Generator = np.random.default_rng(seed)
+
+    bids: List[float] = (10 + np.cumsum(rng.normal(0, 0.01, count))).tolist()
+    step: timedelta = timedelta(seconds=1 / rate)
+
+    return [
+        SpreadItem(
+            name=name,
+            bid_volume=1,
+            bid_price=bid,
+            ask_price=bid + 0.2,
+            ask_volume=1,
+            net_pos=0,
+            datetime=start + step * i,
+            price_formula="",
+            trading_formula=""
+        )
+        for i, bid in enumerate(bids)
+    ]
+
+
+class BenchmarkDatafeed(BaseDatafeed):
+    """
+    Stand-in datafeed generating 1-minute bars of any range requested.
+    """
+
+    def query_bar_history(self, req: HistoryRequest, output: Callable = print) -> List[BarData]:
+        """"""
+        start: datetime = req.start.replace(second=0, microsecond=0)
+        count: int = int((req.end - start).total_seconds() // 60) + 1
+
+        columns: BarColumns = generate_columns(req.vt_symbol, start, count)
+        return [columns.get_bar(ix) for ix in range(count)]
+
+
+class BenchmarkDatabase(BaseDatabase):
+    """
+    Stand-in database keeping bars in memory.
+    """
+
+    def __init__(self) -> None:
+        """"""
+        self.bars: Dict[tuple, Dict[datetime, BarData]] = {}
+
+    def save_bar_data(self, bars: List[BarData], stream: bool = False) -> bool:
+        """"""
+        for bar in bars:
+            key: tuple = (bar.symbol, bar.exchange, bar.interval)
+            self.bars.setdefault(key, {})[bar.datetime] = bar
+        return True
+
+    def load_bar_data(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime
+    ) -> List[BarData]:
+        """"""
+        start = to_aware(start)
+        end = to_aware(end)
+
+        buf: Dict[datetime, BarData] = self.bars.get((symbol, exchange, interval), {})
+        return [buf[dt] for dt in sorted(buf) if start <= dt <= end]
+
+    def delete_bar_data(self, symbol: str, exchange: Exchange, interval: Interval) -> int:
+        """"""
+        return len(self.bars.pop((symbol, exchange, interval), {}))
+
+    def get_bar_overview(self) -> List[BarOverview]:
+        """"""
+        return [
+            BarOverview(
+                symbol=symbol,
+                exchange=exchange,
+                interval=interval,
+                count=len(buf),
+                start=min(buf),
+                end=max(buf)
+            )
+            for (symbol, exchange, interval), buf in self.bars.items() if buf
+        ]
+
+    def save_tick_data(self, ticks: List[TickData], stream: bool = False) -> bool:
+        """"""
+        return False
+
+    def load_tick_data(self, symbol: str, exchange: Exchange, start: datetime, end: datetime) -> List[TickData]:
+        """"""
+        return []
+
+    def delete_tick_data(self, symbol: str, exchange: Exchange) -> int:
+        """"""
+        return 0
+
+    def get_tick_overview(self) -> List[TickOverview]:
+        """"""
+        return []
+
+
+def to_aware(dt: datetime) -> datetime:
+    """"""
+    if dt.tzinfo:
+        return dt
+    return dt.replace(tzinfo=DB_TZ)
+
+
+class ChartBenchmark:
+    """
+    Run benchmarks in one headless application, with stand-in data sources.
+
+    Each metric is recorded by name, in seconds unless named otherwise.
+    """
+
+    def __init__(self, folder: Path) -> None:
+        """"""
+        from vnpy.trader.ui import QtWidgets
+
+        self.app: QtWidgets.QApplication = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+        self.event_engine: EventEngine = EventEngine()
+        self.main_engine: MainEngine = MainEngine(self.event_engine)
+
+        self.engine: ChartWizardEngine = self.main_engine.add_engine(ChartWizardEngine)
+        self.engine.datafeed = BenchmarkDatafeed()
+        self.engine.database = BenchmarkDatabase()
+        self.engine.snapshot_folder = folder
+
+        self.metrics: Dict[str, float] = {}
+
+        # Created with Qt application, after platform is set
+        from vnpy_chartwizard.ui.widget import ChartWizardWidget
+
+        # Workspace of user is neither restored nor overwritten
+        self.widget: ChartWizardWidget = ChartWizardWidget(self.main_engine, self.event_engine, workspace_filename="")
+        self.widget.resize(1600, 900)
+        self.widget.show()
+
+    def run(
+        self,
+        query_counts: Tuple[int, ...] = QUERY_COUNTS,
+        open_counts: Tuple[int, ...] = OPEN_COUNTS,
+        indicator_counts: Tuple[int, ...] = INDICATOR_COUNTS,
+        tick_count: int = TICK_COUNT
+    ) -> Dict[str, float]:
+        """"""
+        for count in query_counts:
+            self.bench_query_history(count)
+
+        for count in open_counts:
+            self.bench_chart_open(count)
+
+        self.bench_ticks(tick_count)
+        self.bench_spreads(tick_count)
+
+        for count in indicator_counts:
+            self.bench_indicators(count)
+
+        return self.metrics
+
+    def close(self) -> None:
+        """"""
+        self.main_engine.close()
+
+    def bench_query_history(self, count: int) -> None:
+        """
+        Query history from datafeed first, then again from snapshot.
+        """
+        vt_symbol: str = f"QUERY{count}.{Exchange.SHFE.value}"
+        self.add_contract(vt_symbol)
+
+        end: datetime = datetime.now(DB_TZ).replace(second=0, microsecond=0)
+        start: datetime = end - timedelta(minutes=count - 1)
+
+        for name in ("cold", "warm"):
+            data, stats = self.engine._query_history(vt_symbol, Interval.MINUTE, start, end)
+            self.metrics[f"query_history.{count}.{name}"] = stats["query"]
+
+        self.metrics[f"query_history.{count}.bars"] = len(data)
+
+    def bench_chart_open(self, count: int) -> None:
+        """
+        Feed history events to a new chart as sent by engine, until all are drawn.
+        """
+        # Local symbol without stored data, so that no history is queried
+        vt_symbol: str = f"OPEN{count}.{Exchange.LOCAL.value}"
+        chart: "ChartWidget" = self.open_chart(vt_symbol)
+        self.wait(lambda: not self.engine.futures)
+
+        end: datetime = datetime.now(DB_TZ).replace(second=0, microsecond=0)
+        data: BarColumns = generate_columns(vt_symbol, end - timedelta(minutes=count - 1), count)
+
+        events: List[Event] = [Event(EVENT_CHART_HISTORY, chunk) for chunk in split_history(data)]
+
+        start_time: float = perf_counter()
+
+        self.widget.process_history_event(events[0])
+        self.widget.grab()
+        self.metrics[f"chart_open.{count}.first_draw"] = perf_counter() - start_time
+
+        for event in events[1:]:
+            self.widget.process_history_event(event)
+
+        self.wait(
+            lambda: not self.widget.history_chunks and not self.is_calculating(chart),
+            timeout=600
+        )
+        self.widget.grab()
+
+        self.metrics[f"chart_open.{count}.total"] = perf_counter() - start_time
+        self.metrics[f"chart_open.{count}.bars"] = chart._manager.get_count()
+
+        self.close_charts()
+
+    def bench_ticks(self, count: int) -> None:
+        """
+        Feed ticks to a chart with history loaded, flushed at frame rate.
+        """
+        vt_symbol: str = f"TICK.{Exchange.SHFE.value}"
+        self.add_contract(vt_symbol)
+
+        chart: "ChartWidget" = self.open_chart(vt_symbol)
+        self.wait(lambda: chart._manager.get_count() and not self.widget.history_chunks)
+
+        start: datetime = chart._manager.get_datetime(chart._manager.get_count() - 1) + timedelta(minutes=1)
+        events: List[Event] = [Event(EVENT_TICK, tick) for tick in generate_ticks(vt_symbol, start, count)]
+
+        seconds: float = self.feed_events(self.widget.process_tick_event, events)
+        self.metrics["ticks.seconds"] = seconds
+        self.metrics["ticks.per_second"] = count / seconds
+
+        self.close_charts()
+
+    def bench_spreads(self, count: int) -> None:
+        """
+        Feed spread data to a spread chart, flushed at frame rate.
+        """
+        name: str = "SPREAD"
+
+        self.open_chart(f"{name}.{Exchange.LOCAL.value}")
+        self.wait(lambda: not self.engine.futures)
+
+        start: datetime = datetime.now(DB_TZ).replace(second=0, microsecond=0)
+        events: List[Event] = [Event(EVENT_SPREAD_DATA, item) for item in generate_spreads(name, start, count)]
+
+        seconds: float = self.feed_events(self.widget.process_spread_event, events)
+        self.metrics["spreads.seconds"] = seconds
+        self.metrics["spreads.per_second"] = count / seconds
+
+        self.close_charts()
+
+        # Aggregation alone, against the previous path of tick data per event
+        items: List[SpreadItem] = [event.data for event in events]
+
+        tickdata_seconds: float = aggregate_spreads_by_tick(items)
+        generator_seconds: float = aggregate_spreads(items)
+
+        self.metrics["spreads.tickdata_per_second"] = count / tickdata_seconds
+        self.metrics["spreads.generator_per_second"] = count / generator_seconds
+        self.metrics["spreads.generator_speedup"] = tickdata_seconds / generator_seconds
+
+        # Share of one core used at EVENT_RATE
+        self.metrics["spreads.tickdata_load"] = tickdata_seconds / count * EVENT_RATE
+        self.metrics["spreads.generator_load"] = generator_seconds / count * EVENT_RATE
+
+    def bench_indicators(self, count: int) -> None:
+        """
+        Measure calculation of history, update of one bar and drawing of one block.
+        """
+        from vnpy.trader.ui import QtGui
+
+        from vnpy_chartwizard.ui.base import IndicatorItem
+        from vnpy_chartwizard.ui.manager import BarManager
+        from vnpy_chartwizard.ui.rsi_item import RsiItem
+        from vnpy_chartwizard.ui.sma_item import SmaItem
+        from vnpy_chartwizard.ui.vqi_item import VqiItem
+
+        vt_symbol: str = f"INDICATOR.{Exchange.LOCAL.value}"
+        start: datetime = datetime.now(DB_TZ).replace(second=0, microsecond=0)
+        data: BarColumns = generate_columns(vt_symbol, start, count + UPDATE_COUNT)
+
+        item_class: Type[IndicatorItem]
+        for item_class in (SmaItem, RsiItem, VqiItem):
+            prefix: str = f"indicator.{item_class.__name__}.{count}"
+
+            manager: BarManager = BarManager()
+            item: IndicatorItem = item_class(manager)
+
+            # History is loaded into manager before items, as by chart
+            start_time: float = perf_counter()
+            manager.update_history(data.slice(0, count))
+            item.update_history([])
+            self.wait(lambda: not item._shared.calculating)
+            self.metrics[f"{prefix}.init"] = perf_counter() - start_time
+
+            bars: List[BarData] = [data.get_bar(ix) for ix in range(count, count + UPDATE_COUNT)]
+            cost: float = 0
+
+            for bar in bars:
+                manager.update_bar(bar)
+
+                start_time = perf_counter()
+                item.feed_bar(bar)
+                cost += perf_counter() - start_time
+
+            self.metrics[f"{prefix}.update_us"] = cost / UPDATE_COUNT * 1e6
+
+            picture: QtGui.QPicture = QtGui.QPicture()
+            painter: QtGui.QPainter = QtGui.QPainter(picture)
+
+            end: int = manager.get_count()
+            start_time = perf_counter()
+            item._draw_block(painter, end - item.block_size, end)
+            self.metrics[f"{prefix}.draw_block"] = perf_counter() - start_time
+
+            painter.end()
+            item.release()
+
+    def feed_events(self, process: Callable, events: List[Event]) -> float:
+        """
+        Process events at once, with charts flushed and painted once per frame of event time.
+        """
+        widget: "ChartWizardWidget" = self.widget
+        frame_size: int = max(EVENT_RATE // widget.update_fps, 1)
+
+        widget.timer.stop()
+        start_time: float = perf_counter()
+
+        for ix, event in enumerate(events, 1):
+            process(event)
+
+            if not ix % frame_size:
+                widget.flush_charts()
+                self.app.processEvents()
+
+        widget.flush_charts()
+        self.app.processEvents()
+
+        cost: float = perf_counter() - start_time
+        widget.timer.start()
+        return cost
+
+    def open_chart(self, vt_symbol: str) -> "ChartWidget":
+        """
+        Open chart of symbol in widget, as done by user.
+        """
+        self.widget.symbol_line.setText(vt_symbol)
+        self.widget.new_chart()
+        return self.widget.charts[vt_symbol]
+
+    def close_charts(self) -> None:
+        """"""
+        while self.widget.tab.count():
+            self.widget.close_tab(0)
+
+        self.app.processEvents()
+
+    def add_contract(self, vt_symbol: str) -> None:
+        """
+        Add contract of symbol, with history queried from datafeed.
+        """
+        symbol, exchange = extract_vt_symbol(vt_symbol)
+
+        contract: ContractData = ContractData(
+            symbol=symbol,
+            exchange=exchange,
+            name=symbol,
+            product=Product.FUTURES,
+            size=1,
+            pricetick=0.01,
+            gateway_name=GATEWAY_NAME
+        )
+        self.event_engine.put(Event(EVENT_CONTRACT, contract))
+
+        self.wait(lambda: self.main_engine.get_contract(vt_symbol))
+
+    def is_calculating(self, chart: "ChartWidget") -> bool:
+        """"""
+        for item in chart._items.values():
+            shared = getattr(item, "_shared", None)
+            if shared and shared.calculating:
+                return True
+        return False
+
+    def wait(self, condition: Callable, timeout: float = 60) -> None:
+        """
+        Process Qt events until condition is met.
+        """
+        end_time: float = perf_counter() + timeout
+
+        while not condition():
+            if perf_counter() > end_time:
+                raise TimeoutError("benchmark condition not met in time")
+
+            self.app.processEvents()
+            sleep(0.001)
+
+
+def aggregate_spreads_by_tick(items: List[SpreadItem]) -> float:
+    """
+    Aggregate spread data into bars as before SpreadBarGenerator, return seconds taken.
+
+    Tick data is created for every spread update and fed to BarGenerator,
+    then forming bar is copied with datetime floored for chart.
+    """
+    bg: BarGenerator = BarGenerator(lambda bar: None)
+    start_time: float = perf_counter()
+
+    for item in items:
+        tick: TickData = TickData(
+            symbol=item.name,
+            exchange=Exchange.LOCAL,
+            datetime=item.datetime,
+            name=item.name,
+            last_price=(item.bid_price + item.ask_price) / 2,
+            bid_price_1=item.bid_price,
+            ask_price_1=item.ask_price,
+            bid_volume_1=item.bid_volume,
+            ask_volume_1=item.ask_volume,
+            gateway_name="SPREAD"
+        )
+        bg.update_tick(tick)
+
+        bar: BarData = copy(bg.bar)
+        bar.datetime = bar.datetime.replace(second=0, microsecond=0)
+
+    return perf_counter() - start_time
+
+
+def aggregate_spreads(items: List[SpreadItem]) -> float:
+    """
+    Aggregate spread data into bars with SpreadBarGenerator, return seconds taken.
+    """
+    name: str = items[0].name
+    bg: SpreadBarGenerator = SpreadBarGenerator(lambda bar: None, f"{name}.{Exchange.LOCAL.value}", name)
+    start_time: float = perf_counter()
+
+    for item in items:
+        bg.update_spread(item)
+
+    return perf_counter() - start_time
+
+
+def compare_metrics(metrics: Dict[str, float], baseline: Dict[str, float]) -> List[str]:
+    """
+    Get lines of metrics with change from baseline.
+    """
+    lines: List[str] = []
+
+    for name, value in metrics.items():
+        base: Optional[float] = baseline.get(name, None)
+
+        if base:
+            lines.append(f"{name}: {value:.6g} ({(value - base) / base:+.1%})")
+        else:
+            lines.append(f"{name}: {value:.6g}")
+
+    return lines
+
+
+def parse_args() -> Namespace:
+    """"""
+    parser: ArgumentParser = ArgumentParser(description="Benchmark of chart wizard")
+    parser.add_argument("--output", default="chartwizard_benchmark.json", help="JSON file of results")
+    parser.add_argument("--baseline", default="", help="JSON file of earlier results to compare with")
+    parser.add_argument("--query-counts", type=int, nargs="*", default=QUERY_COUNTS)
+    parser.add_argument("--open-counts", type=int, nargs="*", default=OPEN_COUNTS)
+    parser.add_argument("--indicator-counts", type=int, nargs="*", default=INDICATOR_COUNTS)
+    parser.add_argument("--tick-count", type=int, default=TICK_COUNT)
+    parser.add_argument("--monitor", action="store_true", help="run with performance monitor enabled")
+    return parser.parse_args()
+
+
+def main() -> None:
+    """"""
+    args: Namespace = parse_args()
+
+    # Must be set before Qt application is created
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+    monitor.set_enabled(args.monitor)
+
+    with TemporaryDirectory() as folder:
+        benchmark: ChartBenchmark = ChartBenchmark(Path(folder))
+
+        try:
+            metrics: Dict[str, float] = benchmark.run(
+                tuple(args.query_counts),
+                tuple(args.open_counts),
+                tuple(args.indicator_counts),
+                args.tick_count
+            )
+        finally:
+            benchmark.close()
+
+    result: dict = {
+        "datetime": datetime.now().isoformat(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "metrics": metrics,
+    }
+
+    if args.monitor:
+        result["monitor"] = monitor.to_dict()
+
+    with open(args.output, mode="w", encoding="UTF-8") as f:
+        json.dump(result, f, indent=4)
+
+    baseline: Dict[str, float] = {}
+    if args.baseline:
+        with open(args.baseline, encoding="UTF-8") as f:
+            baseline = json.load(f)["metrics"]
+
+    for line in compare_metrics(metrics, baseline):
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+import os
+
+# Must be set before Qt application is created
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
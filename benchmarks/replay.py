@@ -0,0 +1,356 @@
+"""
+Replay of recorded tick and spread events into a headless chart widget.
+
+Events of a log recorded by TickRecorder are put into event engine from a
+feeder thread, at recorded pace scaled by speed, or as fast as possible
+with speed 0. Widget receives them through the same path as live data,
+and reports throughput, frame latency and queue depth as flat metrics:
+
+    python benchmarks/replay.py open.cwtl --speed 10 --output result.json --baseline last.json
+"""
+
+import json
+import os
+import platform
+from argparse import ArgumentParser, Namespace
+from datetime import datetime, timedelta
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from threading import Thread
+from time import perf_counter, sleep
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+import numpy as np
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.database import DB_TZ, BarOverview, BaseDatabase, get_database
+from vnpy.trader.datafeed import get_datafeed
+from vnpy.trader.object import BarData
+from vnpy.trader.utility import extract_vt_symbol
+
+from benchmark import BenchmarkDatabase, ChartBenchmark, compare_metrics, to_aware
+from vnpy_chartwizard.monitor import Histogram, monitor
+from vnpy_chartwizard.recorder import TickLog
+
+if TYPE_CHECKING:
+    from vnpy_chartwizard.ui.chart import ChartWidget
+    from vnpy_chartwizard.ui.widget import ChartWizardWidget
+
+
+# Recorded gaps longer than this are shortened, in seconds
+MAX_GAP = 1.0
+
+# Seconds between samples of queue depth
+SAMPLE_INTERVAL = 0.001
+
+# Seconds to wait for events queued after the last one is put
+DRAIN_TIMEOUT = 60
+
+
+class ReplayDatabase(BenchmarkDatabase):
+    """
+    Database reading bars from another one, with bars saved kept in memory only.
+
+    Replay queries history as application does, but never writes into the
+    database of user.
+    """
+
+    def __init__(self, database: BaseDatabase) -> None:
+        """"""
+        super().__init__()
+
+        self.database: BaseDatabase = database
+
+    def load_bar_data(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime
+    ) -> List[BarData]:
+        """
+        Load bars of database, replaced by ones saved with same datetime.
+        """
+        buf: Dict[datetime, BarData] = {
+            to_aware(bar.datetime): bar
+            for bar in self.database.load_bar_data(symbol, exchange, interval, start, end)
+        }
+
+        for bar in super().load_bar_data(symbol, exchange, interval, start, end):
+            buf[to_aware(bar.datetime)] = bar
+
+        return [buf[dt] for dt in sorted(buf)]
+
+    def get_bar_overview(self) -> List[BarOverview]:
+        """
+        Get overview of database, extended over bars saved.
+
+        Count may include bars both stored and saved, only used to tell
+        whether any bar is stored.
+        """
+        overviews: Dict[tuple, BarOverview] = {
+            (overview.symbol, overview.exchange, overview.interval): overview
+            for overview in self.database.get_bar_overview()
+        }
+
+        for overview in super().get_bar_overview():
+            key: tuple = (overview.symbol, overview.exchange, overview.interval)
+            stored: Optional[BarOverview] = overviews.get(key, None)
+
+            if stored:
+                overview.count += stored.count
+                overview.start = min(overview.start, to_aware(stored.start))
+                overview.end = max(overview.end, to_aware(stored.end))
+
+            overviews[key] = overview
+
+        return list(overviews.values())
+
+
+class ChartReplay(ChartBenchmark):
+    """
+    Replay events of log into widget, with charts of all symbols in log.
+
+    History of charts ends at the first event of each symbol, loaded from
+    database and datafeed configured, or generated by stand-ins with
+    synthetic_history. Bars queried or finished during replay are kept in
+    memory by ReplayDatabase and written only into snapshots of a temporary
+    folder, never into database configured.
+
+    Queue depth is the number of events put into event engine but not
+    handled by widget yet, and queue delay the age of the oldest of them.
+    Time to paint from recorded timestamps is kept by monitor as well, but
+    means nothing in replay.
+    """
+
+    def __init__(self, folder: Path, synthetic_history: bool = False) -> None:
+        """"""
+        super().__init__(folder)
+
+        if not synthetic_history:
+            self.engine.datafeed = get_datafeed()
+            self.engine.database = ReplayDatabase(get_database())
+
+        self.put_count: int = 0
+        self.feeding: bool = False
+
+        # Put time of each event, for delay of the oldest one not handled
+        self.put_times: List[float] = []
+
+        self.depth_samples: List[int] = []
+        self.delay_samples: List[float] = []
+
+    def open_charts(self, log: TickLog) -> None:
+        """
+        Open charts of symbols in log, and wait until history is drawn.
+        """
+        for vt_symbol in log.vt_symbols:
+            _, exchange = extract_vt_symbol(vt_symbol)
+            if exchange != Exchange.LOCAL:
+                self.add_contract(vt_symbol)
+
+            end: datetime = datetime.fromtimestamp(log.first_timestamps[vt_symbol], DB_TZ)
+            self.widget.add_chart(vt_symbol, end.replace(second=0, microsecond=0) - timedelta(minutes=1))
+
+        self.widget.tab.setCurrentIndex(0)
+
+        charts: List["ChartWidget"] = list(self.widget.charts.values())
+        self.wait(
+            lambda: (
+                not self.engine.futures
+                and not self.widget.history_chunks
+                and not any(self.is_calculating(chart) for chart in charts)
+            ),
+            timeout=600
+        )
+
+    def replay(self, log: TickLog, speed: float = 1, max_gap: float = MAX_GAP) -> Dict[str, float]:
+        """
+        Replay events of log at speed, and return metrics of it.
+        """
+        from vnpy.trader.ui import QtCore
+
+        self.open_charts(log)
+
+        widget: "ChartWizardWidget" = self.widget
+        start_count: int = widget.tick_count
+        start_frames: int = widget.frame_count
+        start_coalesced: int = widget.coalesced_count
+
+        monitor.reset()
+        monitor.set_enabled(True)
+
+        self.feeding = True
+        feeder: Thread = Thread(target=self.feed, args=(log, speed, max_gap, start_count), daemon=True)
+
+        start_time: float = perf_counter()
+        feeder.start()
+
+        # Events are handled as by application, until all put are handled
+        end_time: float = 0
+        while self.feeding or widget.tick_count - start_count < self.put_count:
+            self.app.processEvents(QtCore.QEventLoop.ProcessEventsFlag.WaitForMoreEvents)
+
+            if not self.feeding:
+                end_time = end_time or perf_counter()
+                if perf_counter() - end_time > DRAIN_TIMEOUT:
+                    break
+
+        feeder.join()
+        widget.flush_charts()
+        self.app.processEvents()
+
+        seconds: float = perf_counter() - start_time
+        handled: int = widget.tick_count - start_count
+
+        monitor.set_enabled(False)
+
+        metrics: Dict[str, float] = self.metrics
+        metrics["replay.events"] = log.count
+        metrics["replay.handled"] = handled
+        metrics["replay.seconds"] = seconds
+        metrics["replay.per_second"] = handled / seconds
+        metrics["replay.drain_seconds"] = perf_counter() - end_time if end_time else 0
+        metrics["replay.frames"] = widget.frame_count - start_frames
+        metrics["replay.coalesced"] = widget.coalesced_count - start_coalesced
+
+        if self.depth_samples:
+            depths: np.ndarray = np.array(self.depth_samples)
+            metrics["replay.queue_depth.mean"] = float(depths.mean())
+            metrics["replay.queue_depth.p99"] = float(np.percentile(depths, 99))
+            metrics["replay.queue_depth.max"] = float(depths.max())
+
+            delays: np.ndarray = np.array(self.delay_samples)
+            metrics["replay.queue_delay.p99"] = float(np.percentile(delays, 99))
+            metrics["replay.queue_delay.max"] = float(delays.max())
+
+        # Latency from event handled to chart painted, of all charts
+        latency: Histogram = Histogram()
+        for (name, _), histogram in monitor.histograms.items():
+            if name == "frame_latency_seconds":
+                latency.merge(histogram)
+
+        metrics["replay.frame_latency.count"] = latency.count
+        metrics["replay.frame_latency.p50"] = latency.get_quantile(0.5)
+        metrics["replay.frame_latency.p99"] = latency.get_quantile(0.99)
+        metrics["replay.frame_latency.max"] = latency.max
+
+        return metrics
+
+    def feed(self, log: TickLog, speed: float, max_gap: float, start_count: int) -> None:
+        """
+        Put events into event engine at recorded pace, in feeder thread.
+        """
+        widget: "ChartWizardWidget" = self.widget
+        put = self.event_engine.put
+        put_times: List[float] = self.put_times
+
+        # Replay time of current event, and receive time of the last one
+        replay_time: float = 0
+        last_time: float = log.start_time
+
+        start_time: float = perf_counter()
+        sample_time: float = start_time
+
+        for receive_time, event in log.iter_events():
+            if speed:
+                replay_time += min(receive_time - last_time, max_gap) / speed
+                last_time = receive_time
+
+                while True:
+                    now: float = perf_counter()
+                    if now >= sample_time:
+                        self.sample(now, start_count)
+                        sample_time = now + SAMPLE_INTERVAL
+
+                    wait: float = start_time + replay_time - now
+                    if wait <= 0:
+                        break
+                    sleep(min(wait, SAMPLE_INTERVAL))
+            else:
+                now: float = perf_counter()
+                if now >= sample_time:
+                    self.sample(now, start_count)
+                    sample_time = now + SAMPLE_INTERVAL
+
+            put_times.append(perf_counter())
+            self.put_count += 1
+            put(event)
+
+        self.feeding = False
+
+        # Queue is sampled until drained
+        while widget.tick_count - start_count < self.put_count:
+            now: float = perf_counter()
+            if now - put_times[-1] > DRAIN_TIMEOUT:
+                break
+
+            self.sample(now, start_count)
+            sleep(SAMPLE_INTERVAL)
+
+    def sample(self, now: float, start_count: int) -> None:
+        """
+        Sample number and delay of events put but not handled.
+        """
+        handled: int = self.widget.tick_count - start_count
+        depth: int = self.put_count - handled
+
+        self.depth_samples.append(depth)
+        self.delay_samples.append(now - self.put_times[handled] if depth > 0 else 0)
+
+
+def parse_args() -> Namespace:
+    """"""
+    parser: ArgumentParser = ArgumentParser(description="Replay of recorded ticks into chart wizard")
+    parser.add_argument("log", help="tick log recorded by chart wizard")
+    parser.add_argument("--speed", type=float, default=1, help="multiple of recorded pace, 0 for max speed")
+    parser.add_argument("--max-gap", type=float, default=MAX_GAP, help="seconds that longer gaps are shortened to")
+    parser.add_argument("--synthetic-history", action="store_true", help="generate history instead of loading it")
+    parser.add_argument("--output", default="chartwizard_replay.json", help="JSON file of results")
+    parser.add_argument("--baseline", default="", help="JSON file of earlier results to compare with")
+    return parser.parse_args()
+
+
+def main() -> None:
+    """"""
+    args: Namespace = parse_args()
+
+    # Must be set before Qt application is created
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+    log: TickLog = TickLog(Path(args.log))
+    print(f"Replaying {log.count} events of {len(log.vt_symbols)} symbols, {log.end_time - log.start_time:.1f}s recorded")
+
+    with TemporaryDirectory() as folder:
+        replay: ChartReplay = ChartReplay(Path(folder), args.synthetic_history)
+
+        try:
+            metrics: Dict[str, float] = replay.replay(log, args.speed, args.max_gap)
+        finally:
+            replay.close()
+
+    result: dict = {
+        "datetime": datetime.now().isoformat(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "log": str(args.log),
+        "speed": args.speed,
+        "metrics": metrics,
+        "monitor": monitor.to_dict(),
+    }
+
+    with open(args.output, mode="w", encoding="UTF-8") as f:
+        json.dump(result, f, indent=4)
+
+    baseline: Dict[str, float] = {}
+    if args.baseline:
+        with open(args.baseline, encoding="UTF-8") as f:
+            baseline = json.load(f)["metrics"]
+
+    for line in compare_metrics(metrics, baseline):
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
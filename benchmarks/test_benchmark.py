@@ -0,0 +1,68 @@
+"""
+Benchmark suite of pytest-benchmark, with the same harness as benchmark.py:
+
+    pytest benchmarks --benchmark-json result.json
+    pytest benchmarks --benchmark-autosave --benchmark-compare
+
+Each benchmark runs once, detailed metrics of it such as time to first draw
+are kept in extra_info of results.
+"""
+
+from pathlib import Path
+from typing import Callable, Iterator
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from benchmark import INDICATOR_COUNTS, OPEN_COUNTS, QUERY_COUNTS, TICK_COUNT, ChartBenchmark  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def harness(tmp_path_factory: pytest.TempPathFactory) -> Iterator[ChartBenchmark]:
+    """
+    Headless application with stand-in data sources, shared by benchmarks.
+    """
+    folder: Path = tmp_path_factory.mktemp("snapshot")
+    harness: ChartBenchmark = ChartBenchmark(folder)
+
+    yield harness
+
+    harness.close()
+
+
+def run(benchmark, harness: ChartBenchmark, method: Callable, *args) -> None:
+    """
+    Run benchmark method of harness once, keeping its metrics.
+    """
+    harness.metrics.clear()
+    benchmark.pedantic(method, args=args, rounds=1, iterations=1)
+    benchmark.extra_info.update(harness.metrics)
+
+
+@pytest.mark.parametrize("count", QUERY_COUNTS)
+def test_query_history(benchmark, harness: ChartBenchmark, count: int) -> None:
+    """"""
+    run(benchmark, harness, harness.bench_query_history, count)
+
+
+@pytest.mark.parametrize("count", OPEN_COUNTS)
+def test_chart_open(benchmark, harness: ChartBenchmark, count: int) -> None:
+    """"""
+    run(benchmark, harness, harness.bench_chart_open, count)
+
+
+def test_ticks(benchmark, harness: ChartBenchmark) -> None:
+    """"""
+    run(benchmark, harness, harness.bench_ticks, TICK_COUNT)
+
+
+def test_spreads(benchmark, harness: ChartBenchmark) -> None:
+    """"""
+    run(benchmark, harness, harness.bench_spreads, TICK_COUNT)
+
+
+@pytest.mark.parametrize("count", INDICATOR_COUNTS)
+def test_indicators(benchmark, harness: ChartBenchmark, count: int) -> None:
+    """"""
+    run(benchmark, harness, harness.bench_indicators, count)
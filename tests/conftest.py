@@ -0,0 +1,16 @@
+import os
+
+import pytest
+
+# Must be set before Qt application is created
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    """
+    Qt application shared by tests of widgets and signals.
+    """
+    from vnpy.trader.ui import QtWidgets
+
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
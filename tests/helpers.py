@@ -0,0 +1,48 @@
+"""
+Stand-ins shared by tests.
+"""
+
+from datetime import datetime
+from typing import List
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.database import BarOverview, BaseDatabase
+from vnpy.trader.object import BarData, TickData
+
+
+class EmptyDatabase(BaseDatabase):
+    """
+    Stand-in database without any data.
+    """
+
+    def save_bar_data(self, bars: List[BarData], stream: bool = False) -> bool:
+        """"""
+        return True
+
+    def save_tick_data(self, ticks: List[TickData], stream: bool = False) -> bool:
+        """"""
+        return True
+
+    def load_bar_data(self, symbol: str, exchange: Exchange, interval: Interval, start: datetime, end: datetime) -> List[BarData]:
+        """"""
+        return []
+
+    def load_tick_data(self, symbol: str, exchange: Exchange, start: datetime, end: datetime) -> List[TickData]:
+        """"""
+        return []
+
+    def delete_bar_data(self, symbol: str, exchange: Exchange, interval: Interval) -> int:
+        """"""
+        return 0
+
+    def delete_tick_data(self, symbol: str, exchange: Exchange) -> int:
+        """"""
+        return 0
+
+    def get_bar_overview(self) -> List[BarOverview]:
+        """"""
+        return []
+
+    def get_tick_overview(self) -> list:
+        """"""
+        return []
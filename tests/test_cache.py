@@ -0,0 +1,98 @@
+from time import perf_counter
+from typing import List
+
+import numpy as np
+
+from vnpy.trader.ui import QtCore
+
+from vnpy_chartwizard.indicator import SmaStream
+from vnpy_chartwizard.ui.cache import SharedStream
+
+
+class FailingStream(SmaStream):
+    """
+    Stream raising in calculation of whole arrays.
+    """
+
+    def _calculate(self, close: np.ndarray) -> np.ndarray:
+        """"""
+        raise ValueError("calculation failed")
+
+
+class Item:
+    """
+    Stand-in of indicator item bound to shared stream.
+    """
+
+    def __init__(self, arrays: List[np.ndarray]) -> None:
+        """"""
+        self.arrays: List[np.ndarray] = arrays
+
+    def get_input_arrays(self) -> List[np.ndarray]:
+        """"""
+        return self.arrays
+
+    def refresh(self, start: int = 0) -> None:
+        """"""
+        pass
+
+    def invalidate(self, start: int = 0) -> None:
+        """"""
+        pass
+
+
+def wait(condition, timeout: float = 10) -> None:
+    """
+    Process events of Qt until condition is met.
+    """
+    start: float = perf_counter()
+    while not condition():
+        assert perf_counter() - start < timeout
+        QtCore.QCoreApplication.processEvents()
+
+
+def test_calculate_failure(qapp) -> None:
+    """
+    Failure in worker thread resets calculating and is not retried with the same bars.
+    """
+    shared: SharedStream = SharedStream((), FailingStream(5))
+    count: int = shared.background_count
+
+    arrays: List[np.ndarray] = [np.arange(count, dtype=float)]
+    shared.calculate(arrays, (count,))
+    wait(lambda: not shared.calculating)
+    assert not len(shared.stream.values)
+
+    version: int = shared._version
+    shared.calculate(arrays, (count,))
+    assert shared._version == version
+
+    # Bars changed are calculated again
+    shared.calculate(arrays, (count, 1))
+    assert shared._version == version + 1
+
+
+def test_recalculate_in_worker(qapp) -> None:
+    """
+    Full recalculation needed by revised bars is done in worker thread.
+    """
+    shared: SharedStream = SharedStream((), SmaStream(5))
+    count: int = shared.background_count * 2
+
+    close: np.ndarray = np.arange(count, dtype=float)
+    item: Item = Item([close])
+    shared.items.append(item)
+
+    shared.calculate([close], (count,))
+    wait(lambda: not shared.calculating)
+
+    # Revised bar changes value before the start of recalculation
+    close = close.copy()
+    close[count // 2 - 1] = 0
+    item.arrays = [close]
+
+    shared.sync(count // 2, [close], (count, 1), None)
+    assert shared.calculating
+
+    wait(lambda: not shared.calculating)
+    np.testing.assert_array_equal(shared.stream.values.array, SmaStream(5)._calculate(close))
@@ -0,0 +1,205 @@
+from datetime import datetime, timedelta
+from threading import Event
+from typing import Dict, List, Optional
+
+from vnpy.event import EventEngine
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.database import DB_TZ, BarOverview
+from vnpy.trader.datafeed import BaseDatafeed
+from vnpy.trader.engine import MainEngine
+from vnpy.trader.object import BarData, HistoryRequest
+
+from vnpy_chartwizard.engine import ChartWizardEngine
+from vnpy_chartwizard.store import BarColumns
+
+from helpers import EmptyDatabase
+
+
+START = datetime(2024, 1, 2, 9, tzinfo=DB_TZ)
+END = START + timedelta(minutes=59)
+
+
+class RecordDatafeed(BaseDatafeed):
+    """
+    Stand-in datafeed returning one bar per minute, with requests recorded.
+    """
+
+    def __init__(self) -> None:
+        """"""
+        self.requests: List[HistoryRequest] = []
+
+    def query_bar_history(self, req: HistoryRequest, output=print) -> List[BarData]:
+        """"""
+        self.requests.append(req)
+
+        return [
+            BarData(
+                symbol=req.symbol,
+                exchange=req.exchange,
+                interval=req.interval,
+                datetime=req.start + timedelta(minutes=n),
+                close_price=100,
+                gateway_name="DATAFEED"
+            )
+            for n in range(int((req.end - req.start).total_seconds() // 60) + 1)
+        ]
+
+
+class RecordDatabase(EmptyDatabase):
+    """
+    Stand-in database without any data, with bars saved recorded.
+    """
+
+    def __init__(self) -> None:
+        """"""
+        self.saved: List[BarData] = []
+
+    def save_bar_data(self, bars: List[BarData], stream: bool = False) -> bool:
+        """"""
+        self.saved.extend(bars)
+        return True
+
+
+class MemoryDatabase(RecordDatabase):
+    """
+    Stand-in database keeping bars saved in memory.
+    """
+
+    def load_bar_data(self, symbol: str, exchange: Exchange, interval: Interval, start: datetime, end: datetime) -> List[BarData]:
+        """"""
+        start = start.replace(tzinfo=DB_TZ)
+        end = end.replace(tzinfo=DB_TZ)
+
+        bars: Dict[datetime, BarData] = {
+            bar.datetime: bar for bar in self.saved
+            if bar.symbol == symbol and bar.exchange == exchange and bar.interval == interval
+            and start <= bar.datetime <= end
+        }
+        return [bars[dt] for dt in sorted(bars)]
+
+    def get_bar_overview(self) -> List[BarOverview]:
+        """"""
+        if not self.saved:
+            return []
+
+        bar: BarData = self.saved[0]
+        return [BarOverview(
+            symbol=bar.symbol,
+            exchange=bar.exchange,
+            interval=bar.interval,
+            count=len(self.saved),
+            start=min(bar.datetime for bar in self.saved),
+            end=max(bar.datetime for bar in self.saved)
+        )]
+
+
+def create_engine(tmp_path, database: Optional[RecordDatabase] = None) -> ChartWizardEngine:
+    """"""
+    main_engine: MainEngine = MainEngine(EventEngine())
+
+    engine: ChartWizardEngine = main_engine.add_engine(ChartWizardEngine)
+    engine.datafeed = RecordDatafeed()
+    engine.database = database or RecordDatabase()
+    engine.snapshot_folder = tmp_path
+    return engine
+
+
+def test_load_history_without_contract(tmp_path) -> None:
+    """
+    Symbol without contract is loaded from database only, unless using datafeed.
+    """
+    engine: ChartWizardEngine = create_engine(tmp_path)
+
+    try:
+        data: BarColumns = engine.load_history("TEST.SHFE", Interval.MINUTE, START, END)
+        assert not len(data)
+        assert not engine.datafeed.requests
+        assert not engine.database.saved
+
+        data = engine.load_history("TEST.SHFE", Interval.MINUTE, START, END, use_datafeed=True)
+        assert len(data) == 60
+        assert engine.datafeed.requests
+        assert len(engine.database.saved) == 60
+
+        # Spread bars are only stored locally
+        data = engine.load_history("SPREAD.LOCAL", Interval.MINUTE, START, END, use_datafeed=True)
+        assert not len(data)
+        assert all(req.exchange != Exchange.LOCAL for req in engine.datafeed.requests)
+    finally:
+        engine.main_engine.close()
+
+
+def test_query_gap_between_ranges(tmp_path) -> None:
+    """
+    Gap between ranges fetched before is queried, also after restart.
+    """
+    database: MemoryDatabase = MemoryDatabase()
+    gap_start: datetime = START + timedelta(hours=1)
+    gap_end: datetime = START + timedelta(hours=2)
+
+    engine: ChartWizardEngine = create_engine(tmp_path, database)
+    try:
+        engine.load_history("TEST.SHFE", Interval.MINUTE, START, END, use_datafeed=True)
+        engine.load_history("TEST.SHFE", Interval.MINUTE, gap_end, END + timedelta(hours=2), use_datafeed=True)
+    finally:
+        engine.main_engine.close()
+
+    # Database overview covers the gap, but ranges fetched are kept in file
+    engine = create_engine(tmp_path, database)
+    try:
+        data: BarColumns = engine.load_history("TEST.SHFE", Interval.MINUTE, START, END + timedelta(hours=2), use_datafeed=True)
+        assert len(data) == 180
+
+        assert [(req.start, req.end) for req in engine.datafeed.requests] == [(END, gap_end)]
+        assert gap_start in {bar.datetime for bar in database.saved}
+    finally:
+        engine.main_engine.close()
+
+
+class BlockingDatafeed(RecordDatafeed):
+    """
+    Stand-in datafeed waiting until released for each query.
+    """
+
+    def __init__(self) -> None:
+        """"""
+        super().__init__()
+
+        self.started: Event = Event()
+        self.released: Event = Event()
+
+    def query_bar_history(self, req: HistoryRequest, output=print) -> List[BarData]:
+        """"""
+        self.started.set()
+        self.released.wait(10)
+        return super().query_bar_history(req, output)
+
+
+def test_snapshot_unlocked_during_query(tmp_path) -> None:
+    """
+    Snapshot lock is not held while history is queried from remote source.
+    """
+    engine: ChartWizardEngine = create_engine(tmp_path)
+    datafeed: BlockingDatafeed = BlockingDatafeed()
+    engine.datafeed = datafeed
+
+    try:
+        future = engine.executor.submit(engine.load_history, "TEST.SHFE", Interval.MINUTE, START, END, True)
+        assert datafeed.started.wait(10)
+
+        lock = engine._get_snapshot_lock("TEST.SHFE", Interval.MINUTE)
+        assert lock.acquire(timeout=1)
+        lock.release()
+
+        datafeed.released.set()
+        assert len(future.result(10)) == 60
+
+        # Bar following snapshot is appended in worker pool
+        bar: BarData = datafeed.query_bar_history(HistoryRequest("TEST", Exchange.SHFE, END, END, Interval.MINUTE))[0]
+        bar.datetime = END + timedelta(minutes=1)
+        engine.save_bar(bar)
+
+        engine.executor.shutdown(wait=True)
+        assert engine._get_snapshot("TEST.SHFE", Interval.MINUTE).get_range() == (START, bar.datetime)
+    finally:
+        engine.main_engine.close()
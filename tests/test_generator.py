@@ -0,0 +1,173 @@
+import tracemalloc
+from copy import copy
+from datetime import datetime, timedelta
+from time import perf_counter
+from typing import List
+
+import numpy as np
+
+from vnpy.event import Event, EventEngine
+from vnpy.trader.constant import Exchange, Product
+from vnpy.trader.database import DB_TZ
+from vnpy.trader.engine import MainEngine
+from vnpy.trader.event import EVENT_CONTRACT, EVENT_TICK
+from vnpy.trader.object import BarData, ContractData, TickData
+from vnpy.trader.utility import BarGenerator
+
+from vnpy_chartwizard.engine import ChartWizardEngine
+from vnpy_chartwizard.generator import ChartBarGenerator
+
+from helpers import EmptyDatabase
+
+
+SYMBOL = "TEST"
+EXCHANGE = Exchange.SHFE
+GATEWAY_NAME = "TEST"
+
+BAR_ATTRIBUTES = (
+    "datetime",
+    "open_price",
+    "high_price",
+    "low_price",
+    "close_price",
+    "volume",
+    "turnover",
+    "open_interest",
+)
+
+
+def generate_ticks(start: datetime, count: int, step: timedelta, seed: int = 0) -> List[TickData]:
+    """
+    Generate ticks of random walk, with daily high and low moving sometimes and zero prices.
+    """
+    rng: np.random.Generator = np.random.default_rng(seed)
+
+    prices: np.ndarray = 100 + np.cumsum(rng.normal(0, 0.05, count))
+    prices[rng.random(count) < 0.01] = 0
+
+    volumes: np.ndarray = np.cumsum(rng.integers(0, 5, count))
+    high: float = 0
+    low: float = 1e9
+
+    ticks: List[TickData] = []
+    for i, (price, volume) in enumerate(zip(prices.tolist(), volumes.tolist())):
+        if price:
+            high = max(high, price + rng.random() * (rng.random() < 0.05))
+            low = min(low, price - rng.random() * (rng.random() < 0.05))
+
+        ticks.append(TickData(
+            symbol=SYMBOL,
+            exchange=EXCHANGE,
+            datetime=start + step * i,
+            last_price=price,
+            high_price=high,
+            low_price=low,
+            volume=volume,
+            turnover=volume * 100,
+            open_interest=1000 + i // 100,
+            gateway_name=GATEWAY_NAME
+        ))
+
+    return ticks
+
+
+def assert_bars_equal(bar: BarData, expected: BarData) -> None:
+    """"""
+    for name in BAR_ATTRIBUTES:
+        assert getattr(bar, name) == getattr(expected, name), name
+
+
+def test_same_bars_as_bar_generator() -> None:
+    """
+    Bars generated in place are the same as ones of vnpy BarGenerator.
+    """
+    start: datetime = datetime(2024, 1, 2, 9, 0, 30, tzinfo=DB_TZ)
+    ticks: List[TickData] = generate_ticks(start, 20000, timedelta(milliseconds=137))
+
+    bars: List[BarData] = []
+    expected: List[BarData] = []
+
+    # Bar of chart generator is reused, so copied when finished
+    bg: ChartBarGenerator = ChartBarGenerator(lambda bar: bars.append(copy(bar)))
+    expected_bg: BarGenerator = BarGenerator(expected.append)
+
+    for tick in ticks:
+        bg.update_tick(tick)
+        expected_bg.update_tick(tick)
+
+    assert len(bars) == len(expected) > 40
+    for bar, expected_bar in zip(bars, expected):
+        assert_bars_equal(bar, expected_bar)
+
+    # Forming bar of BarGenerator has datetime of the last tick
+    forming: BarData = copy(expected_bg.bar)
+    forming.datetime = forming.datetime.replace(second=0, microsecond=0)
+    assert_bars_equal(bg.bar, forming)
+
+
+def test_steady_state_memory(qapp) -> None:
+    """
+    Ticks within one minute handled by widget do not allocate memory kept.
+    """
+    from vnpy_chartwizard.ui.widget import ChartWizardWidget
+
+    event_engine: EventEngine = EventEngine()
+    main_engine: MainEngine = MainEngine(event_engine)
+
+    engine: ChartWizardEngine = main_engine.add_engine(ChartWizardEngine)
+    engine.database = EmptyDatabase()
+
+    try:
+        widget: ChartWizardWidget = ChartWizardWidget(main_engine, event_engine, workspace_filename="")
+        widget.show()
+
+        contract: ContractData = ContractData(
+            symbol=SYMBOL,
+            exchange=EXCHANGE,
+            name=SYMBOL,
+            product=Product.FUTURES,
+            size=1,
+            pricetick=0.01,
+            gateway_name=GATEWAY_NAME
+        )
+        main_engine.get_engine("oms").process_contract_event(Event(EVENT_CONTRACT, contract))
+
+        widget.add_chart(contract.vt_symbol)
+
+        end_time: float = perf_counter() + 10
+        while engine.futures:
+            assert perf_counter() < end_time
+            qapp.processEvents()
+        qapp.processEvents()
+
+        # Ticks of one minute at 1ms, handled with a frame every 100 ticks
+        start: datetime = datetime.now(DB_TZ).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        events: List[Event] = [
+            Event(EVENT_TICK, tick)
+            for tick in generate_ticks(start, 30000, timedelta(milliseconds=1))
+        ]
+
+        def feed(batch: List[Event]) -> None:
+            for n, event in enumerate(batch):
+                widget.process_tick_event(event)
+                if not n % 100:
+                    widget.flush_charts()
+            widget.flush_charts()
+
+        feed(events[:5000])
+
+        tracemalloc.start()
+        try:
+            feed(events[5000:15000])
+            warm: int = tracemalloc.get_traced_memory()[0]
+
+            feed(events[15000:])
+            growth: int = tracemalloc.get_traced_memory()[0] - warm
+        finally:
+            tracemalloc.stop()
+
+        # Leak of even a few bytes per tick would be over 100KB
+        assert growth < 64 * 1024, growth
+        assert widget.bgs[contract.vt_symbol].bar.datetime == start
+    finally:
+        main_engine.close()
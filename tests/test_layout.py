@@ -0,0 +1,53 @@
+from typing import Dict
+
+from vnpy_chartwizard.ui import layout
+from vnpy_chartwizard.ui.layout import DEFAULT_LAYOUT, build_chart, load_layouts
+
+
+USER_LAYOUTS: dict = {
+    "unknown": {
+        "plots": [
+            {
+                "name": "candle",
+                "items": [
+                    {"type": "candle"},
+                    {"type": "macd"},
+                    {"type": "sma", "params": {"window": 10}},
+                    {"type": "sma", "params": {"length": 10}},
+                    {"type": "rsi", "params": {"window": "14"}},
+                    {"type": "vqi", "params": {"currency_point": 0.5}},
+                    "sma",
+                ]
+            },
+            {"name": "macd", "items": [{"type": "macd"}]},
+            {"items": [{"type": "volume"}]},
+        ]
+    },
+    "empty": {"plots": [{"name": "macd", "items": [{"type": "macd"}]}]},
+    "broken": {"plot": []},
+    "默认": DEFAULT_LAYOUT,
+}
+
+
+def test_load_layouts(monkeypatch, qapp) -> None:
+    """
+    Items of unknown type or bad parameters are skipped, and layouts left empty.
+    """
+    monkeypatch.setattr(layout, "load_json", lambda filename: USER_LAYOUTS)
+
+    layouts: Dict[str, dict] = load_layouts()
+
+    assert "empty" not in layouts
+    assert "broken" not in layouts
+    assert layouts["默认"] == DEFAULT_LAYOUT
+
+    plots: list = layouts["unknown"]["plots"]
+    assert len(plots) == 1
+    assert plots[0]["items"] == [
+        {"type": "candle"},
+        {"type": "sma", "params": {"window": 10}},
+        {"type": "vqi", "params": {"currency_point": 0.5}},
+    ]
+
+    for name in layouts:
+        build_chart(layouts[name])
@@ -0,0 +1,155 @@
+from datetime import datetime, timedelta
+from typing import List
+
+import numpy as np
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.database import DB_TZ
+from vnpy.trader.utility import ZoneInfo
+from vnpy.trader.object import BarData
+
+from vnpy_chartwizard.column import FloatColumn
+from vnpy_chartwizard.indicator import RsiStream
+from vnpy_chartwizard.store import BAR_FIELDS, BarColumns, BarSnapshot
+
+
+VT_SYMBOL = "TEST.LOCAL"
+
+
+def get_columns(start: int, count: int, seed: int = 0) -> BarColumns:
+    """
+    Create columns of count minute bars, from minute start after a fixed time.
+    """
+    rng: np.random.Generator = np.random.default_rng(seed)
+    first: datetime = datetime(2024, 1, 1, tzinfo=DB_TZ) + timedelta(minutes=start)
+
+    bars: List[BarData] = []
+    for n in range(count):
+        price: float = float(100 + rng.standard_normal())
+        bars.append(BarData(
+            symbol="TEST",
+            exchange=Exchange.LOCAL,
+            datetime=first + timedelta(minutes=n),
+            interval=Interval.MINUTE,
+            open_price=price,
+            high_price=price + 1,
+            low_price=price - 1,
+            close_price=price,
+            volume=float(n),
+            gateway_name="DB"
+        ))
+
+    return BarColumns.from_bars(VT_SYMBOL, Interval.MINUTE, bars)
+
+
+def merge(base: BarColumns, other: BarColumns) -> BarColumns:
+    """
+    Merge by sorting all bars, as done for chunks not older than current bars.
+    """
+    dt_array: np.ndarray = np.concatenate([base.get_array("datetime"), other.get_array("datetime")])
+    order: np.ndarray = np.argsort(dt_array, kind="stable")
+
+    keep: np.ndarray = np.ones(len(order), dtype=bool)
+    keep[:-1] = dt_array[order][:-1] != dt_array[order][1:]
+
+    result: BarColumns = BarColumns(VT_SYMBOL, Interval.MINUTE)
+    result.set_arrays({
+        field: np.concatenate([base.get_array(field), other.get_array(field)])[order[keep]]
+        for field in BAR_FIELDS
+    })
+    return result
+
+
+def assert_columns_equal(a: BarColumns, b: BarColumns) -> None:
+    """"""
+    for field in BAR_FIELDS:
+        np.testing.assert_array_equal(a.get_array(field), b.get_array(field))
+
+
+def test_column_prepend() -> None:
+    """
+    Prepended and appended values keep order, with spare capacity NaN.
+    """
+    column: FloatColumn = FloatColumn(4)
+    expected: List[float] = []
+
+    for n in range(50):
+        if n % 3:
+            column.prepend(np.arange(n, dtype=float))
+            expected = list(range(n)) + expected
+        else:
+            column.append(float(n))
+            expected.append(float(n))
+
+        np.testing.assert_array_equal(column.array, expected)
+        assert column.get(0) == expected[0]
+        assert np.isnan(column.get(len(expected)))
+
+    column[0] = -1
+    assert column.array[0] == -1
+
+    column.set_array(np.arange(3, dtype=float))
+    np.testing.assert_array_equal(column.array, [0, 1, 2])
+    assert np.isnan(column._data[3:]).all()
+
+
+def test_prepend_history() -> None:
+    """
+    Older chunks are prepended with the same result as merging.
+    """
+    base: BarColumns = get_columns(10000, 2000)
+    expected: BarColumns = get_columns(10000, 2000)
+
+    end: int = 10000
+    for size in (2000, 4000, 1, 3000):
+        # Last bar of chunk replaces the first current one
+        chunk: BarColumns = get_columns(end - size + 1, size, seed=size)
+        end -= size - 1
+
+        expected = merge(expected, chunk)
+        base.update_history(chunk)
+        assert_columns_equal(base, expected)
+
+    # Chunk overlapping current bars is merged
+    chunk = get_columns(end - 10, 20, seed=1)
+    expected = merge(expected, chunk)
+    base.update_history(chunk)
+    assert_columns_equal(base, expected)
+
+
+def test_stream_prepend() -> None:
+    """
+    Values of stream prepended with older bars are the same as calculated at once.
+    """
+    columns: BarColumns = get_columns(0, 20000)
+    close: np.ndarray = columns.get_array("close_price")
+
+    stream: RsiStream = RsiStream(14)
+    stream.update_history(close[15000:])
+    for start in (13000, 9000, 0):
+        assert stream.prepend(len(close) - start - len(stream.values), close[start:])
+
+    expected: RsiStream = RsiStream(14)
+    expected.update_history(close)
+
+    np.testing.assert_allclose(stream.values.array, expected.values.array, equal_nan=True)
+
+
+def test_snapshot_timezone(tmp_path) -> None:
+    """
+    Columns loaded from snapshot have the same timezone and gateway as ones saved.
+    """
+    columns: BarColumns = get_columns(0, 100)
+    columns.tz = ZoneInfo("Asia/Shanghai")
+    columns.gateway_name = "DATAFEED"
+
+    snapshot: BarSnapshot = BarSnapshot(tmp_path, VT_SYMBOL, Interval.MINUTE)
+    snapshot.save(columns.slice(0, 50))
+    snapshot.append(columns.slice(40, 100))
+
+    loaded: BarColumns = snapshot.load(columns.get_datetime(0), columns.get_datetime(99))
+    assert_columns_equal(loaded, columns)
+    assert loaded.tz == columns.tz
+    assert loaded.gateway_name == columns.gateway_name
+    assert loaded.get_datetime(10) == columns.get_datetime(10)
+    assert str(loaded.get_datetime(10)) == str(columns.get_datetime(10))
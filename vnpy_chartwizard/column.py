@@ -0,0 +1,115 @@
+from typing import Union
+
+import numpy as np
+
+
+class FloatColumn:
+    """
+    Growable float64 array, with NaN for value not yet calculated.
+
+    Values are stored from offset start of buffer, so that spare capacity
+    is kept at both ends for appending and prepending.
+    """
+
+    def __init__(self, capacity: int = 1024) -> None:
+        """"""
+        self._data: np.ndarray = np.full(max(capacity, 1), np.nan)
+        self._start: int = 0
+        self._size: int = 0
+
+    def __len__(self) -> int:
+        """"""
+        return self._size
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[float, np.ndarray]:
+        """"""
+        return self.array[key]
+
+    def __setitem__(self, ix: int, value: float) -> None:
+        """
+        Update value in place, only existing index allowed.
+        """
+        if not 0 <= ix < self._size:
+            raise IndexError(f"column index out of range: {ix}")
+
+        self._data[self._start + ix] = value
+
+    @property
+    def array(self) -> np.ndarray:
+        """
+        Get view of all values, which is invalid after column grows.
+        """
+        return self._data[self._start:self._start + self._size]
+
+    def get(self, ix: int) -> float:
+        """
+        Get value with index, return NaN if not calculated.
+        """
+        if 0 <= ix < self._size:
+            return float(self._data[self._start + ix])
+
+        return np.nan
+
+    def append(self, value: float) -> None:
+        """
+        Append one value with amortized constant cost.
+        """
+        end: int = self._start + self._size
+        if end == len(self._data):
+            self._reserve(self._start + self._size * 2, self._start)
+            end = self._start + self._size
+
+        self._data[end] = value
+        self._size += 1
+
+    def prepend(self, array: np.ndarray) -> None:
+        """
+        Insert values of array before current ones, with amortized cost of array size.
+        """
+        size: int = len(array)
+        if not size:
+            return
+
+        # Head capacity grows geometrically, tail capacity is kept
+        if size > self._start:
+            head: int = max(size, self._size)
+            tail: int = len(self._data) - self._start - self._size
+            self._reserve(head + self._size + tail, head)
+
+        self._start -= size
+        self._data[self._start:self._start + size] = array
+        self._size += size
+
+    def update_last(self, value: float) -> None:
+        """"""
+        self[self._size - 1] = value
+
+    def set_array(self, array: np.ndarray) -> None:
+        """
+        Replace all values with data of array.
+        """
+        size: int = len(array)
+        end: int = self._start + self._size
+
+        if size > len(self._data):
+            self._data = np.full(size * 2, np.nan)
+
+        self._data[:size] = array
+        self._data[size:end] = np.nan
+        self._start = 0
+        self._size = size
+
+    def clear(self) -> None:
+        """"""
+        self._data[self._start:self._start + self._size] = np.nan
+        self._start = 0
+        self._size = 0
+
+    def _reserve(self, capacity: int, start: int) -> None:
+        """
+        Move values into new buffer of capacity, from offset start.
+        """
+        data: np.ndarray = np.full(capacity, np.nan)
+        data[start:start + self._size] = self.array
+        self._data = data
+        self._start = start
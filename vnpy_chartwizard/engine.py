@@ -1,20 +1,50 @@
-from datetime import datetime
-from threading import Thread
-from typing import List, Optional
+import json
+import os
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from copy import copy
+from datetime import datetime, timedelta
+from functools import partial
+from pathlib import Path
+from threading import Lock
+from time import perf_counter
+from typing import Deque, Dict, List, Optional, Tuple
 
 from vnpy.event import Event, EventEngine
 from vnpy.trader.engine import BaseEngine, MainEngine
-from vnpy.trader.constant import Interval
+from vnpy.trader.constant import Exchange, Interval
 from vnpy.trader.object import BarData, HistoryRequest, ContractData
-from vnpy.trader.utility import extract_vt_symbol
-from vnpy.trader.database import get_database, BaseDatabase
+from vnpy.trader.utility import extract_vt_symbol, get_folder_path
+from vnpy.trader.database import get_database, BaseDatabase, BarOverview, DB_TZ, convert_tz
 from vnpy.trader.datafeed import get_datafeed, BaseDatafeed
 
+from .monitor import monitor
+from .store import BarColumns, BarSnapshot
+
 
 APP_NAME = "ChartWizard"
 
 EVENT_CHART_HISTORY = "eChartHistory"
 
+# Max number of history queries running at the same time
+HISTORY_WORKERS = 4
+
+# Number of bars in the first history event, the most recent ones sent first
+HISTORY_CHUNK = 2000
+
+# Older chunks double in size up to this, so that long history takes few frames
+HISTORY_CHUNK_MAX = 64000
+
+# File of ranges fetched into database, in folder of snapshots
+RANGE_FILENAME = "cached_ranges.json"
+
+INTERVAL_DELTA_MAP: Dict[Interval, timedelta] = {
+    Interval.MINUTE: timedelta(minutes=1),
+    Interval.HOUR: timedelta(hours=1),
+    Interval.DAILY: timedelta(days=1),
+    Interval.WEEKLY: timedelta(days=7),
+}
+
 
 class ChartWizardEngine(BaseEngine):
     """
@@ -28,28 +58,128 @@ class ChartWizardEngine(BaseEngine):
         self.datafeed: BaseDatafeed = get_datafeed()
         self.database: BaseDatabase = get_database()
 
+        self.executor: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=HISTORY_WORKERS,
+            thread_name_prefix=APP_NAME
+        )
+
+        # In-flight requests keyed by (vt_symbol, interval, start, end)
+        self.futures: Dict[tuple, Future] = {}
+        self.lock: Lock = Lock()
+
+        # Timing of recently finished requests
+        self.history_stats: Deque[dict] = deque(maxlen=100)
+
+        # Sorted ranges of bars stored locally without gap, keyed by (vt_symbol, interval)
+        self.cached_ranges: Dict[tuple, List[Tuple[datetime, datetime]]] = {}
+        self.range_lock: Lock = Lock()
+
+        # Column files of bars loaded, for reopening chart without query
+        self.snapshot_folder: Path = get_folder_path("chartwizard")
+        self.snapshot_locks: Dict[tuple, Lock] = {}
+
     def query_history(
         self,
         vt_symbol: str,
         interval: Interval,
         start: datetime,
         end: datetime
-    ) -> None:
+    ) -> Future:
+        """
+        Query history in worker pool, same request in flight is shared.
+
+        Result is dispatched with EVENT_CHART_HISTORY unless cancelled.
+        """
+        key: tuple = (vt_symbol, interval, start, end)
+
+        with self.lock:
+            future: Optional[Future] = self.futures.get(key, None)
+            if future:
+                return future
+
+            future = self.executor.submit(
+                self._query_history,
+                vt_symbol,
+                interval,
+                start,
+                end,
+                perf_counter()
+            )
+            self.futures[key] = future
+
+        future.add_done_callback(partial(self._process_history_result, key))
+        return future
+
+    def load_history(
+        self,
+        vt_symbol: str,
+        interval: Interval,
+        start: datetime,
+        end: datetime,
+        use_datafeed: bool = False
+    ) -> BarColumns:
+        """
+        Load history in calling thread, through the same cache as query_history.
+
+        Bars of symbol without contract are loaded from database, same as
+        query_history, unless use_datafeed. Then they are queried from
+        datafeed as well and saved into database, for tools running without
+        gateway connected.
+        """
+        data, stats = self._query_history(vt_symbol, interval, start, end, use_datafeed=use_datafeed)
+        self.history_stats.append(stats)
+        return data
+
+    def cancel_history(self, vt_symbol: str) -> None:
+        """
+        Cancel all history requests of vt_symbol.
+
+        Request not started yet is removed from queue, result of running one
+        is dropped when finished.
+        """
+        with self.lock:
+            keys: List[tuple] = [key for key in self.futures if key[0] == vt_symbol]
+
+            for key in keys:
+                future: Future = self.futures.pop(key)
+                future.cancel()
+
+    def _process_history_result(self, key: tuple, future: Future) -> None:
         """"""
-        thread: Thread = Thread(
-            target=self._query_history,
-            args=[vt_symbol, interval, start, end]
-        )
-        thread.start()
+        with self.lock:
+            if self.futures.get(key, None) is not future:
+                return
+            self.futures.pop(key)
+
+        if future.cancelled():
+            return
+
+        try:
+            data, stats = future.result()
+        except Exception as e:
+            monitor.count("history_failures_total", key[0])
+            self.write_log(f"{key[0]}历史数据查询失败：{e}")
+            return
+
+        self.history_stats.append(stats)
+
+        # Recent bars are shown first, older chunks are prepended after
+        for chunk in split_history(data):
+            event: Event = Event(EVENT_CHART_HISTORY, chunk)
+            self.event_engine.put(event)
 
     def _query_history(
         self,
         vt_symbol: str,
         interval: Interval,
         start: datetime,
-        end: datetime
-    ) -> None:
+        end: datetime,
+        submit_time: float = 0,
+        use_datafeed: bool = False
+    ) -> Tuple[BarColumns, dict]:
         """"""
+        query_time: float = perf_counter()
+
         symbol, exchange = extract_vt_symbol(vt_symbol)
 
         req: HistoryRequest = HistoryRequest(
@@ -60,20 +190,395 @@ class ChartWizardEngine(BaseEngine):
             end=end
         )
 
-        contract: Optional[ContractData] = self.main_engine.get_contract(vt_symbol)
-        if contract:
-            if contract.history_data:
-                data: Optional[List[BarData]] = self.main_engine.query_history(req, contract.gateway_name)
-            else:
-                data: Optional[List[BarData]] = self.datafeed.query_bar_history(req)
+        snapshot: BarSnapshot = self._get_snapshot(vt_symbol, interval)
+        snapshot_lock: Lock = self._get_snapshot_lock(vt_symbol, interval)
+        delta: timedelta = INTERVAL_DELTA_MAP.get(interval, timedelta())
+
+        # Lock is only held for file access, not during remote queries
+        with snapshot_lock:
+            snapshot_range: Optional[Tuple[datetime, datetime]] = snapshot.get_range()
+            covered: bool = is_start_covered(snapshot_range, start)
+
+            if covered:
+                data: BarColumns = snapshot.load(start, end)
+
+        # Snapshot not covering start of request is replaced
+        if not covered:
+            data = self._query_bar_columns(req, start, end, use_datafeed)
+
+            # Failed or empty query leaves snapshot as it is
+            if len(data):
+                with snapshot_lock:
+                    # Snapshot saved by another query meanwhile is appended only
+                    if is_start_covered(snapshot.get_range(), start):
+                        snapshot.append(data)
+                    else:
+                        snapshot.save(data)
         else:
-            data: List[BarData] = self.database.load_bar_data(
-                symbol,
-                exchange,
-                interval,
-                start,
-                end
+            snapshot_end: datetime = snapshot_range[1]
+
+            # Last bar in snapshot is queried again in case it was not finished
+            if end - snapshot_end >= delta:
+                tail_data: BarColumns = self._query_bar_columns(req, snapshot_end, end, use_datafeed)
+                data.update_history(tail_data)
+
+                with snapshot_lock:
+                    # Tail is not appended after snapshot replaced by older bars meanwhile
+                    current_range: Optional[Tuple[datetime, datetime]] = snapshot.get_range()
+                    if current_range and current_range[1] >= snapshot_end:
+                        snapshot.append(tail_data)
+
+        finish_time: float = perf_counter()
+        stats: dict = {
+            "vt_symbol": vt_symbol,
+            "interval": interval.value,
+            "count": len(data),
+            "wait": query_time - submit_time if submit_time else 0,
+            "query": finish_time - query_time,
+        }
+
+        monitor.observe("history_query_seconds", stats["query"], vt_symbol)
+        if submit_time:
+            monitor.observe("history_wait_seconds", stats["wait"], vt_symbol)
+
+        return data, stats
+
+    def _query_bar_columns(
+        self,
+        req: HistoryRequest,
+        start: datetime,
+        end: datetime,
+        use_datafeed: bool = False
+    ) -> BarColumns:
+        """
+        Query bars from database or remote source into columns.
+        """
+        sub_req: HistoryRequest = copy(req)
+        sub_req.start = start
+        sub_req.end = end
+
+        # Spread bars are only stored locally, other ones without contract only if not using datafeed
+        contract: Optional[ContractData] = None
+        if req.exchange != Exchange.LOCAL:
+            contract = self.main_engine.get_contract(req.vt_symbol)
+
+        if contract or (use_datafeed and req.exchange != Exchange.LOCAL):
+            data: List[BarData] = self._query_cached_history(sub_req, contract)
+        else:
+            data: List[BarData] = self._load_local_history(sub_req, start, end)
+
+        return BarColumns.from_bars(req.vt_symbol, req.interval, data)
+
+    def _query_cached_history(self, req: HistoryRequest, contract: Optional[ContractData]) -> List[BarData]:
+        """
+        Load bars stored locally, and only query sub-ranges missing.
+
+        Bars queried are saved into database and merged with local ones.
+        """
+        key: tuple = (req.vt_symbol, req.interval)
+        delta: timedelta = INTERVAL_DELTA_MAP.get(req.interval, timedelta())
+
+        cached_ranges: List[Tuple[datetime, datetime]] = self._get_cached_ranges(req)
+        missing_ranges: List[Tuple[datetime, datetime]] = get_missing_ranges(cached_ranges, req.start, req.end, delta)
+
+        buf: Dict[datetime, BarData] = {}
+
+        # Local data overlapping request range
+        if missing_ranges != [(req.start, req.end)]:
+            for bar in self._load_local_history(req, req.start, req.end):
+                buf[bar.datetime] = bar
+
+        for start, end in missing_ranges:
+            data: List[BarData] = self._query_remote_history(req, contract, start, end)
+            self._save_history(key, data, start, end)
+
+            for bar in data:
+                buf[bar.datetime] = bar
+
+        return [buf[dt] for dt in sorted(buf)]
+
+    def _query_remote_history(
+        self,
+        req: HistoryRequest,
+        contract: Optional[ContractData],
+        start: datetime,
+        end: datetime
+    ) -> List[BarData]:
+        """
+        Query bars from gateway or datafeed.
+        """
+        sub_req: HistoryRequest = copy(req)
+        sub_req.start = start
+        sub_req.end = end
+
+        if contract and contract.history_data:
+            data: Optional[List[BarData]] = self.main_engine.query_history(sub_req, contract.gateway_name)
+        else:
+            data: Optional[List[BarData]] = self.datafeed.query_bar_history(sub_req)
+
+        return data or []
+
+    def _load_local_history(self, req: HistoryRequest, start: datetime, end: datetime) -> List[BarData]:
+        """
+        Load bars from database, with datetime converted as stored.
+        """
+        return self.database.load_bar_data(
+            req.symbol,
+            req.exchange,
+            req.interval,
+            convert_tz(start),
+            convert_tz(end)
+        )
+
+    def _get_cached_ranges(self, req: HistoryRequest) -> List[Tuple[datetime, datetime]]:
+        """
+        Get ranges of bars stored locally, from file of ranges fetched at first.
+
+        Bars in database without ranges recorded, such as ones saved by other
+        tools, are taken as one range from database overview.
+        """
+        key: tuple = (req.vt_symbol, req.interval)
+
+        with self.range_lock:
+            if key in self.cached_ranges:
+                return list(self.cached_ranges[key])
+
+        overviews: List[BarOverview] = self.database.get_bar_overview()
+        cached_ranges: List[Tuple[datetime, datetime]] = []
+
+        for overview in overviews:
+            if (
+                overview.symbol == req.symbol
+                and overview.exchange == req.exchange
+                and overview.interval == req.interval
+                and overview.count
+            ):
+                # Ranges recorded are only used while bars are still in database
+                with self.range_lock:
+                    range_data: list = self._load_range_data().get(get_range_key(key), [])
+
+                cached_ranges = [
+                    (datetime.fromisoformat(start), datetime.fromisoformat(end))
+                    for start, end in range_data
+                ]
+                if not cached_ranges:
+                    cached_ranges = [(to_db_tz(overview.start), to_db_tz(overview.end))]
+                break
+
+        with self.range_lock:
+            return list(self.cached_ranges.setdefault(key, cached_ranges))
+
+    def _save_history(self, key: tuple, data: List[BarData], start: datetime, end: datetime) -> None:
+        """
+        Save bars queried into database, and record the range stored over them.
+
+        Nothing is marked as stored when no bar is returned, since gateway
+        and datafeed return None for failed queries as well.
+        """
+        if not data:
+            return
+
+        dt_list: List[datetime] = [to_db_tz(bar.datetime) for bar in data]
+
+        # Database converts datetime of bar in place
+        self.database.save_bar_data([copy(bar) for bar in data])
+
+        with self.range_lock:
+            cached_ranges: List[Tuple[datetime, datetime]] = add_range(
+                self.cached_ranges.get(key, []),
+                (min(dt_list), max(dt_list)),
+                (start, end)
             )
+            self.cached_ranges[key] = cached_ranges
+
+            range_data: dict = self._load_range_data()
+            range_data[get_range_key(key)] = [
+                [range_start.isoformat(), range_end.isoformat()]
+                for range_start, range_end in cached_ranges
+            ]
+            self._save_range_data(range_data)
+
+    def _load_range_data(self) -> dict:
+        """
+        Load ranges fetched of all keys from file.
+        """
+        file_path: Path = self.snapshot_folder.joinpath(RANGE_FILENAME)
+        if not file_path.exists():
+            return {}
+
+        with open(file_path, encoding="UTF-8") as f:
+            return json.load(f)
+
+    def _save_range_data(self, range_data: dict) -> None:
+        """
+        Replace file of ranges fetched.
+        """
+        file_path: Path = self.snapshot_folder.joinpath(RANGE_FILENAME)
+        temp_path: Path = file_path.with_suffix(".tmp")
+
+        with open(temp_path, mode="w", encoding="UTF-8") as f:
+            json.dump(range_data, f, indent=4)
+        os.replace(temp_path, file_path)
+
+    def save_bar(self, bar: BarData) -> None:
+        """
+        Append finished bar to snapshot in worker pool, if following the last one stored.
+
+        Bar after a gap is skipped, so that missing bars are queried when
+        history is loaded next time.
+        """
+        # Bar object may be reused by caller, so copied into columns first
+        columns: BarColumns = BarColumns.from_bars(bar.vt_symbol, bar.interval, [bar])
+
+        future: Future = self.executor.submit(self._save_bar, columns)
+        future.add_done_callback(partial(self._process_save_result, bar.vt_symbol))
+
+    def _process_save_result(self, vt_symbol: str, future: Future) -> None:
+        """"""
+        if future.cancelled():
+            return
+
+        e: Optional[BaseException] = future.exception()
+        if e:
+            self.write_log(f"{vt_symbol}K线快照保存失败：{e}")
+
+    def _save_bar(self, columns: BarColumns) -> None:
+        """"""
+        snapshot: BarSnapshot = self._get_snapshot(columns.vt_symbol, columns.interval)
+        delta: timedelta = INTERVAL_DELTA_MAP.get(columns.interval, timedelta())
+
+        with self._get_snapshot_lock(columns.vt_symbol, columns.interval):
+            snapshot_range: Optional[Tuple[datetime, datetime]] = snapshot.get_range()
+            if not snapshot_range or columns.get_datetime(0) - snapshot_range[1] > delta:
+                return
+
+            snapshot.append(columns)
+
+    def _get_snapshot(self, vt_symbol: str, interval: Interval) -> BarSnapshot:
+        """"""
+        return BarSnapshot(self.snapshot_folder, vt_symbol, interval)
+
+    def _get_snapshot_lock(self, vt_symbol: str, interval: Interval) -> Lock:
+        """
+        Get lock of snapshot, so that files of one snapshot are written in turn.
+        """
+        with self.lock:
+            return self.snapshot_locks.setdefault((vt_symbol, interval), Lock())
+
+    def get_history_stats(self) -> List[dict]:
+        """
+        Get timing of recently finished history requests.
+        """
+        return list(self.history_stats)
+
+    def write_log(self, msg: str) -> None:
+        """"""
+        self.main_engine.write_log(msg, APP_NAME)
+
+    def close(self) -> None:
+        """"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def to_db_tz(dt: datetime) -> datetime:
+    """
+    Add database timezone to datetime loaded without tzinfo.
+    """
+    if dt.tzinfo:
+        return dt
+    return dt.replace(tzinfo=DB_TZ)
+
+
+def is_start_covered(snapshot_range: Optional[Tuple[datetime, datetime]], start: datetime) -> bool:
+    """
+    Check whether start of request is within range of snapshot.
+    """
+    return bool(snapshot_range) and snapshot_range[0] <= start <= snapshot_range[1]
+
+
+def get_range_key(key: tuple) -> str:
+    """
+    Get key of (vt_symbol, interval) in file of ranges.
+    """
+    vt_symbol, interval = key
+    return f"{vt_symbol}_{interval.value}"
+
+
+def get_missing_ranges(
+    cached_ranges: List[Tuple[datetime, datetime]],
+    start: datetime,
+    end: datetime,
+    delta: timedelta
+) -> List[Tuple[datetime, datetime]]:
+    """
+    Get sub-ranges of [start, end] not covered by sorted ranges stored.
+
+    Last stored bar before each gap is queried again in case it was not
+    finished, so missing ranges start from it.
+    """
+    missing_ranges: List[Tuple[datetime, datetime]] = []
+    cursor: datetime = start
+    stored: bool = False
+
+    for range_start, range_end in cached_ranges:
+        if range_end < cursor:
+            continue
+        elif range_start > end:
+            break
+
+        if range_start > cursor:
+            missing_ranges.append((cursor, range_start))
+
+        cursor = range_end
+        stored = True
+
+    if not stored or end - cursor >= delta:
+        missing_ranges.append((cursor, end))
+
+    return missing_ranges
+
+
+def add_range(
+    cached_ranges: List[Tuple[datetime, datetime]],
+    data_range: Tuple[datetime, datetime],
+    req_range: Tuple[datetime, datetime]
+) -> List[Tuple[datetime, datetime]]:
+    """
+    Add range of bars queried into sorted ranges stored.
+
+    Ranges touched by request range are merged with bars queried, since
+    request range without bars returned between them has no bar.
+    """
+    start: datetime = min(data_range[0], req_range[0])
+    end: datetime = max(data_range[1], req_range[1])
+    merged_start, merged_end = data_range
+
+    result: List[Tuple[datetime, datetime]] = []
+    for range_start, range_end in cached_ranges:
+        if range_start <= end and range_end >= start:
+            merged_start = min(merged_start, range_start)
+            merged_end = max(merged_end, range_end)
+        else:
+            result.append((range_start, range_end))
+
+    result.append((merged_start, merged_end))
+    result.sort()
+    return result
+
+
+def split_history(data: BarColumns) -> List[BarColumns]:
+    """
+    Split history into chunks from the most recent one, with size growing geometrically.
+    """
+    chunks: List[BarColumns] = []
+
+    end: int = len(data)
+    size: int = HISTORY_CHUNK
+    while True:
+        start: int = max(end - size, 0)
+        chunks.append(data.slice(start, end))
 
-        event: Event = Event(EVENT_CHART_HISTORY, data)
-        self.event_engine.put(event)
+        if not start:
+            return chunks
+        end = start
+        size = min(size * 2, HISTORY_CHUNK_MAX)
@@ -0,0 +1,170 @@
+from datetime import datetime, timedelta
+from typing import Callable, Optional, Set
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.object import BarData, TickData
+from vnpy.trader.utility import BarGenerator
+from vnpy_spreadtrading.base import SpreadItem
+
+from .store import BAR_FIELDS
+
+
+class ChartBarGenerator(BarGenerator):
+    """
+    Bar generator updating one forming bar in place.
+
+    Same 1-minute bars as BarGenerator are generated from ticks, but the
+    bar object is reused for the next minute, with datetime floored only
+    once when a new bar starts. Names of fields changed since the chart
+    last took the bar are kept in changed, all fields for a new bar.
+
+    Bar passed to on_bar is reused for the next minute, so callbacks should
+    copy data they keep.
+    """
+
+    def __init__(self, on_bar: Callable) -> None:
+        """"""
+        super().__init__(on_bar)
+
+        self.changed: Set[str] = set()
+
+        self._end: Optional[datetime] = None
+
+    def update_tick(self, tick: TickData) -> None:
+        """"""
+        price: float = tick.last_price
+        if not price:
+            return
+
+        bar: Optional[BarData] = self.bar
+        last_tick: Optional[TickData] = self.last_tick
+        changed: Set[str] = self.changed
+
+        if self._in_bar(tick.datetime):
+            high_price: float = max(bar.high_price, price)
+            if last_tick and tick.high_price > last_tick.high_price:
+                high_price = max(high_price, tick.high_price)
+
+            if high_price != bar.high_price:
+                bar.high_price = high_price
+                changed.add("high_price")
+
+            low_price: float = min(bar.low_price, price)
+            if last_tick and tick.low_price < last_tick.low_price:
+                low_price = min(low_price, tick.low_price)
+
+            if low_price != bar.low_price:
+                bar.low_price = low_price
+                changed.add("low_price")
+
+            if price != bar.close_price:
+                bar.close_price = price
+                changed.add("close_price")
+
+            if tick.open_interest != bar.open_interest:
+                bar.open_interest = tick.open_interest
+                changed.add("open_interest")
+        else:
+            bar = self._start_bar(tick.datetime, price, tick.symbol, tick.exchange, tick.gateway_name)
+            bar.open_interest = tick.open_interest
+
+        if last_tick:
+            volume_change: float = tick.volume - last_tick.volume
+            if volume_change > 0:
+                bar.volume += volume_change
+                changed.add("volume")
+
+            turnover_change: float = tick.turnover - last_tick.turnover
+            if turnover_change > 0:
+                bar.turnover += turnover_change
+                changed.add("turnover")
+
+        self.last_tick = tick
+
+    def _in_bar(self, dt: datetime) -> bool:
+        """
+        Check whether datetime is within minute of forming bar.
+        """
+        bar: Optional[BarData] = self.bar
+        return bar is not None and bar.datetime <= dt < self._end
+
+    def _start_bar(
+        self,
+        dt: datetime,
+        price: float,
+        symbol: str,
+        exchange: Exchange,
+        gateway_name: str
+    ) -> BarData:
+        """
+        Finish forming bar, then reuse it for new bar of minute with datetime.
+        """
+        bar: Optional[BarData] = self.bar
+        if bar:
+            self.on_bar(bar)
+
+        start: datetime = dt.replace(second=0, microsecond=0)
+        self._end = start + timedelta(minutes=1)
+
+        if not bar:
+            bar = BarData(
+                symbol=symbol,
+                exchange=exchange,
+                interval=Interval.MINUTE,
+                datetime=start,
+                gateway_name=gateway_name
+            )
+            self.bar = bar
+
+        bar.datetime = start
+        bar.open_price = price
+        bar.high_price = price
+        bar.low_price = price
+        bar.close_price = price
+        bar.volume = 0
+        bar.turnover = 0
+        bar.open_interest = 0
+
+        self.changed.update(BAR_FIELDS)
+        return bar
+
+
+class SpreadBarGenerator(ChartBarGenerator):
+    """
+    Bar generator with a fast path for spread data.
+
+    Mid price of bid/ask is aggregated into the forming bar in place,
+    instead of creating tick data for every spread update.
+    """
+
+    def __init__(self, on_bar: Callable, vt_symbol: str, spread_name: str) -> None:
+        """"""
+        super().__init__(on_bar)
+
+        self.vt_symbol: str = vt_symbol
+        self.spread_name: str = spread_name
+
+    def update_spread(self, spread: SpreadItem) -> None:
+        """
+        Update mid price of spread into forming bar.
+        """
+        price: float = (spread.bid_price + spread.ask_price) / 2
+        if not price:
+            return
+
+        if not self._in_bar(spread.datetime):
+            self._start_bar(spread.datetime, price, self.spread_name, Exchange.LOCAL, "SPREAD")
+            return
+
+        bar: BarData = self.bar
+
+        if price > bar.high_price:
+            bar.high_price = price
+            self.changed.add("high_price")
+        elif price < bar.low_price:
+            bar.low_price = price
+            self.changed.add("low_price")
+
+        if price != bar.close_price:
+            bar.close_price = price
+            self.changed.add("close_price")
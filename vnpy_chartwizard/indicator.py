@@ -0,0 +1,560 @@
+from abc import ABC, abstractmethod
+from collections import deque
+from copy import copy
+from typing import Deque, List
+
+import numpy as np
+import talib
+
+from .column import FloatColumn
+
+# Number of bars replayed when priming Wilder averages from history,
+# seed error decays as ((window - 1) / window) ** RSI_WARMUP.
+RSI_WARMUP = 1000
+
+
+class StreamIndicator(ABC):
+    """
+    Indicator with running state, updated in constant time per bar.
+
+    State is kept for all bars except the last one, which is still forming
+    and can be revised by further updates with the same index. The forming
+    bar is committed into the state once the next bar arrives.
+
+    Values of bars after warmup ones no longer depend on earlier bars, so
+    older bars inserted before current ones only need values recalculated
+    up to warmup bars into current ones, and bars revised only need values
+    recalculated from the revised one on.
+    """
+
+    warmup: int = 0
+
+    def __init__(self) -> None:
+        """"""
+        self.values: FloatColumn = FloatColumn()
+        self._pending: tuple = ()
+
+        self._reset()
+
+    def clone(self) -> "StreamIndicator":
+        """
+        Create stream with same parameters and no data.
+        """
+        stream: StreamIndicator = copy(self)
+        stream.values = FloatColumn()
+        stream._pending = ()
+        stream._reset()
+        return stream
+
+    def update_history(self, *arrays: np.ndarray) -> None:
+        """
+        Calculate all values with input arrays, then prime running state.
+        """
+        self._reset()
+        self._pending = ()
+
+        count: int = len(arrays[0])
+        if not count:
+            self.values.clear()
+            return
+
+        self.values.set_array(self._calculate(*arrays))
+
+        self._restart(*arrays)
+
+    def prepend(self, count: int, *arrays: np.ndarray) -> bool:
+        """
+        Extend values with count older bars inserted before current ones.
+
+        Input arrays include both older and current bars. Return False
+        without change if the value at the end of warmup changes, then all
+        values should be recalculated with update_history.
+        """
+        current: np.ndarray = self.values.array
+        end: int = count + self.warmup
+
+        if not len(current) or end >= len(arrays[0]):
+            return False
+
+        head: np.ndarray = self._calculate(*[array[:end] for array in arrays])
+
+        if not np.isclose(head[-1], current[end - count - 1], equal_nan=True):
+            return False
+
+        # Only values of head are written, current ones stay in place
+        self.values.prepend(head[:count])
+        self.values.array[count:end] = head[count:]
+        self._shift(count)
+        return True
+
+    def recalculate(self, start: int, *arrays: np.ndarray) -> bool:
+        """
+        Recalculate values from index start on, with bars revised from there.
+
+        Input arrays include all bars, only warmup bars before start are
+        used. Return False without change if the value before start
+        changes, then all values should be recalculated with update_history.
+        """
+        current: np.ndarray = self.values.array
+        begin: int = start - self.warmup
+
+        if begin <= 0 or start > len(current):
+            return False
+
+        tail: np.ndarray = self._calculate_tail(current[begin:start], *[array[begin:] for array in arrays])
+
+        if not np.isclose(tail[start - begin - 1], current[start - 1], equal_nan=True):
+            return False
+
+        self.values.set_array(np.concatenate([current[:start], tail[start - begin:]]))
+
+        self._reset()
+        self._restart(*arrays)
+        return True
+
+    def update(self, ix: int, *inputs: float) -> bool:
+        """
+        Update value of bar with index ix.
+
+        Return False if ix is neither the forming bar nor the next one,
+        then all values should be recalculated with update_history.
+        """
+        count: int = len(self.values)
+
+        if ix == count:
+            if self._pending:
+                self._commit(*self._pending)
+            self.values.append(self._compute(*inputs))
+        elif ix == count - 1:
+            self.values[ix] = self._compute(*inputs)
+        else:
+            return False
+
+        self._pending = inputs
+        return True
+
+    def _restart(self, *arrays: np.ndarray) -> None:
+        """
+        Prime running state with all bars committed except the last one.
+        """
+        self._prime(len(arrays[0]) - 1, *arrays)
+        self._pending = tuple(float(array[-1]) for array in arrays)
+
+    @abstractmethod
+    def _reset(self) -> None:
+        """
+        Clear running state.
+        """
+        pass
+
+    @abstractmethod
+    def _calculate(self, *arrays: np.ndarray) -> np.ndarray:
+        """
+        Calculate values of whole input arrays.
+        """
+        pass
+
+    def _calculate_tail(self, head: np.ndarray, *arrays: np.ndarray) -> np.ndarray:
+        """
+        Calculate values of input arrays, with values of head bars known.
+        """
+        return self._calculate(*arrays)
+
+    @abstractmethod
+    def _prime(self, count: int, *arrays: np.ndarray) -> None:
+        """
+        Set running state to the one after first count bars committed.
+        """
+        pass
+
+    @abstractmethod
+    def _shift(self, count: int) -> None:
+        """
+        Add count older bars into running state, which only changes count.
+        """
+        pass
+
+    @abstractmethod
+    def _compute(self, *inputs: float) -> float:
+        """
+        Compute value of forming bar without changing running state.
+        """
+        pass
+
+    @abstractmethod
+    def _commit(self, *inputs: float) -> None:
+        """
+        Push finished bar into running state.
+        """
+        pass
+
+
+class SmaStream(StreamIndicator):
+    """
+    Simple moving average with rolling sum.
+    """
+
+    def __init__(self, window: int = 20) -> None:
+        """"""
+        self.window: int = window
+        self.warmup: int = window
+
+        super().__init__()
+
+    def _reset(self) -> None:
+        """"""
+        self._count: int = 0
+        self._closes: Deque[float] = deque()
+        self._sum: float = 0.0
+
+    def _calculate(self, close: np.ndarray) -> np.ndarray:
+        """"""
+        return talib.SMA(close, timeperiod=self.window)
+
+    def _prime(self, count: int, close: np.ndarray) -> None:
+        """"""
+        tail: np.ndarray = close[max(0, count - self.window + 1):count]
+
+        self._count = count
+        self._closes.extend(tail.tolist())
+        self._sum = float(tail.sum())
+
+    def _shift(self, count: int) -> None:
+        """"""
+        self._count += count
+
+    def _compute(self, close: float) -> float:
+        """"""
+        if self._count < self.window - 1:
+            return np.nan
+
+        return (self._sum + close) / self.window
+
+    def _commit(self, close: float) -> None:
+        """"""
+        self._closes.append(close)
+        self._sum += close
+
+        if len(self._closes) >= self.window:
+            self._sum -= self._closes.popleft()
+
+        self._count += 1
+
+
+class RsiStream(StreamIndicator):
+    """
+    Relative strength index with Wilder averages, same as talib.RSI.
+    """
+
+    def __init__(self, window: int = 14) -> None:
+        """"""
+        self.window: int = window
+        self.warmup: int = RSI_WARMUP
+
+        super().__init__()
+
+    def _reset(self) -> None:
+        """"""
+        # Gain/loss are sums before the first average is ready
+        self._state: tuple = (0, 0.0, 0.0, 0.0)
+
+    def _calculate(self, close: np.ndarray) -> np.ndarray:
+        """"""
+        return talib.RSI(close, timeperiod=self.window)
+
+    def _prime(self, count: int, close: np.ndarray) -> None:
+        """"""
+        start: int = count - RSI_WARMUP
+
+        if start > self.window:
+            diff: np.ndarray = np.diff(close[start - self.window:start])
+            avg_gain: float = float(diff[diff > 0].sum()) / self.window
+            avg_loss: float = float(-diff[diff < 0].sum()) / self.window
+            self._state = (start, float(close[start - 1]), avg_gain, avg_loss)
+        else:
+            start = 0
+
+        for value in close[start:count].tolist():
+            self._state = self._advance(value)[0]
+
+    def _shift(self, count: int) -> None:
+        """"""
+        bar_count, last_close, gain, loss = self._state
+        self._state = (bar_count + count, last_close, gain, loss)
+
+    def _compute(self, close: float) -> float:
+        """"""
+        return self._advance(close)[1]
+
+    def _commit(self, close: float) -> None:
+        """"""
+        self._state = self._advance(close)[0]
+
+    def _advance(self, close: float) -> tuple:
+        """
+        Get next state and RSI value with close price of new bar.
+        """
+        count, last_close, gain, loss = self._state
+
+        if not count:
+            return (1, close, 0.0, 0.0), np.nan
+
+        change: float = close - last_close
+        up: float = change if change > 0 else 0.0
+        down: float = -change if change < 0 else 0.0
+
+        if count < self.window:
+            return (count + 1, close, gain + up, loss + down), np.nan
+        elif count == self.window:
+            gain = (gain + up) / self.window
+            loss = (loss + down) / self.window
+        else:
+            gain = (gain * (self.window - 1) + up) / self.window
+            loss = (loss * (self.window - 1) + down) / self.window
+
+        total: float = gain + loss
+        rsi_value: float = 100 * gain / total if total else 0.0
+
+        return (count + 1, close, gain, loss), rsi_value
+
+
+class LwmaState:
+    """
+    Running accumulators of linear weighted moving average.
+    """
+
+    def __init__(self, period: int) -> None:
+        """"""
+        self.period: int = period
+        self.divisor: float = period * (period + 1) / 2
+
+        # Last period - 1 committed values, weighted 1 to period - 1
+        self.values: Deque[float] = deque()
+        self.weighted: float = 0.0
+        self.total: float = 0.0
+
+    def prime(self, data: np.ndarray) -> None:
+        """"""
+        tail: np.ndarray = data[max(0, len(data) - self.period + 1):]
+
+        self.values = deque(tail.tolist())
+        self.weighted = float(np.dot(tail, np.arange(1, len(tail) + 1)))
+        self.total = float(tail.sum())
+
+    def peek(self, value: float) -> float:
+        """
+        Get average with value as the newest one.
+        """
+        if len(self.values) < self.period - 1:
+            return np.nan
+
+        return (self.weighted + self.period * value) / self.divisor
+
+    def push(self, value: float) -> None:
+        """"""
+        if len(self.values) < self.period - 1:
+            self.weighted += (len(self.values) + 1) * value
+            self.total += value
+            self.values.append(value)
+            return
+
+        # Shift all weights down by one, the oldest one drops out
+        self.weighted += self.period * value - self.total - value
+        self.total += value
+        self.values.append(value)
+        self.total -= self.values.popleft()
+
+
+class VqiStream(StreamIndicator):
+    """
+    Volatility quality index with LWMA accumulators and smoothing lag.
+
+    Moving averages are linear weighted as MODE_LWMA of the original
+    indicator, same as talib.WMA. Versions before 1.1.0 passed matype=3 to
+    talib.MA, which is DEMA in talib.
+    """
+
+    def __init__(
+        self,
+        period: int = 5,
+        smoothing: int = 2,
+        filter: float = 1,
+        currency_point: float = 1
+    ) -> None:
+        """"""
+        self.period: int = period
+        self.smoothing: int = smoothing
+        self.threshold: float = filter * currency_point
+
+        # Default value returned when no enough MA and smoothing data
+        self.start: int = smoothing + period + 3
+        self.warmup: int = self.start + period
+
+        super().__init__()
+
+    def _reset(self) -> None:
+        """"""
+        self._count: int = 0
+        self._mas: List[LwmaState] = [LwmaState(self.period) for _ in range(4)]
+        self._lag: Deque[float] = deque(maxlen=self.smoothing)
+        self._last: float = 0.0
+
+    def _calculate(
+        self,
+        open_data: np.ndarray,
+        high_data: np.ndarray,
+        low_data: np.ndarray,
+        close_data: np.ndarray
+    ) -> np.ndarray:
+        """"""
+        return calculate_vqi(
+            talib.WMA(open_data, timeperiod=self.period),
+            talib.WMA(high_data, timeperiod=self.period),
+            talib.WMA(low_data, timeperiod=self.period),
+            talib.WMA(close_data, timeperiod=self.period),
+            np.zeros(len(close_data)),
+            self.smoothing,
+            self.threshold,
+            self.start
+        )
+
+    def _calculate_tail(
+        self,
+        head: np.ndarray,
+        open_data: np.ndarray,
+        high_data: np.ndarray,
+        low_data: np.ndarray,
+        close_data: np.ndarray
+    ) -> np.ndarray:
+        """
+        Values carried forward depend on all earlier bars, so known ones are kept as seed.
+        """
+        vqi_array: np.ndarray = np.zeros(len(close_data))
+        vqi_array[:len(head)] = head
+
+        return calculate_vqi(
+            talib.WMA(open_data, timeperiod=self.period),
+            talib.WMA(high_data, timeperiod=self.period),
+            talib.WMA(low_data, timeperiod=self.period),
+            talib.WMA(close_data, timeperiod=self.period),
+            vqi_array,
+            self.smoothing,
+            self.threshold,
+            len(head)
+        )
+
+    def _prime(
+        self,
+        count: int,
+        open_data: np.ndarray,
+        high_data: np.ndarray,
+        low_data: np.ndarray,
+        close_data: np.ndarray
+    ) -> None:
+        """"""
+        for ma, data in zip(self._mas, (open_data, high_data, low_data, close_data)):
+            ma.prime(data[:count])
+
+        self._count = count
+
+        if count:
+            tail: np.ndarray = close_data[max(0, count - self.smoothing - self.period + 1):count]
+            ma_close: np.ndarray = talib.WMA(tail, timeperiod=self.period)
+
+            self._lag.extend(ma_close[-self.smoothing:].tolist())
+            self._last = self.values.get(count - 1)
+
+    def _shift(self, count: int) -> None:
+        """"""
+        self._count += count
+
+    def _compute(self, o: float, h: float, l: float, c: float) -> float:   # noqa
+        """"""
+        if self._count < self.start:
+            return 0.0
+
+        return self._calculate_value(*self._peek(o, h, l, c))
+
+    def _commit(self, o: float, h: float, l: float, c: float) -> None:   # noqa
+        """"""
+        mas: List[float] = self._peek(o, h, l, c)
+
+        if self._count >= self.start:
+            self._last = self._calculate_value(*mas)
+
+        for ma, value in zip(self._mas, (o, h, l, c)):
+            ma.push(value)
+
+        self._lag.append(mas[3])
+        self._count += 1
+
+    def _peek(self, o: float, h: float, l: float, c: float) -> List[float]:   # noqa
+        """
+        Get LWMA values of open/high/low/close with forming bar.
+        """
+        return [ma.peek(value) for ma, value in zip(self._mas, (o, h, l, c))]
+
+    def _calculate_value(self, o: float, h: float, l: float, c: float) -> float:   # noqa
+        """
+        Same as one step of calculate_vqi loop.
+        """
+        c2: float = self._lag[0]
+        max_p: float = max(h - l, max(h - c2, c2 - l))
+
+        if max_p != 0 and (h - l) != 0:
+            vq: float = abs(((c - c2) / max_p + (c - o) / (h - l)) * 0.5) * ((c - c2 + (c - o)) * 0.5)
+            return self._last if abs(vq) < self.threshold else vq
+
+        return 0.0
+
+
+def calculate_vqi(
+    ma_open: np.ndarray,
+    ma_high: np.ndarray,
+    ma_low: np.ndarray,
+    ma_close: np.ndarray,
+    vqi_array: np.ndarray,
+    smoothing: int,
+    threshold: float,
+    start: int
+) -> np.ndarray:
+    """
+    Calculate VQI values from index start on, into vqi_array.
+
+    Values below threshold carry forward the previous one, and values of
+    bars with zero range are left unchanged.
+    """
+    count: int = len(ma_open)
+    if count <= start:
+        return vqi_array
+
+    o: np.ndarray = ma_open[start:]
+    h: np.ndarray = ma_high[start:]
+    l: np.ndarray = ma_low[start:]      # noqa
+    c: np.ndarray = ma_close[start:]
+    c2: np.ndarray = ma_close[start - smoothing:count - smoothing]
+
+    # Same NaN and signed zero handling as builtin max(a, b)
+    h_l: np.ndarray = h - l
+    max_c2: np.ndarray = np.where(c2 - l > h - c2, c2 - l, h - c2)
+    max_p: np.ndarray = np.where(max_c2 > h_l, max_c2, h_l)
+
+    valid: np.ndarray = (max_p != 0) & (h_l != 0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        vq: np.ndarray = np.abs(((c - c2) / max_p + (c - o) / h_l) * 0.5) * ((c - c2 + (c - o)) * 0.5)
+
+    carried: np.ndarray = valid & (np.abs(vq) < threshold)
+    updated: np.ndarray = valid & ~carried
+
+    # Position 0 holds the fixed value before start
+    buf: np.ndarray = vqi_array[start - 1:].copy()
+    buf[1:][updated] = vq[updated]
+
+    # Forward fill carried values from the last one not carried
+    source: np.ndarray = np.arange(len(buf))
+    source[1:][carried] = 0
+    np.maximum.accumulate(source, out=source)
+
+    vqi_array[start:] = buf[source[1:]]
+    return vqi_array
@@ -0,0 +1,107 @@
+from typing import List, Tuple
+
+import numpy as np
+
+
+# Items merged into one group by each level over the level below
+LOD_FACTOR = 4
+
+
+class LodPyramid:
+    """
+    Min/max pyramid of source arrays, for drawing zoomed-out views.
+
+    Level n merges LOD_FACTOR ** n items of source into one group, keeping
+    min of one source array and max of another, so that extremes are never
+    dropped from the view. Levels are built on request from the level
+    below, and after source changes only groups from the first item
+    changed on are rebuilt.
+    """
+
+    def __init__(self) -> None:
+        """"""
+        # Arrays of level n are at index n - 1
+        self.mins: List[np.ndarray] = []
+        self.maxs: List[np.ndarray] = []
+
+        # Number of source items each level is up to date with
+        self._valid: List[int] = []
+
+    def get_level(
+        self,
+        level: int,
+        min_array: np.ndarray,
+        max_array: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get min and max of groups of level, updated with source arrays.
+        """
+        count: int = len(min_array)
+
+        for n in range(1, level + 1):
+            if n > len(self.mins):
+                self.mins.append(np.empty(0))
+                self.maxs.append(np.empty(0))
+                self._valid.append(0)
+
+            valid: int = self._valid[n - 1]
+            if valid == count and len(self.mins[n - 1]) == -(-count // LOD_FACTOR ** n):
+                continue
+
+            # Group of the first item changed is rebuilt from the level below
+            first: int = min(valid, count) // LOD_FACTOR ** n
+
+            if n == 1:
+                lower_mins: np.ndarray = min_array
+                lower_maxs: np.ndarray = max_array
+            else:
+                lower_mins: np.ndarray = self.mins[n - 2]
+                lower_maxs: np.ndarray = self.maxs[n - 2]
+
+            begin: int = first * LOD_FACTOR
+            self.mins[n - 1] = np.concatenate([
+                self.mins[n - 1][:first],
+                reduce_groups(np.fmin, lower_mins[begin:])
+            ])
+            self.maxs[n - 1] = np.concatenate([
+                self.maxs[n - 1][:first],
+                reduce_groups(np.fmax, lower_maxs[begin:])
+            ])
+            self._valid[n - 1] = count
+
+        return self.mins[level - 1], self.maxs[level - 1]
+
+    def invalidate(self, start: int = 0) -> None:
+        """
+        Mark source items from index start on as changed.
+        """
+        self._valid = [min(valid, start) for valid in self._valid]
+
+    def clear(self) -> None:
+        """"""
+        self.mins.clear()
+        self.maxs.clear()
+        self._valid.clear()
+
+
+def reduce_groups(func: np.ufunc, array: np.ndarray) -> np.ndarray:
+    """
+    Reduce every LOD_FACTOR items of array into one, with NaN ignored unless all are.
+    """
+    size: int = len(array)
+    padded: int = -(-size // LOD_FACTOR) * LOD_FACTOR
+
+    if padded != size:
+        array = np.concatenate([array, np.full(padded - size, np.nan)])
+
+    return func.reduce(array.reshape(-1, LOD_FACTOR), axis=1)
+
+
+def get_lod_level(bars_per_pixel: float) -> int:
+    """
+    Get level with groups of at most bars per pixel, 0 for drawing every bar.
+    """
+    level: int = 0
+    while LOD_FACTOR ** (level + 1) <= bars_per_pixel:
+        level += 1
+    return level
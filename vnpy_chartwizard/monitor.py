@@ -0,0 +1,268 @@
+import json
+from bisect import bisect_left
+from threading import Lock
+from time import perf_counter, time
+from typing import Dict, List, Optional, Tuple
+
+
+# Upper bounds of histogram buckets in seconds, from 1us to 10s
+LATENCY_BUCKETS: Tuple[float, ...] = tuple(
+    float(f"{base}e{exp}")
+    for exp in range(-6, 1)
+    for base in (1, 2.5, 5)
+) + (10.0,)
+
+# Prefix of metric names in Prometheus export
+METRIC_PREFIX = "chartwizard_"
+
+# Help text and label name of each metric, for Prometheus export
+METRICS: Dict[str, Tuple[str, str]] = {
+    "events_total": ("Tick and spread events received", "symbol"),
+    "tick_handle_seconds": ("Sampled time of handling tick event", "symbol"),
+    "spread_handle_seconds": ("Sampled time of handling spread event", "symbol"),
+    "history_handle_seconds": ("Time of handling history event", "symbol"),
+    "history_query_seconds": ("Time of querying history in worker", "symbol"),
+    "history_wait_seconds": ("Time of history request waiting in queue", "symbol"),
+    "history_failures_total": ("History queries failed", "symbol"),
+    "flush_seconds": ("Time of updating chart with forming bar", "symbol"),
+    "frame_latency_seconds": ("Time from event received to chart painted", "symbol"),
+    "tick_to_paint_seconds": ("Time from event timestamp to chart painted", "symbol"),
+    "indicator_sync_seconds": ("Time of updating indicator values", "indicator"),
+    "indicator_calculate_seconds": ("Time of calculating indicator values of all bars", "indicator"),
+    "draw_block_seconds": ("Time of drawing block of bars", "item"),
+}
+
+
+class Histogram:
+    """
+    Histogram of durations in seconds with fixed buckets.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        """"""
+        self.buckets: Tuple[float, ...] = buckets
+
+        # Last one counts values over the largest bound
+        self.counts: List[int] = [0] * (len(buckets) + 1)
+        self.count: int = 0
+        self.sum: float = 0
+        self.max: float = 0
+
+    def observe(self, value: float) -> None:
+        """"""
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: "Histogram") -> None:
+        """
+        Add values of histogram with same buckets.
+        """
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+    def get_quantile(self, q: float) -> float:
+        """
+        Estimate quantile by linear interpolation within its bucket.
+        """
+        if not self.count:
+            return 0
+
+        rank: float = q * self.count
+        cumulative: int = 0
+
+        for i, count in enumerate(self.counts):
+            if cumulative + count >= rank and count:
+                lower: float = self.buckets[i - 1] if i else 0
+                upper: float = self.buckets[i] if i < len(self.buckets) else self.max
+                value: float = lower + (upper - lower) * (rank - cumulative) / count
+                return min(value, self.max)
+            cumulative += count
+
+        return self.max
+
+    def to_dict(self) -> dict:
+        """"""
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "max": self.max,
+            "p50": self.get_quantile(0.5),
+            "p99": self.get_quantile(0.99),
+            "buckets": dict(zip([str(bound) for bound in self.buckets] + ["+Inf"], self.counts)),
+        }
+
+
+class PerfMonitor:
+    """
+    Counters and timing histograms of chart hot paths, labelled by symbol or item.
+
+    Nothing is recorded until enabled. Handlers called for every event
+    should be timed only once in sample_interval calls, so that the cost of
+    timing stays within noise of the handlers themselves.
+
+    Metrics are recorded from both GUI and worker threads.
+    """
+
+    sample_interval: int = 16
+
+    def __init__(self) -> None:
+        """"""
+        self.enabled: bool = False
+
+        self.counters: Dict[Tuple[str, str], int] = {}
+        self.histograms: Dict[Tuple[str, str], Histogram] = {}
+        self.lock: Lock = Lock()
+
+        self.start_time: float = time()
+        self._start_counter: float = perf_counter()
+
+        # Counter values and time of last rate query by name, for rates over the interval
+        self._rate_counters: Dict[Tuple[str, str], int] = {}
+        self._rate_times: Dict[str, float] = {}
+
+    def set_enabled(self, enabled: bool) -> None:
+        """"""
+        self.enabled = enabled
+
+    def reset(self) -> None:
+        """"""
+        with self.lock:
+            self.counters.clear()
+            self.histograms.clear()
+            self._rate_counters.clear()
+            self._rate_times.clear()
+
+        self.start_time = time()
+        self._start_counter = perf_counter()
+
+    def count(self, name: str, label: str = "", n: int = 1) -> None:
+        """"""
+        if not self.enabled:
+            return
+
+        key: Tuple[str, str] = (name, label)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + n
+
+    def observe(self, name: str, value: float, label: str = "") -> None:
+        """
+        Add value in seconds into histogram of name and label.
+        """
+        if not self.enabled:
+            return
+
+        key: Tuple[str, str] = (name, label)
+        with self.lock:
+            histogram: Optional[Histogram] = self.histograms.get(key, None)
+            if not histogram:
+                histogram = Histogram()
+                self.histograms[key] = histogram
+
+            histogram.observe(value)
+
+    def get_rates(self, name: str) -> Dict[str, float]:
+        """
+        Get rate per second of counters of name by label, since last call.
+        """
+        rates: Dict[str, float] = {}
+
+        with self.lock:
+            now: float = perf_counter()
+            elapsed: float = max(now - self._rate_times.get(name, self._start_counter), 1e-9)
+            self._rate_times[name] = now
+
+            for key, value in self.counters.items():
+                if key[0] != name:
+                    continue
+
+                rates[key[1]] = (value - self._rate_counters.get(key, 0)) / elapsed
+                self._rate_counters[key] = value
+
+        return rates
+
+    def to_dict(self) -> dict:
+        """"""
+        data: dict = {
+            "start_time": self.start_time,
+            "time": time(),
+            "counters": {},
+            "histograms": {},
+        }
+
+        with self.lock:
+            for (name, label), value in self.counters.items():
+                data["counters"].setdefault(name, {})[label] = value
+
+            for (name, label), histogram in self.histograms.items():
+                data["histograms"].setdefault(name, {})[label] = histogram.to_dict()
+
+        return data
+
+    def to_json(self) -> str:
+        """"""
+        return json.dumps(self.to_dict(), indent=4)
+
+    def to_prometheus(self) -> str:
+        """
+        Export metrics in Prometheus text format.
+        """
+        lines: List[str] = []
+
+        with self.lock:
+            counters: Dict[str, List[Tuple[str, int]]] = {}
+            for (name, label), value in self.counters.items():
+                counters.setdefault(name, []).append((label, value))
+
+            histograms: Dict[str, List[Tuple[str, Histogram]]] = {}
+            for (name, label), histogram in self.histograms.items():
+                histograms.setdefault(name, []).append((label, histogram))
+
+            for name, values in sorted(counters.items()):
+                label_name: str = self._add_header(lines, name, "counter")
+
+                for label, value in values:
+                    lines.append(f"{METRIC_PREFIX}{name}{{{format_labels(label_name, label)}}} {value}")
+
+            for name, values in sorted(histograms.items()):
+                label_name: str = self._add_header(lines, name, "histogram")
+
+                for label, histogram in values:
+                    labels: str = format_labels(label_name, label)
+
+                    cumulative: int = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f'{METRIC_PREFIX}{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+
+                    lines.append(f'{METRIC_PREFIX}{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                    lines.append(f"{METRIC_PREFIX}{name}_sum{{{labels}}} {histogram.sum}")
+                    lines.append(f"{METRIC_PREFIX}{name}_count{{{labels}}} {histogram.count}")
+
+        return "\n".join(lines) + "\n"
+
+    def _add_header(self, lines: List[str], name: str, metric_type: str) -> str:
+        """
+        Add help and type lines of metric, and return its label name.
+        """
+        help_text, label_name = METRICS.get(name, (name, "label"))
+
+        lines.append(f"# HELP {METRIC_PREFIX}{name} {help_text}")
+        lines.append(f"# TYPE {METRIC_PREFIX}{name} {metric_type}")
+
+        return label_name
+
+
+def format_labels(label_name: str, label: str) -> str:
+    """
+    Format label pair of Prometheus metric, with value escaped.
+    """
+    value: str = label.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+    return f'{label_name}="{value}"'
+
+
+monitor: PerfMonitor = PerfMonitor()
@@ -0,0 +1,307 @@
+"""
+Recording of tick and spread events into compact binary logs, for replay.
+
+Log starts with a header of magic and version, followed by records of
+fixed layout each. A record starts with kind, symbol id and receive time
+in seconds since epoch. Symbol ids are defined by symbol records written
+before the first event of each symbol, so that names are stored only once.
+"""
+
+import struct
+from datetime import datetime
+from pathlib import Path
+from threading import Lock
+from time import time
+from typing import BinaryIO, Dict, Iterator, List, Optional, Set, Tuple
+
+from vnpy.event import Event, EventEngine
+from vnpy.trader.constant import Exchange
+from vnpy.trader.database import DB_TZ
+from vnpy.trader.event import EVENT_TICK
+from vnpy.trader.object import TickData
+from vnpy.trader.utility import extract_vt_symbol, get_folder_path
+from vnpy_spreadtrading.base import EVENT_SPREAD_DATA, SpreadItem
+
+
+LOG_MAGIC = b"CWTL"
+LOG_VERSION = 1
+LOG_SUFFIX = ".cwtl"
+
+HEADER_STRUCT = struct.Struct("<4sH")
+
+# Kind, symbol id and receive time of each record
+RECORD_STRUCT = struct.Struct("<BHd")
+
+KIND_SYMBOL = 0
+KIND_TICK = 1
+KIND_SPREAD = 2
+
+# Length of symbol name following symbol record
+SYMBOL_STRUCT = struct.Struct("<H")
+
+# Timestamp and fields of tick used by chart
+TICK_FIELDS = (
+    "last_price",
+    "last_volume",
+    "volume",
+    "turnover",
+    "open_interest",
+    "high_price",
+    "low_price",
+    "bid_price_1",
+    "bid_volume_1",
+    "ask_price_1",
+    "ask_volume_1",
+)
+TICK_STRUCT = struct.Struct("<d" + "d" * len(TICK_FIELDS))
+
+# Timestamp and fields of spread used by chart
+SPREAD_FIELDS = (
+    "bid_price",
+    "bid_volume",
+    "ask_price",
+    "ask_volume",
+    "net_pos",
+)
+SPREAD_STRUCT = struct.Struct("<d" + "d" * len(SPREAD_FIELDS))
+
+PAYLOAD_STRUCTS: Dict[int, struct.Struct] = {
+    KIND_TICK: TICK_STRUCT,
+    KIND_SPREAD: SPREAD_STRUCT,
+}
+
+# Folder of logs recorded from chart widget
+RECORD_FOLDER = "chartwizard_record"
+
+# Seconds between flushes of log file, so that little is lost if not closed
+FLUSH_INTERVAL = 1
+
+GATEWAY_NAME = "REPLAY"
+
+
+class TickRecorder:
+    """
+    Record tick and spread events of symbols into binary log.
+
+    Events are written in event engine thread, as received from gateway.
+    Spreads are recorded by vt_symbol of their charts, as name.LOCAL.
+    """
+
+    def __init__(self, event_engine: EventEngine, path: Path, vt_symbols: Optional[Set[str]] = None) -> None:
+        """"""
+        self.event_engine: EventEngine = event_engine
+        self.path: Path = path
+
+        self.vt_symbols: Set[str] = set(vt_symbols or [])
+        self.spread_names: Dict[str, str] = {}
+        for vt_symbol in self.vt_symbols:
+            self.add_symbol(vt_symbol)
+
+        self.symbol_ids: Dict[str, int] = {}
+        self.count: int = 0
+        self.lock: Lock = Lock()
+
+        self.file: Optional[BinaryIO] = None
+        self.flush_time: float = 0
+
+    def add_symbol(self, vt_symbol: str) -> None:
+        """"""
+        self.vt_symbols.add(vt_symbol)
+
+        symbol, exchange = extract_vt_symbol(vt_symbol)
+        if exchange == Exchange.LOCAL:
+            self.spread_names[symbol] = vt_symbol
+
+    def remove_symbol(self, vt_symbol: str) -> None:
+        """"""
+        self.vt_symbols.discard(vt_symbol)
+
+        symbol, exchange = extract_vt_symbol(vt_symbol)
+        if exchange == Exchange.LOCAL:
+            self.spread_names.pop(symbol, None)
+
+    def start(self) -> None:
+        """"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.file = open(self.path, "wb", buffering=1 << 20)
+        self.file.write(HEADER_STRUCT.pack(LOG_MAGIC, LOG_VERSION))
+
+        self.event_engine.register(EVENT_TICK, self.process_tick_event)
+        self.event_engine.register(EVENT_SPREAD_DATA, self.process_spread_event)
+
+    def stop(self) -> None:
+        """"""
+        self.event_engine.unregister(EVENT_TICK, self.process_tick_event)
+        self.event_engine.unregister(EVENT_SPREAD_DATA, self.process_spread_event)
+
+        with self.lock:
+            if self.file:
+                self.file.close()
+                self.file = None
+
+    def process_tick_event(self, event: Event) -> None:
+        """"""
+        tick: TickData = event.data
+        if tick.vt_symbol not in self.vt_symbols:
+            return
+
+        payload: bytes = TICK_STRUCT.pack(
+            tick.datetime.timestamp(),
+            *[getattr(tick, name) for name in TICK_FIELDS]
+        )
+        self.write(KIND_TICK, tick.vt_symbol, payload)
+
+    def process_spread_event(self, event: Event) -> None:
+        """"""
+        spread: SpreadItem = event.data
+
+        vt_symbol: Optional[str] = self.spread_names.get(spread.name, None)
+        if not vt_symbol:
+            return
+
+        payload: bytes = SPREAD_STRUCT.pack(
+            spread.datetime.timestamp(),
+            *[getattr(spread, name) for name in SPREAD_FIELDS]
+        )
+        self.write(KIND_SPREAD, vt_symbol, payload)
+
+    def write(self, kind: int, vt_symbol: str, payload: bytes) -> None:
+        """
+        Write record of event, with symbol defined first if not yet.
+        """
+        receive_time: float = time()
+
+        with self.lock:
+            if not self.file:
+                return
+
+            symbol_id: Optional[int] = self.symbol_ids.get(vt_symbol, None)
+            if symbol_id is None:
+                symbol_id = len(self.symbol_ids)
+                self.symbol_ids[vt_symbol] = symbol_id
+
+                name: bytes = vt_symbol.encode("utf-8")
+                self.file.write(RECORD_STRUCT.pack(KIND_SYMBOL, symbol_id, 0) + SYMBOL_STRUCT.pack(len(name)) + name)
+
+            self.file.write(RECORD_STRUCT.pack(kind, symbol_id, receive_time) + payload)
+            self.count += 1
+
+            if receive_time - self.flush_time > FLUSH_INTERVAL:
+                self.file.flush()
+                self.flush_time = receive_time
+
+
+class TickLog:
+    """
+    Binary log of events loaded into memory, decoded into events when iterated.
+    """
+
+    def __init__(self, path: Path) -> None:
+        """"""
+        self.path: Path = path
+        self.data: bytes = path.read_bytes()
+
+        magic, version = HEADER_STRUCT.unpack_from(self.data)
+        if magic != LOG_MAGIC or version != LOG_VERSION:
+            raise ValueError(f"unsupported tick log: {path}")
+
+        self.vt_symbols: List[str] = []
+        self.count: int = 0
+        self.start_time: float = 0
+        self.end_time: float = 0
+
+        # Timestamp of the first event of each symbol
+        self.first_timestamps: Dict[str, float] = {}
+
+        self.scan()
+
+    def scan(self) -> None:
+        """
+        Read symbols, count and time range of events.
+        """
+        for kind, vt_symbol, receive_time, offset in self.iter_records():
+            if kind == KIND_SYMBOL:
+                self.vt_symbols.append(vt_symbol)
+                continue
+
+            if not self.count:
+                self.start_time = receive_time
+            self.end_time = receive_time
+            self.count += 1
+
+            if vt_symbol not in self.first_timestamps:
+                self.first_timestamps[vt_symbol] = PAYLOAD_STRUCTS[kind].unpack_from(self.data, offset)[0]
+
+    def iter_records(self) -> Iterator[Tuple[int, str, float, int]]:
+        """
+        Iterate kind, symbol, receive time and payload offset of records.
+        """
+        data: bytes = self.data
+        size: int = len(data)
+        offset: int = HEADER_STRUCT.size
+        symbols: List[str] = []
+
+        while offset + RECORD_STRUCT.size <= size:
+            kind, symbol_id, receive_time = RECORD_STRUCT.unpack_from(data, offset)
+            offset += RECORD_STRUCT.size
+
+            if kind == KIND_SYMBOL:
+                length: int = SYMBOL_STRUCT.unpack_from(data, offset)[0]
+                offset += SYMBOL_STRUCT.size
+
+                symbols.append(data[offset:offset + length].decode("utf-8"))
+                offset += length
+
+                yield kind, symbols[symbol_id], receive_time, offset
+                continue
+
+            payload_size: int = PAYLOAD_STRUCTS[kind].size
+
+            # Record cut off by unclean stop is dropped
+            if offset + payload_size > size:
+                break
+
+            yield kind, symbols[symbol_id], receive_time, offset
+            offset += payload_size
+
+    def iter_events(self) -> Iterator[Tuple[float, Event]]:
+        """
+        Iterate receive time and event of records, as put by gateway.
+        """
+        data: bytes = self.data
+
+        for kind, vt_symbol, receive_time, offset in self.iter_records():
+            if kind == KIND_TICK:
+                values: tuple = TICK_STRUCT.unpack_from(data, offset)
+                symbol, exchange = extract_vt_symbol(vt_symbol)
+
+                tick: TickData = TickData(
+                    symbol=symbol,
+                    exchange=exchange,
+                    datetime=datetime.fromtimestamp(values[0], DB_TZ),
+                    gateway_name=GATEWAY_NAME,
+                    **dict(zip(TICK_FIELDS, values[1:]))
+                )
+                yield receive_time, Event(EVENT_TICK + vt_symbol, tick)
+
+            elif kind == KIND_SPREAD:
+                values: tuple = SPREAD_STRUCT.unpack_from(data, offset)
+                name, _ = extract_vt_symbol(vt_symbol)
+
+                spread: SpreadItem = SpreadItem(
+                    name=name,
+                    datetime=datetime.fromtimestamp(values[0], DB_TZ),
+                    price_formula="",
+                    trading_formula="",
+                    **dict(zip(SPREAD_FIELDS, values[1:]))
+                )
+                yield receive_time, Event(EVENT_SPREAD_DATA, spread)
+
+
+def get_record_path() -> Path:
+    """
+    Get path of new log in record folder, named by current time.
+    """
+    folder: Path = get_folder_path(RECORD_FOLDER)
+    return folder.joinpath(datetime.now().strftime("%Y%m%d_%H%M%S") + LOG_SUFFIX)
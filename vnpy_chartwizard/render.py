@@ -0,0 +1,267 @@
+"""
+Headless batch rendering of charts into PNG files.
+
+Bars are loaded through history cache of chart wizard engine, and drawn
+by items of chart layout under offscreen Qt platform, in a pool of
+processes:
+
+    python -m vnpy_chartwizard.render rb2501.SHFE IF2412.CFFEX --timeframe 1d --start 2024-01-01 --output charts
+
+Without gateway connected, bars are loaded from database only, unless
+--datafeed is given to query datafeed and save bars into database.
+"""
+
+import os
+import sys
+from argparse import ArgumentParser, Namespace
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from pathlib import Path
+from time import perf_counter
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
+
+from tzlocal import get_localzone_name
+
+from vnpy.event import EventEngine
+from vnpy.trader.constant import Interval
+from vnpy.trader.engine import MainEngine
+from vnpy.trader.utility import ZoneInfo
+
+from .engine import ChartWizardEngine
+from .resample import TIMEFRAMES, resample_bars
+from .store import BarColumns
+
+if TYPE_CHECKING:
+    from .ui.chart import ChartWidget
+
+
+# Size of images in pixels
+IMAGE_WIDTH = 1600
+IMAGE_HEIGHT = 900
+
+# Number of the most recent bars shown in image
+VIEW_COUNT = 200
+
+# Days of history loaded when start is not given
+HISTORY_DAYS = 5
+
+# Renderer of current worker process, created by pool initializer
+renderer: Optional["ChartRenderer"] = None
+
+
+class ChartRenderer:
+    """
+    Render charts of one layout into images, in current process.
+
+    One Qt application and chart wizard engine are created per process.
+    Indicator values are calculated in place with full arrays, since no
+    event loop runs to receive results from worker threads.
+    """
+
+    def __init__(
+        self,
+        layout_name: str = "",
+        width: int = IMAGE_WIDTH,
+        height: int = IMAGE_HEIGHT,
+        view_count: int = VIEW_COUNT,
+        use_datafeed: bool = False
+    ) -> None:
+        """"""
+        # Must be set before Qt application is created
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+        from vnpy.trader.ui import QtWidgets
+
+        from .ui.cache import SharedStream
+        from .ui.layout import DEFAULT_LAYOUT, load_layouts
+
+        self.app: QtWidgets.QApplication = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+        SharedStream.background_count = sys.maxsize
+
+        # Bars are loaded in place, so no event is processed
+        self.event_engine: EventEngine = EventEngine()
+        self.main_engine: MainEngine = MainEngine(self.event_engine)
+        self.event_engine.stop()
+
+        self.engine: ChartWizardEngine = self.main_engine.add_engine(ChartWizardEngine)
+
+        self.layout: dict = load_layouts().get(layout_name, DEFAULT_LAYOUT)
+        self.width: int = width
+        self.height: int = height
+        self.view_count: int = view_count
+        self.use_datafeed: bool = use_datafeed
+
+    def render(
+        self,
+        vt_symbol: str,
+        timeframe: str,
+        start: datetime,
+        end: datetime,
+        path: Path
+    ) -> dict:
+        """
+        Render chart of symbol into image file, and return result of it.
+        """
+        from .ui.layout import build_chart
+
+        start_time: float = perf_counter()
+        result: dict = {"vt_symbol": vt_symbol, "path": str(path), "count": 0, "error": ""}
+
+        try:
+            window, interval = TIMEFRAMES[timeframe]
+
+            # Loaded as 1-minute bars and resampled, same as chart of widget
+            base: BarColumns = self.engine.load_history(vt_symbol, Interval.MINUTE, start, end, self.use_datafeed)
+            history: BarColumns = resample_bars(base, window, interval)
+            result["count"] = len(history)
+
+            if not len(history):
+                result["error"] = "no bar data"
+                return result
+
+            chart: "ChartWidget" = build_chart(self.layout, cursor=False)
+            chart.resize(self.width, self.height)
+
+            chart.update_history(history)
+            chart.show_recent(self.view_count)
+
+            chart.grab().save(str(path), "PNG")
+
+            chart.release()
+            chart.deleteLater()
+            self.app.processEvents()
+        except Exception as e:
+            result["error"] = repr(e)
+        finally:
+            result["seconds"] = perf_counter() - start_time
+
+        return result
+
+
+def init_worker(layout_name: str, width: int, height: int, view_count: int, use_datafeed: bool) -> None:
+    """
+    Create renderer of worker process.
+    """
+    global renderer
+    renderer = ChartRenderer(layout_name, width, height, view_count, use_datafeed)
+
+
+def render_in_worker(vt_symbol: str, timeframe: str, start: datetime, end: datetime, path: Path) -> dict:
+    """"""
+    return renderer.render(vt_symbol, timeframe, start, end, path)
+
+
+def render_charts(
+    vt_symbols: List[str],
+    timeframe: str,
+    start: datetime,
+    end: datetime,
+    folder: Path,
+    layout_name: str = "",
+    width: int = IMAGE_WIDTH,
+    height: int = IMAGE_HEIGHT,
+    view_count: int = VIEW_COUNT,
+    workers: int = 0,
+    output: Callable = print,
+    use_datafeed: bool = False
+) -> List[dict]:
+    """
+    Render charts of symbols into PNG files in folder, with one process per CPU by default.
+
+    Image of each symbol is named by vt_symbol and timeframe. Results are
+    returned in order of symbols, with error of charts failed.
+    """
+    folder.mkdir(parents=True, exist_ok=True)
+
+    # Same symbol is rendered only once, as snapshot files are written by symbol
+    vt_symbols = list(dict.fromkeys(vt_symbols))
+    results: Dict[str, dict] = {}
+
+    with ProcessPoolExecutor(
+        max_workers=workers or os.cpu_count(),
+        initializer=init_worker,
+        initargs=(layout_name, width, height, view_count, use_datafeed)
+    ) as executor:
+        futures: Dict[Future, str] = {}
+
+        for vt_symbol in vt_symbols:
+            path: Path = folder.joinpath(f"{vt_symbol}_{timeframe}.png")
+            future: Future = executor.submit(render_in_worker, vt_symbol, timeframe, start, end, path)
+            futures[future] = vt_symbol
+
+        for n, future in enumerate(as_completed(futures), 1):
+            result: dict = future.result()
+            results[futures[future]] = result
+
+            status: str = result["error"] or f"{result['count']} bars"
+            output(f"[{n}/{len(vt_symbols)}] {result['vt_symbol']}: {status}, {result['seconds']:.2f}s")
+
+    return [results[vt_symbol] for vt_symbol in vt_symbols]
+
+
+def parse_args() -> Namespace:
+    """"""
+    parser: ArgumentParser = ArgumentParser(description="Render charts into PNG files")
+    parser.add_argument("symbols", nargs="*", help="vt_symbols of charts")
+    parser.add_argument("--symbol-file", default="", help="file of vt_symbols, one per line")
+    parser.add_argument("--timeframe", default="1m", choices=list(TIMEFRAMES.keys()))
+    parser.add_argument("--start", default="", help="start date as YYYY-MM-DD")
+    parser.add_argument("--end", default="", help="end date as YYYY-MM-DD, now by default")
+    parser.add_argument("--output", default="charts", help="folder of images")
+    parser.add_argument("--layout", default="", help="name of chart layout")
+    parser.add_argument("--width", type=int, default=IMAGE_WIDTH)
+    parser.add_argument("--height", type=int, default=IMAGE_HEIGHT)
+    parser.add_argument("--bars", type=int, default=VIEW_COUNT, help="number of recent bars shown")
+    parser.add_argument("--workers", type=int, default=0, help="number of processes, CPU count by default")
+    parser.add_argument("--datafeed", action="store_true", help="query bars from datafeed and save into database")
+    return parser.parse_args()
+
+
+def main() -> None:
+    """"""
+    args: Namespace = parse_args()
+
+    vt_symbols: List[str] = list(args.symbols)
+    if args.symbol_file:
+        with open(args.symbol_file, encoding="UTF-8") as f:
+            vt_symbols.extend(line.strip() for line in f if line.strip())
+
+    if not vt_symbols:
+        print("No symbol to render")
+        return
+
+    tz: ZoneInfo = ZoneInfo(get_localzone_name())
+
+    if args.end:
+        end: datetime = datetime.strptime(args.end, "%Y-%m-%d").replace(tzinfo=tz) + timedelta(days=1)
+    else:
+        end: datetime = datetime.now(tz)
+
+    if args.start:
+        start: datetime = datetime.strptime(args.start, "%Y-%m-%d").replace(tzinfo=tz)
+    else:
+        start: datetime = end - timedelta(days=HISTORY_DAYS)
+
+    start_time: float = perf_counter()
+
+    results: List[dict] = render_charts(
+        vt_symbols,
+        args.timeframe,
+        start,
+        end,
+        Path(args.output),
+        args.layout,
+        args.width,
+        args.height,
+        args.bars,
+        args.workers,
+        use_datafeed=args.datafeed
+    )
+
+    failed: int = len([result for result in results if result["error"]])
+    print(f"Rendered {len(results) - failed} charts, {failed} failed, in {perf_counter() - start_time:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+from datetime import datetime, tzinfo
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from vnpy.trader.constant import Interval
+from vnpy.trader.object import BarData
+
+from .store import BAR_FIELDS, BarColumns
+
+
+# Timeframe name mapped to window in seconds and interval of bars
+TIMEFRAMES: Dict[str, Tuple[int, Interval]] = {
+    "1m": (60, Interval.MINUTE),
+    "5m": (300, Interval.MINUTE),
+    "15m": (900, Interval.MINUTE),
+    "1h": (3600, Interval.HOUR),
+    "1d": (86400, Interval.DAILY),
+}
+
+
+def resample_bars(columns: BarColumns, window: int, interval: Interval) -> BarColumns:
+    """
+    Resample bars into windows of seconds aligned to local time.
+
+    Each window bar is dated at start of the window, with OHLCV reduced
+    from bars within it.
+    """
+    result: BarColumns = BarColumns(columns.vt_symbol, interval, columns.tz, columns.gateway_name)
+
+    count: int = len(columns)
+    if not count:
+        return result
+
+    # Integer division is much faster than floor of float
+    ts_array: np.ndarray = columns.get_array("datetime").astype(np.int64)
+    offsets: np.ndarray = get_utc_offsets(ts_array, columns.tz)
+    keys: np.ndarray = (ts_array + offsets) // window
+
+    starts: np.ndarray = np.concatenate(([0], np.flatnonzero(np.diff(keys)) + 1))
+
+    # Bars already in window size, such as 1-minute ones, are copied directly
+    if len(starts) == count:
+        arrays: Dict[str, np.ndarray] = {field: columns.get_array(field) for field in BAR_FIELDS}
+        arrays["datetime"] = (keys * window - offsets).astype(float)
+
+        result.set_arrays(arrays)
+        return result
+
+    ends: np.ndarray = np.append(starts[1:], count) - 1
+
+    result.set_arrays({
+        "datetime": (keys[starts] * window - offsets[starts]).astype(float),
+        "open_price": columns.get_array("open_price")[starts],
+        "high_price": np.maximum.reduceat(columns.get_array("high_price"), starts),
+        "low_price": np.minimum.reduceat(columns.get_array("low_price"), starts),
+        "close_price": columns.get_array("close_price")[ends],
+        "volume": np.add.reduceat(columns.get_array("volume"), starts),
+        "turnover": np.add.reduceat(columns.get_array("turnover"), starts),
+        "open_interest": columns.get_array("open_interest")[ends],
+    })
+    return result
+
+
+def resample_bar(columns: BarColumns, bar: BarData, window: int, interval: Interval) -> BarData:
+    """
+    Get window bar containing bar, which is already updated into columns.
+
+    Bar is returned directly for 1-minute window, since it is its own window.
+    """
+    if window == 60:
+        return bar
+
+    ts: float = bar.datetime.timestamp()
+    offset: float = datetime.fromtimestamp(ts, columns.tz).utcoffset().total_seconds()
+    start_ts: float = (ts + offset) // window * window - offset
+
+    dt_array: np.ndarray = columns.get_array("datetime")
+    start_ix: int = int(np.searchsorted(dt_array, start_ts, side="left"))
+    end_ix: int = int(np.searchsorted(dt_array, start_ts + window, side="left"))
+
+    window_bars: BarColumns = columns.slice(start_ix, end_ix)
+
+    return BarData(
+        symbol=bar.symbol,
+        exchange=bar.exchange,
+        datetime=datetime.fromtimestamp(start_ts, bar.datetime.tzinfo),
+        interval=interval,
+        volume=float(window_bars.get_array("volume").sum()),
+        turnover=float(window_bars.get_array("turnover").sum()),
+        open_interest=float(window_bars.get_array("open_interest")[-1]),
+        open_price=float(window_bars.get_array("open_price")[0]),
+        high_price=float(window_bars.get_array("high_price").max()),
+        low_price=float(window_bars.get_array("low_price").min()),
+        close_price=float(window_bars.get_array("close_price")[-1]),
+        gateway_name=bar.gateway_name
+    )
+
+
+def get_utc_offsets(ts_array: np.ndarray, tz: tzinfo) -> np.ndarray:
+    """
+    Get UTC offset in seconds of each integer timestamp, looked up once per UTC day.
+    """
+    days: np.ndarray = ts_array // 86400
+    starts: np.ndarray = np.concatenate(([0], np.flatnonzero(np.diff(days)) + 1))
+
+    day_offsets: List[int] = [
+        int(datetime.fromtimestamp(ts, tz).utcoffset().total_seconds())
+        for ts in ts_array[starts].tolist()
+    ]
+
+    # Most days share one offset, so only fill the array when it changes
+    offsets: np.ndarray = np.full(len(ts_array), day_offsets[0], dtype=np.int64)
+    for ix, offset in zip(starts.tolist(), day_offsets):
+        if offset != offsets[ix]:
+            offsets[ix:] = offset
+
+    return offsets
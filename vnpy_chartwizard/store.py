@@ -0,0 +1,405 @@
+import json
+import os
+from datetime import datetime, timedelta, timezone, tzinfo
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from vnpy.trader.constant import Interval
+from vnpy.trader.object import BarData
+from vnpy.trader.utility import ZoneInfo, extract_vt_symbol
+from vnpy.trader.database import DB_TZ
+
+from .column import FloatColumn
+
+
+# Datetime is stored as epoch seconds, so all columns are float64
+BAR_FIELDS: Tuple[str, ...] = (
+    "datetime",
+    "open_price",
+    "high_price",
+    "low_price",
+    "close_price",
+    "volume",
+    "turnover",
+    "open_interest",
+)
+
+
+class BarColumns:
+    """
+    Bar data of one vt_symbol and interval stored in columns.
+    """
+
+    def __init__(
+        self,
+        vt_symbol: str,
+        interval: Interval,
+        tz: tzinfo = DB_TZ,
+        gateway_name: str = "DB"
+    ) -> None:
+        """"""
+        self.vt_symbol: str = vt_symbol
+        self.symbol, self.exchange = extract_vt_symbol(vt_symbol)
+        self.interval: Interval = interval
+        self.tz: tzinfo = tz
+        self.gateway_name: str = gateway_name
+
+        self.columns: Dict[str, FloatColumn] = {field: FloatColumn() for field in BAR_FIELDS}
+
+    def __len__(self) -> int:
+        """"""
+        return len(self.columns["datetime"])
+
+    @classmethod
+    def from_bars(cls, vt_symbol: str, interval: Interval, bars: List[BarData]) -> "BarColumns":
+        """
+        Create columns from list of bar data sorted by datetime.
+        """
+        if bars:
+            bar: BarData = bars[0]
+            columns: BarColumns = cls(vt_symbol, interval, bar.datetime.tzinfo or DB_TZ, bar.gateway_name)
+        else:
+            columns = cls(vt_symbol, interval)
+
+        rows: List[tuple] = [
+            (
+                bar.datetime.timestamp(),
+                bar.open_price,
+                bar.high_price,
+                bar.low_price,
+                bar.close_price,
+                bar.volume,
+                bar.turnover,
+                bar.open_interest
+            )
+            for bar in bars
+        ]
+        data: np.ndarray = np.array(rows, dtype=float).reshape(-1, len(BAR_FIELDS))
+
+        columns.set_arrays({field: data[:, n] for n, field in enumerate(BAR_FIELDS)})
+        return columns
+
+    def get_array(self, field: str) -> np.ndarray:
+        """
+        Get view of one column, which is invalid after new bar appended.
+        """
+        return self.columns[field].array
+
+    def set_arrays(self, arrays: Dict[str, np.ndarray]) -> None:
+        """
+        Replace data of all columns.
+        """
+        for field, column in self.columns.items():
+            column.set_array(arrays[field])
+
+    def get_index(self, dt: datetime) -> Optional[int]:
+        """
+        Get index of bar with datetime, return None if not found.
+        """
+        return self._search(dt.timestamp())[1]
+
+    def get_datetime(self, ix: int) -> Optional[datetime]:
+        """"""
+        if not 0 <= ix < len(self):
+            return None
+
+        return datetime.fromtimestamp(self.columns["datetime"].get(ix), self.tz)
+
+    def get_bar(self, ix: int) -> Optional[BarData]:
+        """
+        Create bar data object of index.
+        """
+        dt: Optional[datetime] = self.get_datetime(ix)
+        if not dt:
+            return None
+
+        c: Dict[str, FloatColumn] = self.columns
+
+        return BarData(
+            symbol=self.symbol,
+            exchange=self.exchange,
+            datetime=dt,
+            interval=self.interval,
+            volume=c["volume"].get(ix),
+            turnover=c["turnover"].get(ix),
+            open_interest=c["open_interest"].get(ix),
+            open_price=c["open_price"].get(ix),
+            high_price=c["high_price"].get(ix),
+            low_price=c["low_price"].get(ix),
+            close_price=c["close_price"].get(ix),
+            gateway_name=self.gateway_name
+        )
+
+    def update_bar(self, bar: BarData) -> int:
+        """
+        Update bar with same datetime, or add new one. Return its index.
+        """
+        ts: float = bar.datetime.timestamp()
+        values: tuple = (
+            ts,
+            bar.open_price,
+            bar.high_price,
+            bar.low_price,
+            bar.close_price,
+            bar.volume,
+            bar.turnover,
+            bar.open_interest
+        )
+
+        ix, found = self._search(ts)
+
+        if found is not None:
+            for column, value in zip(self.columns.values(), values):
+                column[ix] = value
+        elif ix == len(self):
+            for column, value in zip(self.columns.values(), values):
+                column.append(value)
+        else:
+            for column, value in zip(self.columns.values(), values):
+                column.set_array(np.insert(column.array, ix, value))
+
+        return ix
+
+    def update_history(self, other: "BarColumns") -> None:
+        """
+        Merge bars of other columns, which replace bars with same datetime.
+        """
+        if not len(other):
+            return
+
+        if not len(self):
+            self.interval = other.interval
+            self.tz = other.tz
+            self.gateway_name = other.gateway_name
+            self.set_arrays({field: other.get_array(field) for field in BAR_FIELDS})
+            return
+
+        # Older bars are inserted before current ones without merging
+        other_dt: np.ndarray = other.get_array("datetime")
+        first_ts: float = self.columns["datetime"].get(0)
+        if other_dt[-1] <= first_ts and (len(other_dt) == 1 or other_dt[-2] < first_ts):
+            self.prepend_history(other)
+            return
+
+        # Stable sort keeps bar of other after the one with same datetime
+        dt_array: np.ndarray = np.concatenate([self.get_array("datetime"), other.get_array("datetime")])
+        order: np.ndarray = np.argsort(dt_array, kind="stable")
+        sorted_dt: np.ndarray = dt_array[order]
+
+        keep: np.ndarray = np.ones(len(order), dtype=bool)
+        keep[:-1] = sorted_dt[:-1] != sorted_dt[1:]
+        order = order[keep]
+
+        self.set_arrays({
+            field: np.concatenate([self.get_array(field), other.get_array(field)])[order]
+            for field in BAR_FIELDS
+        })
+
+    def prepend_history(self, other: "BarColumns") -> None:
+        """
+        Insert bars of other columns before current ones, with cost of other size only.
+
+        Bars of other must be sorted and not after the first current bar, which
+        is replaced by the last bar of other if with same datetime.
+        """
+        count: int = len(other)
+        if not count:
+            return
+
+        if other.get_array("datetime")[-1] == self.columns["datetime"].get(0):
+            for field, column in self.columns.items():
+                column[0] = other.get_array(field)[-1]
+            count -= 1
+
+        for field, column in self.columns.items():
+            column.prepend(other.get_array(field)[:count])
+
+    def slice(self, start: int, end: int) -> "BarColumns":
+        """
+        Get columns of bars with index in [start, end).
+        """
+        columns: BarColumns = BarColumns(self.vt_symbol, self.interval, self.tz, self.gateway_name)
+        columns.set_arrays({field: self.get_array(field)[start:end] for field in BAR_FIELDS})
+        return columns
+
+    def clear(self) -> None:
+        """"""
+        for column in self.columns.values():
+            column.clear()
+
+    def _search(self, ts: float) -> Tuple[int, Optional[int]]:
+        """
+        Get insert position of timestamp, and index if already exists.
+        """
+        dt_column: FloatColumn = self.columns["datetime"]
+        count: int = len(dt_column)
+
+        # Live bars update the last one or append
+        if not count or ts > dt_column.get(count - 1):
+            return count, None
+        elif ts == dt_column.get(count - 1):
+            return count - 1, count - 1
+
+        ix: int = int(np.searchsorted(dt_column.array, ts))
+        if dt_column.get(ix) == ts:
+            return ix, ix
+        return ix, None
+
+
+class BarSnapshot:
+    """
+    Bar history of one vt_symbol and interval in memory-mapped column files.
+
+    Each field is one file of float64 values, new bars are appended to the
+    end of files. Rows written partly are ignored when loading. Timezone and
+    gateway name of columns saved are kept in meta file, so that columns
+    loaded are the same as ones queried.
+    """
+
+    def __init__(self, folder: Path, vt_symbol: str, interval: Interval) -> None:
+        """"""
+        self.vt_symbol: str = vt_symbol
+        self.interval: Interval = interval
+
+        self.path: Path = folder.joinpath(f"{vt_symbol}_{interval.value}")
+
+    def get_count(self) -> int:
+        """
+        Get number of bars written completely.
+        """
+        counts: List[int] = []
+
+        for field in BAR_FIELDS:
+            file_path: Path = self._get_file_path(field)
+            if not file_path.exists():
+                return 0
+            counts.append(file_path.stat().st_size // 8)
+
+        return min(counts)
+
+    def get_range(self) -> Optional[Tuple[datetime, datetime]]:
+        """
+        Get datetime of first and last bar.
+        """
+        count: int = self.get_count()
+        if not count:
+            return None
+
+        dt_array: np.ndarray = self._map("datetime", count)
+        return (
+            datetime.fromtimestamp(dt_array[0], DB_TZ),
+            datetime.fromtimestamp(dt_array[count - 1], DB_TZ)
+        )
+
+    def load(self, start: datetime, end: datetime) -> BarColumns:
+        """
+        Load bars within [start, end], only the range is read from files.
+        """
+        columns: BarColumns = BarColumns(self.vt_symbol, self.interval, *self._load_meta())
+
+        count: int = self.get_count()
+        if not count:
+            return columns
+
+        dt_array: np.ndarray = self._map("datetime", count)
+        start_ix: int = int(np.searchsorted(dt_array, start.timestamp(), side="left"))
+        end_ix: int = int(np.searchsorted(dt_array, end.timestamp(), side="right"))
+
+        columns.set_arrays({
+            field: self._map(field, count)[start_ix:end_ix] for field in BAR_FIELDS
+        })
+        return columns
+
+    def save(self, columns: BarColumns) -> None:
+        """
+        Replace all files with data of columns.
+        """
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        for field in BAR_FIELDS:
+            file_path: Path = self._get_file_path(field)
+            temp_path: Path = file_path.with_suffix(".tmp")
+
+            columns.get_array(field).astype(np.float64).tofile(temp_path)
+            os.replace(temp_path, file_path)
+
+        self._save_meta(columns)
+
+    def append(self, columns: BarColumns) -> None:
+        """
+        Write bars after the last one into files, the last one is overwritten.
+        """
+        if not len(columns):
+            return
+
+        count: int = self.get_count()
+        if not count:
+            self.save(columns)
+            return
+
+        last_ts: float = float(self._map("datetime", count)[count - 1])
+        dt_array: np.ndarray = columns.get_array("datetime")
+
+        start_ix: int = int(np.searchsorted(dt_array, last_ts, side="left"))
+        if start_ix == len(dt_array):
+            return
+
+        # Overwrite the last row if same datetime, and drop rows written partly
+        offset: int = count - 1 if dt_array[start_ix] == last_ts else count
+
+        for field in BAR_FIELDS:
+            with open(self._get_file_path(field), "r+b") as f:
+                f.truncate(offset * 8)
+                f.seek(offset * 8)
+                f.write(columns.get_array(field)[start_ix:].astype(np.float64).tobytes())
+
+    def _load_meta(self) -> Tuple[tzinfo, str]:
+        """
+        Load timezone and gateway name of columns saved.
+        """
+        file_path: Path = self.path.joinpath("meta.json")
+        if not file_path.exists():
+            return DB_TZ, "DB"
+
+        with open(file_path, encoding="UTF-8") as f:
+            meta: dict = json.load(f)
+
+        if meta.get("tz", ""):
+            tz: tzinfo = ZoneInfo(meta["tz"])
+        elif meta.get("utcoffset", None) is not None:
+            tz = timezone(timedelta(seconds=meta["utcoffset"]))
+        else:
+            tz = DB_TZ
+
+        return tz, meta.get("gateway_name", "DB")
+
+    def _save_meta(self, columns: BarColumns) -> None:
+        """
+        Save timezone and gateway name of columns.
+        """
+        meta: dict = {"gateway_name": columns.gateway_name}
+
+        key: str = getattr(columns.tz, "key", "")
+        if key:
+            meta["tz"] = key
+        else:
+            offset: Optional[timedelta] = columns.tz.utcoffset(None)
+            if offset is not None:
+                meta["utcoffset"] = offset.total_seconds()
+
+        file_path: Path = self.path.joinpath("meta.json")
+        temp_path: Path = file_path.with_suffix(".tmp")
+
+        with open(temp_path, mode="w", encoding="UTF-8") as f:
+            json.dump(meta, f)
+        os.replace(temp_path, file_path)
+
+    def _map(self, field: str, count: int) -> np.ndarray:
+        """"""
+        return np.memmap(self._get_file_path(field), dtype=np.float64, mode="r", shape=(count,))
+
+    def _get_file_path(self, field: str) -> Path:
+        """"""
+        return self.path.joinpath(f"{field}.f8")
@@ -0,0 +1,230 @@
+from typing import List
+
+import numpy as np
+
+from vnpy.chart import CandleItem as BaseCandleItem, VolumeItem as BaseVolumeItem
+from vnpy.chart.base import BAR_WIDTH
+from vnpy.trader.ui import QtCore, QtGui
+
+from .base import BlockItem
+from .manager import BarManager
+from ..lod import LOD_FACTOR
+
+
+class CandleItem(BlockItem, BaseCandleItem):
+    """
+    Candle item drawn by block, with one batched call per color.
+    """
+
+    input_fields = ("open_price", "high_price", "low_price", "close_price")
+
+    def __init__(self, manager: BarManager) -> None:
+        """"""
+        super().__init__(manager)
+
+    def _draw_block(self, painter: QtGui.QPainter, start: int, end: int) -> None:
+        """"""
+        open_array: np.ndarray = self._manager.get_array("open_price")[start:end]
+        high_array: np.ndarray = self._manager.get_array("high_price")[start:end]
+        low_array: np.ndarray = self._manager.get_array("low_price")[start:end]
+        close_array: np.ndarray = self._manager.get_array("close_price")[start:end]
+
+        self._draw_up_down(
+            painter,
+            np.arange(start, end),
+            open_array,
+            high_array,
+            low_array,
+            close_array,
+            BAR_WIDTH
+        )
+
+    def _draw_lod_block(self, painter: QtGui.QPainter, level: int, start: int, end: int) -> None:
+        """
+        Draw envelope of each group as one candle, from open of its first bar to close of its last.
+        """
+        first_array, last_array, low_array, high_array = self._get_groups(
+            level,
+            start,
+            end,
+            self._manager.get_array("low_price"),
+            self._manager.get_array("high_price")
+        )
+
+        self._draw_up_down(
+            painter,
+            (first_array + last_array) / 2,
+            self._manager.get_array("open_price")[first_array],
+            high_array,
+            low_array,
+            self._manager.get_array("close_price")[last_array],
+            BAR_WIDTH * LOD_FACTOR ** level
+        )
+
+    def _draw_up_down(
+        self,
+        painter: QtGui.QPainter,
+        ix_array: np.ndarray,
+        open_array: np.ndarray,
+        high_array: np.ndarray,
+        low_array: np.ndarray,
+        close_array: np.ndarray,
+        width: float
+    ) -> None:
+        """
+        Draw rising and falling candles with one batched call per color.
+        """
+        up_mask: np.ndarray = close_array >= open_array
+
+        painter.setPen(self._up_pen)
+        painter.setBrush(self._black_brush)
+        self._draw_candles(
+            painter,
+            ix_array[up_mask],
+            open_array[up_mask],
+            high_array[up_mask],
+            low_array[up_mask],
+            close_array[up_mask],
+            width
+        )
+
+        painter.setPen(self._down_pen)
+        painter.setBrush(self._down_brush)
+        self._draw_candles(
+            painter,
+            ix_array[~up_mask],
+            open_array[~up_mask],
+            high_array[~up_mask],
+            low_array[~up_mask],
+            close_array[~up_mask],
+            width
+        )
+
+    def _draw_candles(
+        self,
+        painter: QtGui.QPainter,
+        ix_array: np.ndarray,
+        open_array: np.ndarray,
+        high_array: np.ndarray,
+        low_array: np.ndarray,
+        close_array: np.ndarray,
+        width: float = BAR_WIDTH
+    ) -> None:
+        """"""
+        lines: List[QtCore.QLineF] = []
+        rects: List[QtCore.QRectF] = []
+
+        for ix, open_price, high_price, low_price, close_price in zip(
+            ix_array.tolist(),
+            open_array.tolist(),
+            high_array.tolist(),
+            low_array.tolist(),
+            close_array.tolist()
+        ):
+            # Candle shadow
+            if high_price > low_price:
+                lines.append(QtCore.QLineF(ix, high_price, ix, low_price))
+
+            # Candle body
+            if open_price == close_price:
+                lines.append(QtCore.QLineF(
+                    ix - width, open_price,
+                    ix + width, open_price
+                ))
+            else:
+                rects.append(QtCore.QRectF(
+                    ix - width,
+                    open_price,
+                    width * 2,
+                    close_price - open_price
+                ))
+
+        if lines:
+            painter.drawLines(lines)
+        if rects:
+            painter.drawRects(rects)
+
+
+class VolumeItem(BlockItem, BaseVolumeItem):
+    """
+    Volume item drawn by block, with one batched call per color.
+    """
+
+    input_fields = ("open_price", "close_price", "volume")
+
+    def __init__(self, manager: BarManager) -> None:
+        """"""
+        super().__init__(manager)
+
+    def _draw_block(self, painter: QtGui.QPainter, start: int, end: int) -> None:
+        """"""
+        open_array: np.ndarray = self._manager.get_array("open_price")[start:end]
+        close_array: np.ndarray = self._manager.get_array("close_price")[start:end]
+        volume_array: np.ndarray = self._manager.get_array("volume")[start:end]
+
+        self._draw_volumes(
+            painter,
+            np.arange(start, end),
+            close_array >= open_array,
+            volume_array,
+            BAR_WIDTH
+        )
+
+    def _draw_lod_block(self, painter: QtGui.QPainter, level: int, start: int, end: int) -> None:
+        """
+        Draw max volume of each group, colored by open of its first bar and close of its last.
+        """
+        volume_array: np.ndarray = self._manager.get_array("volume")
+        first_array, last_array, _, max_array = self._get_groups(level, start, end, volume_array, volume_array)
+
+        open_array: np.ndarray = self._manager.get_array("open_price")[first_array]
+        close_array: np.ndarray = self._manager.get_array("close_price")[last_array]
+
+        self._draw_volumes(
+            painter,
+            (first_array + last_array) / 2,
+            close_array >= open_array,
+            max_array,
+            BAR_WIDTH * LOD_FACTOR ** level
+        )
+
+    def _draw_volumes(
+        self,
+        painter: QtGui.QPainter,
+        ix_array: np.ndarray,
+        up_array: np.ndarray,
+        volume_array: np.ndarray,
+        width: float
+    ) -> None:
+        """
+        Draw rising and falling volumes with one batched call per color.
+        """
+        up_rects: List[QtCore.QRectF] = []
+        down_rects: List[QtCore.QRectF] = []
+
+        for ix, up, volume in zip(
+            ix_array.tolist(),
+            up_array.tolist(),
+            volume_array.tolist()
+        ):
+            rect: QtCore.QRectF = QtCore.QRectF(
+                ix - width,
+                0,
+                width * 2,
+                volume
+            )
+
+            if up:
+                up_rects.append(rect)
+            else:
+                down_rects.append(rect)
+
+        if up_rects:
+            painter.setPen(self._up_pen)
+            painter.setBrush(self._up_brush)
+            painter.drawRects(up_rects)
+
+        if down_rects:
+            painter.setPen(self._down_pen)
+            painter.setBrush(self._down_brush)
+            painter.drawRects(down_rects)
@@ -0,0 +1,382 @@
+from collections import OrderedDict
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+import numpy as np
+import pyqtgraph as pg
+
+from vnpy.chart.item import ChartItem
+from vnpy.trader.ui import QtCore, QtGui, QtWidgets
+from vnpy.trader.object import BarData
+
+from ..indicator import StreamIndicator
+from ..lod import LOD_FACTOR, LodPyramid, get_lod_level
+from ..monitor import monitor
+from ..store import BAR_FIELDS
+from .cache import SharedStream, indicator_cache
+from .manager import BarManager
+
+
+class BlockItem(ChartItem):
+    """
+    Chart item drawn in blocks of bars instead of one picture per bar.
+
+    Only blocks in the exposed range are drawn, and only the block with an
+    updated bar is redrawn. Block pictures out of view are dropped in least
+    recently used order once more than max_blocks are cached.
+
+    When zoomed out to several bars per pixel, bars are drawn merged into
+    groups of level matching pixel density, with min/max of each group
+    kept in a pyramid, so that cost of drawing follows width of view
+    instead of number of bars.
+    """
+
+    block_size: int = 256
+    max_blocks: int = 64
+
+    # Fields of bar drawn, item is updated only when any of them changes
+    input_fields: Tuple[str, ...] = BAR_FIELDS
+
+    def __init__(self, manager: BarManager) -> None:
+        """"""
+        super().__init__(manager)
+
+        # Pictures keyed by (level, block), block of level covers block_size groups
+        self._block_pictures: OrderedDict[Tuple[int, int], QtGui.QPicture] = OrderedDict()
+        self._lod: LodPyramid = LodPyramid()
+
+    def update_history(self, history: List[BarData]) -> None:
+        """"""
+        self.invalidate()
+        self.update()
+
+    def update_bar(self, bar: BarData) -> None:
+        """"""
+        self.feed_bar(bar)
+        self.update()
+
+    def prepend_history(self, count: int) -> None:
+        """
+        Update with count older bars inserted before current ones.
+        """
+        self.invalidate()
+        self.update()
+
+    def feed_bar(self, bar: BarData) -> None:
+        """
+        Update data of bar without refreshing the item.
+        """
+        ix: int = self._manager.get_index(bar.datetime)
+        if ix is None:
+            return
+
+        self.invalidate(ix)
+
+    def clear_all(self) -> None:
+        """"""
+        self._block_pictures.clear()
+        self._lod.clear()
+
+        super().clear_all()
+
+    def invalidate(self, start: int = 0) -> None:
+        """
+        Drop drawing of bars from index start on, which begins from the bar before.
+        """
+        begin: int = max(start - 1, 0)
+
+        for level, block in list(self._block_pictures):
+            if (block + 1) * self.block_size * LOD_FACTOR ** level > begin:
+                self._block_pictures.pop((level, block))
+
+        self._lod.invalidate(start)
+
+    def paint(
+        self,
+        painter: QtGui.QPainter,
+        opt: QtWidgets.QStyleOptionGraphicsItem,
+        w: QtWidgets.QWidget
+    ) -> None:
+        """
+        Play pictures of blocks in exposed range.
+        """
+        rect: QtCore.QRectF = opt.exposedRect
+        count: int = self._manager.get_count()
+        min_ix: int = max(int(rect.left()), 0)
+        max_ix: int = min(int(rect.right()) + 1, count)
+
+        if min_ix >= max_ix:
+            return
+
+        # Pixels per bar of x axis, painter is transformed from item into device
+        pixels: float = abs(painter.transform().m11())
+        level: int = get_lod_level(1 / pixels) if pixels else 0
+
+        size: int = LOD_FACTOR ** level
+        block_bars: int = self.block_size * size
+        blocks: range = range(min_ix // block_bars, (max_ix - 1) // block_bars + 1)
+
+        for block in blocks:
+            key: Tuple[int, int] = (level, block)
+            picture: QtGui.QPicture = self._block_pictures.get(key, None)
+
+            if picture is None:
+                draw_time: float = perf_counter() if monitor.enabled else 0
+
+                picture = QtGui.QPicture()
+                block_painter: QtGui.QPainter = QtGui.QPainter(picture)
+
+                start: int = block * block_bars
+                end: int = min(start + block_bars, count)
+
+                if level:
+                    self._draw_lod_block(block_painter, level, start, end)
+                else:
+                    self._draw_block(block_painter, start, end)
+
+                block_painter.end()
+                self._block_pictures[key] = picture
+
+                if draw_time:
+                    monitor.observe("draw_block_seconds", perf_counter() - draw_time, type(self).__name__)
+            else:
+                self._block_pictures.move_to_end(key)
+
+            picture.play(painter)
+
+        # Blocks in view are the most recently used ones
+        while len(self._block_pictures) > max(self.max_blocks, len(blocks)):
+            self._block_pictures.popitem(last=False)
+
+    def release(self) -> None:
+        """
+        Release resources shared with other charts before item is removed.
+        """
+        pass
+
+    def _draw_block(self, painter: QtGui.QPainter, start: int, end: int) -> None:
+        """
+        Draw bars with index in [start, end).
+        """
+        pass
+
+    def _draw_lod_block(self, painter: QtGui.QPainter, level: int, start: int, end: int) -> None:
+        """
+        Draw bars with index in [start, end) merged into groups of level.
+
+        Every bar is drawn unless merged drawing is implemented.
+        """
+        self._draw_block(painter, start, end)
+
+    def _get_groups(
+        self,
+        level: int,
+        start: int,
+        end: int,
+        min_array: np.ndarray,
+        max_array: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Get index of first and last bar, min and max of groups of level in [start, end).
+
+        Start is at boundary of group, min and max are of whole source arrays.
+        """
+        size: int = LOD_FACTOR ** level
+        end = min(end, len(min_array))
+
+        first_array: np.ndarray = np.arange(start, end, size)
+        last_array: np.ndarray = np.minimum(first_array + size, end) - 1
+
+        mins, maxs = self._lod.get_level(level, min_array, max_array)
+        group: int = start // size
+
+        return (
+            first_array,
+            last_array,
+            mins[group:group + len(first_array)],
+            maxs[group:group + len(first_array)]
+        )
+
+    def _draw_bar_picture(self, ix: int, bar: BarData) -> QtGui.QPicture:
+        """
+        Not used, bars are drawn by block.
+        """
+        return QtGui.QPicture()
+
+    def boundingRect(self) -> QtCore.QRectF:
+        """"""
+        min_value, max_value = self.get_y_range()
+        rect: QtCore.QRectF = QtCore.QRectF(
+            0,
+            min_value,
+            self._manager.get_count(),
+            max_value - min_value
+        )
+        return rect
+
+
+class IndicatorItem(BlockItem):
+    """
+    Block item drawn from values of an indicator stream.
+
+    Stream is created with parameters given, merged into default ones.
+    Once data key of bar manager is set, the stream is shared through
+    indicator cache with items of other charts showing the same bars, and
+    values are calculated or updated only once for all of them.
+
+    Values are synced with bar manager by version, only ones from the
+    first bar changed since the last sync are updated.
+    """
+
+    input_fields: Tuple[str, ...] = ("close_price",)
+    stream_class: Type[StreamIndicator] = None
+    default_params: Dict[str, Any] = {}
+
+    def __init__(self, manager: BarManager, **params: Any) -> None:
+        """"""
+        super().__init__(manager)
+
+        self.params: Dict[str, Any] = {**self.default_params, **params}
+
+        # Private until bound to shared stream of data key
+        self._shared: SharedStream = self._create_private()
+
+        # Version of bar manager which values are synced with
+        self._version: int = manager.version
+
+    @property
+    def stream(self) -> StreamIndicator:
+        """"""
+        return self._shared.stream
+
+    def update_history(self, history: List[BarData]) -> None:
+        """"""
+        self._bind()
+        self._sync()
+
+        super().update_history(history)
+
+    def prepend_history(self, count: int) -> None:
+        """"""
+        self._version = self._manager.version
+
+        # Older bars may be inserted already by chart sharing the stream
+        fingerprint: tuple = self._manager.get_fingerprint()
+        if fingerprint != self._shared.fingerprint:
+            self._shared.prepend(count, self.get_input_arrays(), fingerprint)
+
+        super().prepend_history(count)
+
+    def feed_bar(self, bar: BarData) -> None:
+        """"""
+        self._sync()
+
+    def clear_all(self) -> None:
+        """
+        Release shared stream, bound again with next history.
+        """
+        self.release()
+
+        super().clear_all()
+
+    def refresh(self, start: int = 0) -> None:
+        """
+        Redraw with values updated in shared stream from index start on.
+        """
+        self.invalidate(start)
+        self.update()
+
+    def release(self) -> None:
+        """"""
+        if self._shared.key:
+            indicator_cache.release(self._shared.key, self)
+            self._shared = self._create_private()
+
+    def get_input_arrays(self) -> List[np.ndarray]:
+        """"""
+        return [self._manager.get_array(field) for field in self.input_fields]
+
+    def _bind(self) -> None:
+        """
+        Bind to shared stream of current data key, released from previous one.
+        """
+        data_key: tuple = self._manager.data_key
+        if not data_key:
+            self.release()
+            return
+
+        key: tuple = (data_key, self.stream_class.__name__, tuple(sorted(self.params.items())))
+        if key == self._shared.key:
+            return
+
+        self.release()
+        self._shared = indicator_cache.acquire(key, self)
+
+        # Values may be calculated already by item of another chart
+        if self._shared.fingerprint == self._manager.get_fingerprint():
+            self._version = self._manager.version
+
+    def _sync(self) -> None:
+        """
+        Update values of bars changed since version last synced.
+        """
+        start: Optional[int] = self._manager.get_dirty_index(self._version)
+        if start is None:
+            return
+        self._version = self._manager.version
+
+        self._shared.sync(start, self.get_input_arrays(), self._manager.get_fingerprint(), self)
+
+    def _create_private(self) -> SharedStream:
+        """"""
+        shared: SharedStream = SharedStream((), self.stream_class(**self.params))
+        shared.items.append(self)
+        return shared
+
+    def _draw_line(self, painter: QtGui.QPainter, pen: QtGui.QPen, start: int, end: int) -> None:
+        """
+        Draw stream values as one path, from the bar before start.
+        """
+        begin: int = max(start - 1, 0)
+        y: np.ndarray = self.stream.values[begin:end]
+        if not len(y):
+            return
+
+        x: np.ndarray = np.arange(begin, begin + len(y), dtype=float)
+
+        path: QtGui.QPainterPath = pg.arrayToQPath(x, y, connect="finite")
+
+        painter.setPen(pen)
+        painter.drawPath(path)
+
+    def _draw_lod_line(self, painter: QtGui.QPainter, pen: QtGui.QPen, level: int, start: int, end: int) -> None:
+        """
+        Draw last value of each group of level as one path, from the group before start,
+        with range of values in each group as vertical lines.
+        """
+        values: np.ndarray = self.stream.values.array
+        begin: int = max(start - LOD_FACTOR ** level, 0)
+
+        first_array, last_array, min_array, max_array = self._get_groups(level, begin, end, values, values)
+        if not len(first_array):
+            return
+
+        x: np.ndarray = (first_array + last_array) / 2
+
+        # Stroking one path zigzagging between min and max is much slower than separate lines
+        mask: np.ndarray = max_array > min_array
+        lines: List[QtCore.QLineF] = [
+            QtCore.QLineF(ix, min_value, ix, max_value)
+            for ix, min_value, max_value in zip(
+                x[mask].tolist(),
+                min_array[mask].tolist(),
+                max_array[mask].tolist()
+            )
+        ]
+
+        path: QtGui.QPainterPath = pg.arrayToQPath(x, values[last_array], connect="finite")
+
+        painter.setPen(pen)
+        painter.drawPath(path)
+        if lines:
+            painter.drawLines(lines)
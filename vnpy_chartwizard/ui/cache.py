@@ -0,0 +1,261 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from time import perf_counter
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+import numpy as np
+
+from vnpy.trader.logger import logger
+from vnpy.trader.ui import QtCore
+
+from ..engine import APP_NAME
+from ..indicator import StreamIndicator
+from ..monitor import monitor
+
+if TYPE_CHECKING:
+    from .base import IndicatorItem
+
+
+# Shared by indicator streams of all charts, talib releases GIL in calculation
+INDICATOR_WORKERS = 4
+
+executor: ThreadPoolExecutor = ThreadPoolExecutor(
+    max_workers=INDICATOR_WORKERS,
+    thread_name_prefix="ChartIndicator"
+)
+
+
+class SharedStream(QtCore.QObject):
+    """
+    Indicator stream shared by items showing the same bars with the same parameters.
+
+    Values are calculated once for all items bound, in worker thread when
+    history has at least background_count bars. Bars fed during calculation
+    are replayed onto the new stream when it is done. Every item bound is
+    refreshed when values are calculated or updated through any of them.
+
+    Bars changed from an index on are updated one by one if at most
+    replay_count of them from the forming bar, otherwise values are
+    recalculated from that index.
+
+    Failure of calculation in worker thread is logged, and not retried
+    until bars change.
+    """
+
+    background_count: int = 10000
+    replay_count: int = 16
+
+    signal_stream: QtCore.Signal = QtCore.Signal(int, object)
+    signal_error: QtCore.Signal = QtCore.Signal(int, object)
+
+    def __init__(self, key: tuple, stream: StreamIndicator) -> None:
+        """"""
+        super().__init__()
+
+        self.key: tuple = key
+        self.stream: StreamIndicator = stream
+        self.items: List["IndicatorItem"] = []
+
+        # Count, first and last datetime of bars values are calculated from
+        self.fingerprint: tuple = ()
+
+        # Results of calculation started before the latest one are dropped
+        self.calculating: bool = False
+        self._version: int = 0
+        self._calculating_count: int = 0
+
+        # Fingerprint of bars that calculation failed with
+        self._failed_fingerprint: tuple = ()
+
+        self.signal_stream.connect(self._process_stream)
+        self.signal_error.connect(self._process_error)
+
+    def calculate(self, arrays: List[np.ndarray], fingerprint: tuple) -> None:
+        """
+        Calculate values of all bars, then refresh items.
+        """
+        if fingerprint == self._failed_fingerprint:
+            return
+
+        self._version += 1
+        self.fingerprint = fingerprint
+
+        if len(arrays[0]) < self.background_count:
+            self.calculating = False
+
+            calculate_time: float = perf_counter() if monitor.enabled else 0
+            self.stream.update_history(*arrays)
+            if calculate_time:
+                monitor.observe("indicator_calculate_seconds", perf_counter() - calculate_time, type(self.stream).__name__)
+        else:
+            self.calculating = True
+            self._calculating_count = len(arrays[0])
+            self.stream.values.clear()
+
+            # Arrays are copied since forming bar is updated in place
+            future: Future = executor.submit(
+                self._calculate_stream,
+                self._version,
+                self.stream.clone(),
+                [array.copy() for array in arrays]
+            )
+            future.add_done_callback(partial(self._check_future, self._version))
+
+        self.refresh()
+
+    def prepend(self, count: int, arrays: List[np.ndarray], fingerprint: tuple) -> None:
+        """
+        Calculate values of count older bars inserted, then refresh items.
+        """
+        if self.calculating:
+            self.calculate(arrays, fingerprint)
+            return
+
+        if not self.stream.prepend(count, *arrays):
+            self.calculate(arrays, fingerprint)
+            return
+
+        self.fingerprint = fingerprint
+        self.refresh()
+
+    def sync(self, start: int, arrays: List[np.ndarray], fingerprint: tuple, source: "IndicatorItem") -> None:
+        """
+        Update values of bars changed from index start on.
+
+        Items other than source are refreshed, while source only drops
+        drawing of bars changed and is refreshed by its chart.
+        """
+        self.fingerprint = fingerprint
+        count: int = len(arrays[0])
+
+        sync_time: float = perf_counter() if monitor.enabled else 0
+
+        # Bars after the ones copied for calculation are replayed when it is done
+        if self.calculating:
+            if start < self._calculating_count - 1:
+                self.calculate(arrays, fingerprint)
+            return
+
+        current: int = len(self.stream.values)
+        start = min(start, current)
+
+        if current and start >= current - 1 and current <= count <= start + self.replay_count:
+            for ix in range(start, count):
+                self.stream.update(ix, *[float(array[ix]) for array in arrays])
+        elif start <= self.stream.warmup:
+            self.calculate(arrays, fingerprint)
+            return
+        elif not self.stream.recalculate(start, *arrays):
+            self.calculate(arrays, fingerprint)
+            return
+
+        if sync_time:
+            monitor.observe("indicator_sync_seconds", perf_counter() - sync_time, type(self.stream).__name__)
+
+        self.refresh(start, source)
+
+    def refresh(self, start: int = 0, source: "IndicatorItem" = None) -> None:
+        """
+        Refresh items bound with values changed from index start on.
+        """
+        for item in self.items:
+            if item is source:
+                item.invalidate(start)
+            else:
+                item.refresh(start)
+
+    def _calculate_stream(self, version: int, stream: StreamIndicator, arrays: List[np.ndarray]) -> None:
+        """
+        Calculate values in worker thread, then send stream back.
+        """
+        calculate_time: float = perf_counter()
+        stream.update_history(*arrays)
+        monitor.observe("indicator_calculate_seconds", perf_counter() - calculate_time, type(stream).__name__)
+
+        self.signal_stream.emit(version, stream)
+
+    def _check_future(self, version: int, future: Future) -> None:
+        """
+        Send exception of calculation back, called in worker thread when done.
+        """
+        if future.cancelled():
+            return
+
+        error: Optional[BaseException] = future.exception()
+        if error:
+            self.signal_error.emit(version, error)
+
+    def _process_error(self, version: int, error: BaseException) -> None:
+        """"""
+        if version != self._version:
+            return
+        self.calculating = False
+        self._failed_fingerprint = self.fingerprint
+
+        logger.bind(gateway_name=APP_NAME).opt(exception=error).error(f"{self.key}指标计算失败：{error}")
+
+    def _process_stream(self, version: int, stream: StreamIndicator) -> None:
+        """"""
+        if version != self._version or not self.items:
+            return
+        self.calculating = False
+        self._failed_fingerprint = ()
+
+        # Last bar calculated may be revised after it was copied
+        arrays: List[np.ndarray] = self.items[0].get_input_arrays()
+        for ix in range(len(stream.values) - 1, len(arrays[0])):
+            stream.update(ix, *[float(array[ix]) for array in arrays])
+
+        self.stream = stream
+
+        self.refresh()
+
+
+class IndicatorCache:
+    """
+    Process-wide cache of indicator streams, keyed by data and parameters.
+
+    Key is made of data key of bar manager, which is (vt_symbol, timeframe)
+    of chart, with stream class name and sorted parameters. Items of every
+    chart with the same key share one stream, which is counted by items
+    bound and removed once the last of them is released.
+
+    Charts with the same data key should be fed the same bars.
+    """
+
+    def __init__(self) -> None:
+        """"""
+        self.streams: Dict[tuple, SharedStream] = {}
+
+    def acquire(self, key: tuple, item: "IndicatorItem") -> SharedStream:
+        """
+        Bind item to shared stream of key, created if not cached yet.
+        """
+        shared: Optional[SharedStream] = self.streams.get(key, None)
+
+        if not shared:
+            shared = SharedStream(key, item.stream_class(**item.params))
+            self.streams[key] = shared
+
+        shared.items.append(item)
+        return shared
+
+    def release(self, key: tuple, item: "IndicatorItem") -> None:
+        """
+        Unbind item from shared stream of key, removed if no item is left.
+        """
+        shared: Optional[SharedStream] = self.streams.get(key, None)
+        if not shared or item not in shared.items:
+            return
+
+        shared.items.remove(item)
+
+        if not shared.items:
+            self.streams.pop(key)
+
+    def get_count(self) -> int:
+        """"""
+        return len(self.streams)
+
+
+indicator_cache: IndicatorCache = IndicatorCache()
@@ -0,0 +1,156 @@
+from datetime import datetime
+from time import perf_counter, time
+from typing import Optional, Set, Tuple, Type
+
+import pyqtgraph as pg
+
+from vnpy.chart import ChartWidget as BaseChartWidget
+from vnpy.chart.item import ChartItem
+from vnpy.trader.ui import QtGui, QtWidgets
+from vnpy.trader.object import BarData
+
+from .manager import BarManager
+from ..monitor import monitor
+from ..store import BarColumns
+
+
+class ChartWidget(BaseChartWidget):
+    """
+    Chart widget which can be updated in background.
+
+    Bars fed in background only update bar data and indicator state,
+    drawing is left to one catch up pass when the chart is shown.
+    """
+
+    def __init__(self, parent: QtWidgets.QWidget = None) -> None:
+        """"""
+        super().__init__(parent)
+
+        # Replaced before any plot or item refers to it
+        self._manager: BarManager = BarManager()
+
+        self._stale: bool = False
+
+        # Receive time and timestamp of the first data not painted yet
+        self._pending_time: Optional[Tuple[float, datetime]] = None
+
+    def add_item(
+        self,
+        item_class: Type[ChartItem],
+        item_name: str,
+        plot_name: str,
+        params: Optional[dict] = None
+    ) -> None:
+        """
+        Add chart item, with parameters passed to item class if given.
+        """
+        if params:
+            item: ChartItem = item_class(self._manager, **params)
+        else:
+            item: ChartItem = item_class(self._manager)
+
+        self._items[item_name] = item
+
+        plot: pg.PlotItem = self._plots.get(plot_name)
+        plot.addItem(item)
+
+        self._item_plot_map[item] = plot
+
+    def set_data_key(self, data_key: tuple) -> None:
+        """
+        Set identity of bars shown, items of charts with the same one share indicator values.
+        """
+        self._manager.data_key = data_key
+
+    def release(self) -> None:
+        """
+        Release resources shared with other charts before the chart is closed.
+        """
+        for item in self._items.values():
+            item.release()
+
+    def prepend_history(self, history: BarColumns) -> None:
+        """
+        Insert older bars before current ones, keeping the same bars in view.
+        """
+        count: int = self._manager.get_count()
+        self._manager.update_history(history)
+        count = self._manager.get_count() - count
+
+        for item in self._items.values():
+            item.prepend_history(count)
+
+        self._update_plot_limits()
+
+        self._right_ix += count
+        self._update_x_range()
+
+        if self._cursor:
+            self._cursor.update_info()
+
+    def feed_bar(self, bar: BarData, fields: Optional[Set[str]] = None) -> None:
+        """
+        Update single bar data without redrawing.
+
+        If names of fields changed are given, only items with any of them
+        in input_fields are updated.
+        """
+        self._manager.update_bar(bar)
+
+        for item in self._items.values():
+            if fields is not None and fields.isdisjoint(getattr(item, "input_fields", fields)):
+                continue
+            item.feed_bar(bar)
+
+        self._stale = True
+
+    def catch_up(self) -> None:
+        """
+        Redraw once with all bars fed since last drawing.
+        """
+        if not self._stale:
+            return
+        self._stale = False
+
+        for item in self._items.values():
+            item.update()
+
+        self._update_plot_limits()
+
+        if self._right_ix >= (self._manager.get_count() - self._bar_count / 2):
+            self.move_to_right()
+
+    def show_recent(self, count: int) -> None:
+        """
+        Show the most recent count bars.
+        """
+        self._bar_count = max(min(count, self._manager.get_count()), self.MIN_BAR_COUNT)
+        self.move_to_right()
+
+    def get_bar_count(self) -> int:
+        """
+        Get number of bars in view.
+        """
+        return self._bar_count
+
+    def set_pending_time(self, receive_time: float, dt: datetime) -> None:
+        """
+        Set times of the first data not painted yet, latency is observed at next paint.
+        """
+        if not self._pending_time:
+            self._pending_time = (receive_time, dt)
+
+    def paintEvent(self, event: QtGui.QPaintEvent) -> None:
+        """"""
+        super().paintEvent(event)
+
+        if not self._pending_time:
+            return
+        receive_time, dt = self._pending_time
+        self._pending_time = None
+
+        vt_symbol: str = self._manager.data_key[0] if self._manager.data_key else ""
+        monitor.observe("frame_latency_seconds", perf_counter() - receive_time, vt_symbol)
+
+        # Clock of data source may be ahead of local one
+        monitor.observe("tick_to_paint_seconds", max(time() - dt.timestamp(), 0), vt_symbol)
@@ -0,0 +1,211 @@
+from copy import deepcopy
+from typing import Any, Dict, List, Optional, Type
+
+from vnpy.chart.item import ChartItem
+from vnpy.trader.logger import logger
+from vnpy.trader.utility import load_json
+
+from ..engine import APP_NAME
+from .bar_item import CandleItem, VolumeItem
+from .chart import ChartWidget
+from .rsi_item import RsiItem
+from .sma_item import SmaItem
+from .vqi_item import VqiItem
+
+
+# Extra layouts defined by user, merged into default ones by name
+LAYOUT_FILENAME = "chart_wizard_layout.json"
+
+# Item classes which can be used in layouts, by type name
+ITEM_CLASSES: Dict[str, Type[ChartItem]] = {}
+
+# Options of plot passed to ChartWidget.add_plot
+PLOT_OPTIONS = ("minimum_height", "maximum_height", "hide_x_axis")
+
+DEFAULT_LAYOUT: dict = {
+    "plots": [
+        {
+            "name": "candle",
+            "hide_x_axis": True,
+            "items": [
+                {"type": "candle"},
+                {"type": "sma", "params": {"window": 20}},
+            ]
+        },
+        {
+            "name": "volume",
+            "maximum_height": 200,
+            "items": [{"type": "volume"}]
+        },
+        {
+            "name": "rsi",
+            "maximum_height": 150,
+            "items": [{"type": "rsi", "params": {"window": 14}}]
+        },
+        {
+            "name": "vqi",
+            "maximum_height": 150,
+            "items": [{"type": "vqi"}]
+        },
+    ]
+}
+
+SIMPLE_LAYOUT: dict = {
+    "plots": [
+        {
+            "name": "candle",
+            "hide_x_axis": True,
+            "items": [{"type": "candle"}]
+        },
+        {
+            "name": "volume",
+            "maximum_height": 200,
+            "items": [{"type": "volume"}]
+        },
+    ]
+}
+
+DEFAULT_LAYOUTS: Dict[str, dict] = {
+    "默认": DEFAULT_LAYOUT,
+    "简洁": SIMPLE_LAYOUT,
+}
+
+
+def register_item(type_name: str, item_class: Type[ChartItem]) -> None:
+    """
+    Register item class to be used in layouts.
+
+    Indicator items declare input_fields and default_params, parameters
+    of item in layout are merged into default ones.
+    """
+    ITEM_CLASSES[type_name] = item_class
+
+
+def load_layouts() -> Dict[str, dict]:
+    """
+    Load default layouts and ones defined in layout file.
+
+    Items of unknown type or with bad parameters in layout file are
+    skipped with log, as well as layouts without any valid plot.
+    """
+    layouts: Dict[str, dict] = deepcopy(DEFAULT_LAYOUTS)
+
+    for name, layout in load_json(LAYOUT_FILENAME).items():
+        checked: Optional[dict] = check_layout(name, layout)
+        if checked:
+            layouts[name] = checked
+
+    return layouts
+
+
+def check_layout(name: str, layout: Any) -> Optional[dict]:
+    """
+    Get layout with only valid plots and items, return None if no plot is left.
+    """
+    if not isinstance(layout, dict) or not isinstance(layout.get("plots", None), list):
+        write_log(f"布局{name}缺少plots列表，已忽略")
+        return None
+
+    plots: List[dict] = []
+    for plot_setting in layout["plots"]:
+        if (
+            not isinstance(plot_setting, dict)
+            or not isinstance(plot_setting.get("name", None), str)
+            or not isinstance(plot_setting.get("items", None), list)
+        ):
+            write_log(f"布局{name}的图表区域缺少name或items：{plot_setting}，已忽略")
+            continue
+
+        items: List[dict] = [
+            item_setting for item_setting in plot_setting["items"]
+            if check_item(name, item_setting)
+        ]
+        if items:
+            plots.append({**plot_setting, "items": items})
+
+    if not plots:
+        write_log(f"布局{name}没有可用的图表区域，已忽略")
+        return None
+
+    return {**layout, "plots": plots}
+
+
+def check_item(name: str, item_setting: Any) -> bool:
+    """
+    Check type and parameters of item in layout.
+
+    Parameters must be declared in default_params of item class, with
+    value of the same type as default one.
+    """
+    if not isinstance(item_setting, dict) or item_setting.get("type", None) not in ITEM_CLASSES:
+        write_log(f"布局{name}中的图形类型未知：{item_setting}，已忽略")
+        return False
+
+    params: Any = item_setting.get("params", None) or {}
+    if not isinstance(params, dict):
+        write_log(f"布局{name}中的图形参数不是字典：{item_setting}，已忽略")
+        return False
+
+    default_params: Dict[str, Any] = getattr(ITEM_CLASSES[item_setting["type"]], "default_params", {})
+
+    for key, value in params.items():
+        if key not in default_params:
+            write_log(f"布局{name}中的图形参数{key}未知：{item_setting}，已忽略")
+            return False
+
+        default: Any = default_params[key]
+        if isinstance(default, float):
+            valid: bool = isinstance(value, (int, float))
+        else:
+            valid = isinstance(value, type(default))
+
+        if isinstance(value, bool) and not isinstance(default, bool):
+            valid = False
+
+        if not valid:
+            write_log(f"布局{name}中的图形参数{key}类型错误：{item_setting}，已忽略")
+            return False
+
+    return True
+
+
+def write_log(msg: str) -> None:
+    """"""
+    logger.bind(gateway_name=APP_NAME).warning(msg)
+
+
+def build_chart(layout: dict, cursor: bool = True) -> ChartWidget:
+    """
+    Create chart with plots and items of layout.
+
+    Only items in layout are created, item name is its type unless given.
+    Cursor is not added for chart not operated by user.
+    """
+    chart: ChartWidget = ChartWidget()
+
+    for plot_setting in layout["plots"]:
+        plot_name: str = plot_setting["name"]
+        options: dict = {k: v for k, v in plot_setting.items() if k in PLOT_OPTIONS}
+        chart.add_plot(plot_name, **options)
+
+        for item_setting in plot_setting["items"]:
+            type_name: str = item_setting["type"]
+            item_name: str = item_setting.get("name", type_name)
+
+            chart.add_item(
+                ITEM_CLASSES[type_name],
+                item_name,
+                plot_name,
+                item_setting.get("params", None)
+            )
+
+    if cursor:
+        chart.add_cursor()
+    return chart
+
+
+register_item("candle", CandleItem)
+register_item("volume", VolumeItem)
+register_item("sma", SmaItem)
+register_item("rsi", RsiItem)
+register_item("vqi", VqiItem)
@@ -0,0 +1,208 @@
+from collections import deque
+from datetime import datetime
+from typing import Deque, List, Optional, Tuple, Union
+
+import numpy as np
+
+from vnpy.chart.base import to_int
+from vnpy.chart.manager import BarManager as BaseBarManager
+from vnpy.trader.object import BarData
+
+from ..store import BarColumns
+
+
+# Number of recent changes kept, items further behind recalculate all values
+CHANGE_LOG_SIZE = 64
+
+
+class BarManager(BaseBarManager):
+    """
+    Bar manager with data stored in columns instead of bar objects.
+
+    Bar objects are only created when requested by index, items should read
+    arrays of fields with get_array for drawing and calculation.
+
+    Every change increases version and logs the first index changed, so
+    that items can tell with get_dirty_index which bars changed since the
+    version they last saw, and recalculate only from there.
+    """
+
+    def __init__(self) -> None:
+        """"""
+        super().__init__()
+
+        self._columns: Optional[BarColumns] = None
+
+        # Identity of bars shown, such as (vt_symbol, timeframe), used to share indicator values
+        self.data_key: tuple = ()
+
+        self.version: int = 0
+        self._changes: Deque[Tuple[int, int]] = deque(maxlen=CHANGE_LOG_SIZE)
+
+    def update_history(self, history: Union[BarColumns, List[BarData]]) -> None:
+        """
+        Update columns or list of bar data.
+        """
+        if not isinstance(history, BarColumns):
+            if not history:
+                return
+
+            bar: BarData = history[0]
+            history = BarColumns.from_bars(bar.vt_symbol, bar.interval, history)
+        elif not len(history):
+            return
+
+        if self._columns is None:
+            self._columns = BarColumns(history.vt_symbol, history.interval, history.tz, history.gateway_name)
+
+        self._columns.update_history(history)
+
+        # Bars from the first one of history on are changed or shifted
+        start_ts: float = history.get_array("datetime")[0]
+        ix: int = int(np.searchsorted(self._columns.get_array("datetime"), start_ts, side="left"))
+        self._change(ix)
+
+    def update_bar(self, bar: BarData) -> None:
+        """"""
+        if self._columns is None:
+            self._columns = BarColumns(bar.vt_symbol, bar.interval, bar.datetime.tzinfo, bar.gateway_name)
+
+        ix: int = self._columns.update_bar(bar)
+        self._change(ix)
+
+    def get_dirty_index(self, version: int) -> Optional[int]:
+        """
+        Get first index of bars changed since version, None if no change.
+        """
+        if version == self.version:
+            return None
+
+        # Versions not in log any more are treated as all bars changed
+        if not self._changes or self._changes[0][0] > version + 1:
+            return 0
+
+        start: int = self.get_count()
+        for change_version, ix in reversed(self._changes):
+            if change_version <= version:
+                break
+            start = min(start, ix)
+
+        return start
+
+    def get_columns(self) -> Optional[BarColumns]:
+        """"""
+        return self._columns
+
+    def get_array(self, field: str) -> np.ndarray:
+        """
+        Get array of one bar field, which is invalid after bar updated.
+        """
+        if self._columns is None:
+            return np.empty(0)
+
+        return self._columns.get_array(field)
+
+    def get_count(self) -> int:
+        """"""
+        if self._columns is None:
+            return 0
+
+        return len(self._columns)
+
+    def get_index(self, dt: datetime) -> Optional[int]:
+        """"""
+        if self._columns is None:
+            return None
+
+        return self._columns.get_index(dt)
+
+    def get_datetime(self, ix: float) -> Optional[datetime]:
+        """"""
+        if self._columns is None:
+            return None
+
+        return self._columns.get_datetime(to_int(ix))
+
+    def get_bar(self, ix: float) -> Optional[BarData]:
+        """"""
+        if self._columns is None:
+            return None
+
+        return self._columns.get_bar(to_int(ix))
+
+    def get_fingerprint(self) -> tuple:
+        """
+        Get count, first and last datetime of bars, to tell whether values calculated are still valid.
+        """
+        count: int = self.get_count()
+        if not count:
+            return (0,)
+
+        dt_array: np.ndarray = self._columns.get_array("datetime")
+        return count, float(dt_array[0]), float(dt_array[-1])
+
+    def get_all_bars(self) -> List[BarData]:
+        """
+        Create bar objects of all data, avoid calling with large history.
+        """
+        return [self._columns.get_bar(ix) for ix in range(self.get_count())]
+
+    def get_price_range(self, min_ix: float = None, max_ix: float = None) -> Tuple[float, float]:
+        """"""
+        min_ix, max_ix = self._get_ix_range(min_ix, max_ix)
+        if min_ix > max_ix:
+            return 0, 1
+
+        buf: Optional[Tuple[float, float]] = self._price_ranges.get((min_ix, max_ix), None)
+        if buf:
+            return buf
+
+        min_price: float = float(self.get_array("low_price")[min_ix:max_ix + 1].min())
+        max_price: float = float(self.get_array("high_price")[min_ix:max_ix + 1].max())
+
+        self._price_ranges[(min_ix, max_ix)] = (min_price, max_price)
+        return min_price, max_price
+
+    def get_volume_range(self, min_ix: float = None, max_ix: float = None) -> Tuple[float, float]:
+        """"""
+        min_ix, max_ix = self._get_ix_range(min_ix, max_ix)
+        if min_ix > max_ix:
+            return 0, 1
+
+        buf: Optional[Tuple[float, float]] = self._volume_ranges.get((min_ix, max_ix), None)
+        if buf:
+            return buf
+
+        max_volume: float = float(self.get_array("volume")[min_ix:max_ix + 1].max())
+
+        self._volume_ranges[(min_ix, max_ix)] = (0, max_volume)
+        return 0, max_volume
+
+    def _get_ix_range(self, min_ix: Optional[float], max_ix: Optional[float]) -> Tuple[int, int]:
+        """
+        Get index range clamped to existing bars, with max_ix included.
+        """
+        count: int = self.get_count()
+
+        if min_ix is None or max_ix is None:
+            return 0, count - 1
+
+        min_ix = max(to_int(min_ix), 0)
+        max_ix = min(to_int(max_ix), count - 1)
+        return min_ix, max_ix
+
+    def clear_all(self) -> None:
+        """"""
+        if self._columns is not None:
+            self._columns.clear()
+
+        self._change(0)
+
+    def _change(self, ix: int) -> None:
+        """
+        Log bars changed from index ix on.
+        """
+        self.version += 1
+        self._changes.append((self.version, ix))
+
+        self._clear_cache()
@@ -0,0 +1,123 @@
+from typing import Dict, List
+
+from vnpy.trader.ui import QtWidgets, QtCore, QtGui
+
+from ..monitor import PerfMonitor
+
+
+# Histograms shown in panel, with scale and unit of values
+PANEL_METRICS: Dict[str, tuple] = {
+    "tick_handle_seconds": (1e6, "us"),
+    "spread_handle_seconds": (1e6, "us"),
+    "flush_seconds": (1e6, "us"),
+    "frame_latency_seconds": (1e3, "ms"),
+    "tick_to_paint_seconds": (1e3, "ms"),
+    "history_handle_seconds": (1e3, "ms"),
+    "history_query_seconds": (1e3, "ms"),
+    "history_wait_seconds": (1e3, "ms"),
+    "indicator_sync_seconds": (1e6, "us"),
+    "indicator_calculate_seconds": (1e3, "ms"),
+    "draw_block_seconds": (1e6, "us"),
+}
+
+
+class MonitorPanel(QtWidgets.QWidget):
+    """性能监控面板"""
+
+    refresh_interval: int = 1000
+
+    def __init__(self, monitor: PerfMonitor) -> None:
+        """构造函数"""
+        super().__init__()
+
+        self.monitor: PerfMonitor = monitor
+
+        self.init_ui()
+
+        self.timer: QtCore.QTimer = QtCore.QTimer()
+        self.timer.timeout.connect(self.refresh)
+
+    def init_ui(self) -> None:
+        """初始化界面"""
+        self.text: QtWidgets.QPlainTextEdit = QtWidgets.QPlainTextEdit()
+        self.text.setReadOnly(True)
+        self.text.setFont(QtGui.QFontDatabase.systemFont(QtGui.QFontDatabase.SystemFont.FixedFont))
+        self.text.setMaximumHeight(200)
+
+        reset_button: QtWidgets.QPushButton = QtWidgets.QPushButton("清空")
+        reset_button.clicked.connect(self.reset)
+
+        export_button: QtWidgets.QPushButton = QtWidgets.QPushButton("导出")
+        export_button.clicked.connect(self.export)
+
+        vbox: QtWidgets.QVBoxLayout = QtWidgets.QVBoxLayout()
+        vbox.addWidget(reset_button)
+        vbox.addWidget(export_button)
+        vbox.addStretch()
+
+        hbox: QtWidgets.QHBoxLayout = QtWidgets.QHBoxLayout()
+        hbox.setContentsMargins(0, 0, 0, 0)
+        hbox.addWidget(self.text)
+        hbox.addLayout(vbox)
+
+        self.setLayout(hbox)
+
+    def set_active(self, active: bool) -> None:
+        """开关性能监控并显示面板"""
+        self.monitor.set_enabled(active)
+        self.setVisible(active)
+
+        if active:
+            self.monitor.get_rates("events_total")
+            self.timer.start(self.refresh_interval)
+        else:
+            self.timer.stop()
+
+    def refresh(self) -> None:
+        """刷新监控数据"""
+        lines: List[str] = []
+
+        rates: Dict[str, float] = self.monitor.get_rates("events_total")
+        if rates:
+            lines.append("事件频率  " + "  ".join(f"{symbol} {rate:.0f}/s" for symbol, rate in sorted(rates.items())))
+
+        histograms: Dict[str, dict] = self.monitor.to_dict()["histograms"]
+
+        for name, (scale, unit) in PANEL_METRICS.items():
+            for label, data in sorted(histograms.get(name, {}).items()):
+                mean: float = data["sum"] / data["count"] if data["count"] else 0
+
+                lines.append(
+                    f"{name:<28}{label:<20}"
+                    f"count {data['count']:<8}"
+                    f"mean {mean * scale:>9.1f}{unit}  "
+                    f"p50 {data['p50'] * scale:>9.1f}{unit}  "
+                    f"p99 {data['p99'] * scale:>9.1f}{unit}  "
+                    f"max {data['max'] * scale:>9.1f}{unit}"
+                )
+
+        self.text.setPlainText("\n".join(lines))
+
+    def reset(self) -> None:
+        """清空监控数据"""
+        self.monitor.reset()
+        self.refresh()
+
+    def export(self) -> None:
+        """导出监控数据"""
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(
+            self,
+            "导出性能数据",
+            "",
+            "JSON(*.json);;Prometheus(*.prom)"
+        )
+        if not path:
+            return
+
+        if path.endswith(".prom"):
+            content: str = self.monitor.to_prometheus()
+        else:
+            content: str = self.monitor.to_json()
+
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
@@ -1,138 +1,92 @@
-from typing import Dict, Tuple, List
+from typing import Tuple, List
 import numpy as np
-import talib
 import pyqtgraph as pg
 
-from vnpy.chart.item import ChartItem
 from vnpy.trader.ui import QtCore, QtGui
-from vnpy.trader.object import BarData
-from vnpy.chart.manager import BarManager
+
+from .base import IndicatorItem
+from .manager import BarManager
+from ..indicator import VqiStream
+from ..lod import LOD_FACTOR
 
 # Volatility Quality Index indicator
 
-class VqiItem(ChartItem):
+class VqiItem(IndicatorItem):
     """"""
 
-    def __init__(self, manager: BarManager):
+    input_fields = ("open_price", "high_price", "low_price", "close_price")
+    stream_class = VqiStream
+    default_params = {
+        "period": 5,        # LWMA
+        "smoothing": 2,
+        "filter": 1.0,
+        "currency_point": 1.0
+    }
+
+    def __init__(self, manager: BarManager, **params):
         """"""
-        super().__init__(manager)
+        super().__init__(manager, **params)
 
         self.aqua_pen: QtGui.QPen     = pg.mkPen(color=(0, 255, 255), width=1)
         self.red_pen: QtGui.QPen      = pg.mkPen(color=(255, 0, 0), width=1)
-        self.fill_color: QtGui.QColor = pg.mkColor(0, 0, 0, 255)
 
-        self.currency_point = 1
-        self.vqi_ma_method  = 3 # 3 = MODE_LWMA
-        self.vqi_period     = 5
-        self.vqi_smoothing  = 2
-        self.vqi_filter     = 1
-        self.vqi_data: Dict[int, float] = {}
-        self.vqi_start      = self.vqi_smoothing + self.vqi_period + 3
+        self.currency_point = self.params["currency_point"]
+        self.vqi_ma_method  = 3  # 3 = MODE_LWMA of MQL, calculated by talib.WMA
+        self.vqi_period     = self.params["period"]
+        self.vqi_smoothing  = self.params["smoothing"]
+        self.vqi_filter     = self.params["filter"]
+        self.vqi_start      = self.stream.start
 
     def get_vqi_value(self, ix: int) -> float:
         """"""
         # Return default value when no enough MA and smoothing data
-        if ix < self.vqi_start:
+        if ix < self.vqi_start or ix >= len(self.stream.values):
             return 0
 
-        # When initialize, calculate all vqi value
-        if not self.vqi_data:
-            base_ix = 0
-            bars = self._manager.get_all_bars()
-            open_data  = [bar.open_price  for bar in bars]
-            high_data  = [bar.high_price  for bar in bars]
-            low_data   = [bar.low_price   for bar in bars]
-            close_data = [bar.close_price for bar in bars]
-            # initialize VQ with 0
-            self.vqi_data = {n: 0.0 for n in range(len(bars))}
-            self.caculate_vqi(open_data, high_data, low_data, close_data, base_ix)
-
-        # Calculate new value
-        # and Recalculate current bar
-        max_key = max(self.vqi_data.keys())
-        if ix not in self.vqi_data or ix == max_key:
-            open_data = []
-            high_data = []
-            low_data = []
-            close_data = []
-            # -1 for update previous fixed bar
-            base_ix = ix - self.vqi_start - 1
-            for n in range(base_ix, ix + 1):
-                bar = self._manager.get_bar(n)
-                open_data.append(bar.open_price)
-                high_data.append(bar.high_price)
-                low_data.append(bar.low_price)
-                close_data.append(bar.close_price)
-            self.caculate_vqi(open_data, high_data, low_data, close_data, base_ix)
-
-        if ix in self.vqi_data:
-            return self.vqi_data[ix]
-
-
-    def caculate_vqi(self, open_data: list, high_data: list, low_data: list, close_data: list, base_ix: int = 0):
-        """"""
-        maO_array = talib.MA(np.array(open_data),  timeperiod=self.vqi_period, matype=self.vqi_ma_method)
-        maH_array = talib.MA(np.array(high_data),  timeperiod=self.vqi_period, matype=self.vqi_ma_method)
-        maL_array = talib.MA(np.array(low_data),   timeperiod=self.vqi_period, matype=self.vqi_ma_method)
-        maC_array = talib.MA(np.array(close_data), timeperiod=self.vqi_period, matype=self.vqi_ma_method)
-
-        count = len(maO_array)
-        # loop index [start, total - 1]
-        for i in range(self.vqi_start, count):
-            # calculate VQI
-            o = maO_array[i]
-            h = maH_array[i]
-            l = maL_array[i]
-            c = maC_array[i]
-            c2 = maC_array[i - self.vqi_smoothing]
-            max_p = max(h - l, max(h - c2, c2 - l))
-            if (max_p != 0 and (h - l) != 0):
-                VQ = abs(((c-c2)/max_p+(c-o)/(h-l))*0.5)*((c-c2+(c-o))*0.5)
-                self.vqi_data[base_ix+i] = self.vqi_data[base_ix+i-1] if abs(VQ) < self.vqi_filter * self.currency_point else VQ
-
-
-    def _draw_bar_picture(self, ix: int, bar: BarData) -> QtGui.QPicture:
-        """"""
-        vqi_value = self.get_vqi_value(ix)
-
-        # Create objects
-        picture = QtGui.QPicture()
-        painter = QtGui.QPainter(picture)
+        return self.stream.values.get(ix)
 
-        rgb = min(255, int(50 * abs(vqi_value)))
-        if vqi_value > 0:
-            painter.setPen(self.red_pen)
-            self.fill_color.setRgb(rgb, 0, 0)
-        else:
-            painter.setPen(self.aqua_pen)
-            self.fill_color.setRgb(0, rgb, rgb)
-
-        # Draw VQI rectangle
-        rect = QtCore.QRectF(
-            ix - 0.4, # 0.4 = 0.8(width) / 2
-            50,       # 50% of y_range
-            0.8,      # width
-            20        # 20% of y_range
-        )
-        painter.fillRect(rect, self.fill_color)
-        painter.drawRect(rect)
+    def _draw_block(self, painter: QtGui.QPainter, start: int, end: int) -> None:
+        """"""
+        vqi_array = self.stream.values[start:end]
+        self._draw_rects(painter, np.arange(start, start + len(vqi_array)), vqi_array, 0.8)
 
-        # Finish
-        painter.end()
-        return picture
+    def _draw_lod_block(self, painter: QtGui.QPainter, level: int, start: int, end: int) -> None:
+        """"""
+        # Value of each group is its min or max, whichever is further from zero
+        values = self.stream.values.array
+        first_array, last_array, min_array, max_array = self._get_groups(level, start, end, values, values)
+        vqi_array = np.where(np.abs(max_array) >= np.abs(min_array), max_array, min_array)
 
+        self._draw_rects(painter, (first_array + last_array) / 2, vqi_array, 0.8 * LOD_FACTOR ** level)
 
-    def boundingRect(self) -> QtCore.QRectF:
+    def _draw_rects(self, painter: QtGui.QPainter, ix_array: np.ndarray, vqi_array: np.ndarray, width: float) -> None:
         """"""
-        # min_price, max_price = self._manager.get_price_range()
-        rect = QtCore.QRectF(
-            0,
-            0,
-            len(self._bar_picutures),
-            100
-        )
-        return rect
-
+        vqi_array = np.nan_to_num(vqi_array)
+
+        # Color bucket: brightness of fill color, offset by 256 when positive
+        rgb_array = np.minimum(255, (50 * np.abs(vqi_array)).astype(int))
+        buckets = rgb_array + 256 * (vqi_array > 0)
+
+        for bucket in np.unique(buckets).tolist():
+            rgb = bucket % 256
+            if bucket >= 256:
+                painter.setPen(self.red_pen)
+                painter.setBrush(QtGui.QColor(rgb, 0, 0))
+            else:
+                painter.setPen(self.aqua_pen)
+                painter.setBrush(QtGui.QColor(0, rgb, rgb))
+
+            # Draw VQI rectangles
+            rects: List[QtCore.QRectF] = [
+                QtCore.QRectF(
+                    ix - width / 2,
+                    50,       # 50% of y_range
+                    width,
+                    20        # 20% of y_range
+                )
+                for ix in ix_array[buckets == bucket].tolist()
+            ]
+            painter.drawRects(rects)
 
     def get_y_range( self, min_ix: int = None, max_ix: int = None) -> Tuple[float, float]:
         """  """
@@ -141,10 +95,9 @@ class VqiItem(ChartItem):
 
     def get_info_text(self, ix: int) -> str:
         """"""
-        if ix in self.vqi_data:
-            rsi_value = self.vqi_data[ix]
-            text = f"VQI {rsi_value:.1f}"
-            # print(text)
+        vqi_value = self.stream.values.get(ix)
+        if not np.isnan(vqi_value):
+            text = f"VQI {vqi_value:.1f}"
         else:
             text = "VQI -"
 
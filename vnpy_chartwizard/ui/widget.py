@@ -1,24 +1,32 @@
-from copy import copy
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set, Tuple
 from datetime import datetime, timedelta
+from time import perf_counter
 from tzlocal import get_localzone_name
 
 from vnpy.event import EventEngine, Event
-from vnpy.chart import ChartWidget, CandleItem, VolumeItem
 from vnpy.trader.engine import MainEngine
-from vnpy.trader.ui import QtWidgets, QtCore
+from vnpy.trader.ui import QtWidgets, QtCore, QtGui
 from vnpy.trader.event import EVENT_TICK
 from vnpy.trader.object import ContractData, TickData, BarData, SubscribeRequest
-from vnpy.trader.utility import BarGenerator, ZoneInfo
-from vnpy.trader.constant import Interval, Exchange
+from vnpy.trader.utility import ZoneInfo, extract_vt_symbol, load_json, save_json
+from vnpy.trader.constant import Interval
 from vnpy_spreadtrading.base import SpreadItem, EVENT_SPREAD_DATA
 
-from .rsi_item import RsiItem
-from .sma_item import SmaItem
-from .vqi_item import VqiItem
+from .chart import ChartWidget
+from .layout import DEFAULT_LAYOUT, build_chart, load_layouts
+from .monitor_panel import MonitorPanel
+from ..generator import ChartBarGenerator, SpreadBarGenerator
+from ..monitor import monitor
+from ..recorder import TickRecorder, get_record_path
+from ..store import BarColumns
+from ..resample import TIMEFRAMES, resample_bars, resample_bar
 from ..engine import APP_NAME, EVENT_CHART_HISTORY, ChartWizardEngine
 
 
+# Charts open when closed, restored at next start
+WORKSPACE_FILENAME = "chart_wizard_workspace.json"
+
+
 class ChartWizardWidget(QtWidgets.QWidget):
     """K线图表控件"""
 
@@ -26,7 +34,18 @@ class ChartWizardWidget(QtWidgets.QWidget):
     signal_spread: QtCore.Signal = QtCore.Signal(Event)
     signal_history: QtCore.Signal = QtCore.Signal(Event)
 
-    def __init__(self, main_engine: MainEngine, event_engine: EventEngine) -> None:
+    update_fps: int = 30
+    history_days: int = 5
+
+    # Milliseconds between attempts to load one restored chart in background
+    idle_interval: int = 1000
+
+    def __init__(
+        self,
+        main_engine: MainEngine,
+        event_engine: EventEngine,
+        workspace_filename: str = WORKSPACE_FILENAME
+    ) -> None:
         """构造函数"""
         super().__init__()
 
@@ -34,11 +53,51 @@ class ChartWizardWidget(QtWidgets.QWidget):
         self.event_engine: EventEngine = event_engine
         self.chart_engine: ChartWizardEngine = main_engine.get_engine(APP_NAME)
 
-        self.bgs: Dict[str, BarGenerator] = {}
+        # Empty for not saving and restoring charts, such as in headless tools
+        self.workspace_filename: str = workspace_filename
+
+        self.bgs: Dict[str, ChartBarGenerator] = {}
+        self.spread_bgs: Dict[str, SpreadBarGenerator] = {}
         self.charts: Dict[str, ChartWidget] = {}
 
+        # 1-minute bars of each chart, resampled into timeframe shown
+        self.bases: Dict[str, BarColumns] = {}
+        self.timeframes: Dict[str, str] = {}
+
+        # Layout of each chart, by name in layouts
+        self.layouts: Dict[str, dict] = load_layouts()
+        self.chart_layouts: Dict[str, str] = {}
+
+        # Older history chunks waiting to be prepended, one per frame
+        self.history_chunks: Dict[str, List[BarColumns]] = {}
+
+        # Charts with new data not drawn yet
+        self.dirty_symbols: Set[str] = set()
+
+        # Receive time and timestamp of the first data of dirty charts, when monitored
+        self.dirty_times: Dict[str, Tuple[float, datetime]] = {}
+
+        # Events of each chart in current frame, added to monitor once per frame
+        self.event_counts: Dict[str, int] = {}
+
+        # Settings and placeholder tabs of restored charts not loaded yet
+        self.pending_charts: Dict[str, dict] = {}
+        self.placeholders: Dict[str, QtWidgets.QWidget] = {}
+
+        # Bars in view of restored charts, applied when history is loaded
+        self.bar_counts: Dict[str, int] = {}
+
+        # Recorder of events of charts, while recording is on
+        self.recorder: Optional[TickRecorder] = None
+
+        self.tick_count: int = 0
+        self.coalesced_count: int = 0
+        self.frame_count: int = 0
+
         self.init_ui()
         self.register_event()
+        self.init_timer()
+        self.restore_workspace()
 
     def init_ui(self) -> None:
         """初始化界面"""
@@ -48,39 +107,74 @@ class ChartWizardWidget(QtWidgets.QWidget):
 
         self.tab.setTabsClosable(True)
         self.tab.tabCloseRequested.connect(self.close_tab)
+        self.tab.currentChanged.connect(self.process_tab_changed)
 
         self.symbol_line: QtWidgets.QLineEdit = QtWidgets.QLineEdit("JP225.OTC")
 
         self.button: QtWidgets.QPushButton = QtWidgets.QPushButton("新建图表")
         self.button.clicked.connect(self.new_chart)
 
+        self.timeframe_combo: QtWidgets.QComboBox = QtWidgets.QComboBox()
+        self.timeframe_combo.addItems(list(TIMEFRAMES.keys()))
+        self.timeframe_combo.currentTextChanged.connect(self.change_timeframe)
+
+        self.layout_combo: QtWidgets.QComboBox = QtWidgets.QComboBox()
+        self.layout_combo.addItems(list(self.layouts.keys()))
+        self.layout_combo.currentTextChanged.connect(self.change_layout)
+
+        self.monitor_panel: MonitorPanel = MonitorPanel(monitor)
+        self.monitor_panel.setVisible(False)
+
+        self.monitor_check: QtWidgets.QCheckBox = QtWidgets.QCheckBox("性能监控")
+        self.monitor_check.toggled.connect(self.monitor_panel.set_active)
+
+        self.record_check: QtWidgets.QCheckBox = QtWidgets.QCheckBox("录制行情")
+        self.record_check.toggled.connect(self.set_recording)
+
         hbox: QtWidgets.QHBoxLayout = QtWidgets.QHBoxLayout()
         hbox.addWidget(QtWidgets.QLabel("本地代码"))
         hbox.addWidget(self.symbol_line)
         hbox.addWidget(self.button)
+        hbox.addWidget(QtWidgets.QLabel("K线周期"))
+        hbox.addWidget(self.timeframe_combo)
+        hbox.addWidget(QtWidgets.QLabel("图表布局"))
+        hbox.addWidget(self.layout_combo)
         hbox.addStretch()
+        hbox.addWidget(self.record_check)
+        hbox.addWidget(self.monitor_check)
 
         vbox: QtWidgets.QVBoxLayout = QtWidgets.QVBoxLayout()
         vbox.addLayout(hbox)
         vbox.addWidget(self.tab)
+        vbox.addWidget(self.monitor_panel)
 
         self.setLayout(vbox)
 
-    def create_chart(self) -> ChartWidget:
+    def init_timer(self) -> None:
+        """初始化刷新定时器"""
+        self.timer: QtCore.QTimer = QtCore.QTimer()
+        self.timer.timeout.connect(self.flush_charts)
+        self.set_update_fps(self.update_fps)
+
+        self.idle_timer: QtCore.QTimer = QtCore.QTimer()
+        self.idle_timer.timeout.connect(self.load_idle_chart)
+
+    def set_update_fps(self, fps: int) -> None:
+        """设置图表最大刷新帧率"""
+        self.update_fps = fps
+        self.timer.start(int(1000 / fps))
+
+    def get_update_stats(self) -> Dict[str, int]:
+        """获取刷新统计数据"""
+        return {
+            "tick_count": self.tick_count,
+            "coalesced_count": self.coalesced_count,
+            "frame_count": self.frame_count,
+        }
+
+    def create_chart(self, layout: dict = None) -> ChartWidget:
         """创建图表对象"""
-        chart: ChartWidget = ChartWidget()
-        chart.add_plot("candle", hide_x_axis=True)
-        chart.add_plot("volume", maximum_height=200)
-        chart.add_plot("rsi", maximum_height=150)
-        chart.add_plot("vqi", maximum_height=150)
-
-        chart.add_item(CandleItem, "candle", "candle")
-        chart.add_item(VolumeItem, "volume", "volume")
-        chart.add_item(SmaItem, "sma", "candle")
-        chart.add_item(RsiItem, "rsi", "rsi")
-        chart.add_item(VqiItem, "vqi", "vqi")
-        chart.add_cursor()
-        return chart
+        return build_chart(layout or DEFAULT_LAYOUT)
 
     def show(self) -> None:
         """最大化显示"""
@@ -91,8 +185,34 @@ class ChartWizardWidget(QtWidgets.QWidget):
         vt_symbol: str = self.tab.tabText(index)
 
         self.tab.removeTab(index)
-        self.charts.pop(vt_symbol)
-        self.bgs.pop(vt_symbol)
+
+        # Restored chart not loaded yet has nothing else to release
+        if vt_symbol in self.pending_charts:
+            self.pending_charts.pop(vt_symbol)
+            self.placeholders.pop(vt_symbol).deleteLater()
+            self.save_workspace()
+            return
+
+        self.charts.pop(vt_symbol).release()
+        bg: ChartBarGenerator = self.bgs.pop(vt_symbol)
+        if isinstance(bg, SpreadBarGenerator):
+            self.spread_bgs.pop(bg.spread_name)
+        self.bases.pop(vt_symbol)
+        self.timeframes.pop(vt_symbol)
+        self.chart_layouts.pop(vt_symbol)
+        self.history_chunks.pop(vt_symbol, None)
+        self.bar_counts.pop(vt_symbol, None)
+
+        self.dirty_symbols.discard(vt_symbol)
+        self.dirty_times.pop(vt_symbol, None)
+
+        self.event_engine.unregister(EVENT_TICK + vt_symbol, self.signal_tick.emit)
+        self.chart_engine.cancel_history(vt_symbol)
+
+        if self.recorder:
+            self.recorder.remove_symbol(vt_symbol)
+
+        self.save_workspace()
 
     def new_chart(self) -> None:
         """创建新的图表"""
@@ -101,25 +221,69 @@ class ChartWizardWidget(QtWidgets.QWidget):
         if not vt_symbol:
             return
 
+        self.add_chart(vt_symbol)
+
+    def add_chart(self, vt_symbol: str, end: Optional[datetime] = None) -> Optional[ChartWidget]:
+        """添加图表，并查询截止到end的历史数据"""
         if vt_symbol in self.charts:
-            return
+            return None
 
         if "LOCAL" not in vt_symbol:
             contract: Optional[ContractData] = self.main_engine.get_contract(vt_symbol)
             if not contract:
-                return
+                return None
+
+        # Restored chart is created with its own settings
+        setting: dict = self.pending_charts.pop(vt_symbol, {})
 
         # Create new chart
-        self.bgs[vt_symbol] = BarGenerator(self.on_bar)
+        if "LOCAL" in vt_symbol:
+            spread_name, _ = extract_vt_symbol(vt_symbol)
+            bg: SpreadBarGenerator = SpreadBarGenerator(self.on_bar, vt_symbol, spread_name)
+            self.spread_bgs[spread_name] = bg
+            self.bgs[vt_symbol] = bg
+        else:
+            self.bgs[vt_symbol] = ChartBarGenerator(self.on_bar)
+
+        self.event_engine.register(EVENT_TICK + vt_symbol, self.signal_tick.emit)
+
+        self.bases[vt_symbol] = BarColumns(vt_symbol, Interval.MINUTE)
+        self.timeframes[vt_symbol] = setting.get("timeframe", self.timeframe_combo.currentText())
+
+        layout_name: str = setting.get("layout", self.layout_combo.currentText())
+        self.chart_layouts[vt_symbol] = layout_name
+
+        if setting.get("bar_count", 0):
+            self.bar_counts[vt_symbol] = setting["bar_count"]
 
-        chart: ChartWidget = self.create_chart()
+        chart: ChartWidget = self.create_chart(self.layouts[layout_name])
+        chart.set_data_key((vt_symbol, self.timeframes[vt_symbol]))
         self.charts[vt_symbol] = chart
 
-        self.tab.addTab(chart, vt_symbol)
+        # Placeholder is replaced in the same tab, without changing current one
+        placeholder: Optional[QtWidgets.QWidget] = self.placeholders.pop(vt_symbol, None)
+        if placeholder:
+            index: int = self.tab.indexOf(placeholder)
+            current: int = self.tab.currentIndex()
+
+            self.tab.blockSignals(True)
+            self.tab.removeTab(index)
+            self.tab.insertTab(index, chart, vt_symbol)
+            self.tab.setCurrentIndex(current)
+            self.tab.blockSignals(False)
+
+            placeholder.deleteLater()
+        else:
+            self.tab.addTab(chart, vt_symbol)
+            self.save_workspace()
+
+        if self.recorder:
+            self.recorder.add_symbol(vt_symbol)
 
         # Query history data
-        end: datetime = datetime.now(ZoneInfo(get_localzone_name()))
-        start: datetime = end - timedelta(days=5)
+        if not end:
+            end = datetime.now(ZoneInfo(get_localzone_name()))
+        start: datetime = end - timedelta(days=self.history_days)
 
         self.chart_engine.query_history(
             vt_symbol,
@@ -128,41 +292,70 @@ class ChartWizardWidget(QtWidgets.QWidget):
             end
         )
 
+        return chart
+
     def register_event(self) -> None:
         """注册事件监听"""
         self.signal_tick.connect(self.process_tick_event)
         self.signal_history.connect(self.process_history_event)
         self.signal_spread.connect(self.process_spread_event)
 
+        # Ticks are registered by symbol of each chart opened
         self.event_engine.register(EVENT_CHART_HISTORY, self.signal_history.emit)
-        self.event_engine.register(EVENT_TICK, self.signal_tick.emit)
-        self.event_engine.register(EVENT_SPREAD_DATA, self.signal_spread.emit)
+        self.event_engine.register(EVENT_SPREAD_DATA, self.filter_spread_event)
+
+    def filter_spread_event(self, event: Event) -> None:
+        """过滤价差事件（事件引擎线程中调用）"""
+        # Only spreads with chart are queued into GUI thread
+        if event.data.name in self.spread_bgs:
+            self.signal_spread.emit(event)
 
     def process_tick_event(self, event: Event) -> None:
         """处理Tick事件"""
         tick: TickData = event.data
-        bg: Optional[BarGenerator] = self.bgs.get(tick.vt_symbol, None)
+        bg: Optional[ChartBarGenerator] = self.bgs.get(tick.vt_symbol, None)
 
         if bg:
+            # Timed once in sample interval of events
+            start_time: float = 0
+            if monitor.enabled and not self.tick_count % monitor.sample_interval:
+                start_time = perf_counter()
+
             bg.update_tick(tick)
+            self.mark_dirty(tick.vt_symbol, tick.datetime)
 
-            chart: ChartWidget = self.charts[tick.vt_symbol]
-            bar: BarData = copy(bg.bar)
-            bar.datetime = bar.datetime.replace(second=0, microsecond=0)
-            chart.update_bar(bar)
+            if start_time:
+                monitor.observe("tick_handle_seconds", perf_counter() - start_time, tick.vt_symbol)
 
     def process_history_event(self, event: Event) -> None:
         """处理历史事件"""
-        history: List[BarData] = event.data
-        if not history:
+        history: BarColumns = event.data
+        if not len(history):
             return
 
-        bar: BarData = history[0]
-        chart: ChartWidget = self.charts[bar.vt_symbol]
-        chart.update_history(history)
+        # Chart may be closed before history arrives
+        chart: Optional[ChartWidget] = self.charts.get(history.vt_symbol, None)
+        if not chart:
+            return
+
+        start_time: float = perf_counter()
+
+        # Chunk older than bars shown is prepended in following frames
+        base: BarColumns = self.bases[history.vt_symbol]
+        if len(base) and history.get_array("datetime")[-1] < base.get_array("datetime")[0]:
+            self.history_chunks.setdefault(history.vt_symbol, []).append(history)
+            return
+
+        base.update_history(history)
+
+        window, interval = TIMEFRAMES[self.timeframes[history.vt_symbol]]
+        chart.update_history(resample_bars(base, window, interval))
+        self.restore_bar_count(history.vt_symbol)
+
+        monitor.observe("history_handle_seconds", perf_counter() - start_time, history.vt_symbol)
 
         # Subscribe following data update
-        contract: Optional[ContractData] = self.main_engine.get_contract(bar.vt_symbol)
+        contract: Optional[ContractData] = self.main_engine.get_contract(history.vt_symbol)
         if contract:
             req: SubscribeRequest = SubscribeRequest(
                 contract.symbol,
@@ -173,29 +366,310 @@ class ChartWizardWidget(QtWidgets.QWidget):
     def process_spread_event(self, event: Event) -> None:
         """处理价差事件"""
         spread_item: SpreadItem = event.data
-        tick: TickData = TickData(
-            symbol=spread_item.name,
-            exchange=Exchange.LOCAL,
-            datetime=spread_item.datetime,
-            name=spread_item.name,
-            last_price=(spread_item.bid_price + spread_item.ask_price) / 2,
-            bid_price_1=spread_item.bid_price,
-            ask_price_1=spread_item.ask_price,
-            bid_volume_1=spread_item.bid_volume,
-            ask_volume_1=spread_item.ask_volume,
-            gateway_name="SPREAD"
-        )
 
-        bg: Optional[BarGenerator] = self.bgs.get(tick.vt_symbol, None)
+        # Spreads without chart are dropped before anything is created
+        bg: Optional[SpreadBarGenerator] = self.spread_bgs.get(spread_item.name, None)
         if bg:
-            bg.update_tick(tick)
+            # Timed once in sample interval of events
+            start_time: float = 0
+            if monitor.enabled and not self.tick_count % monitor.sample_interval:
+                start_time = perf_counter()
+
+            bg.update_spread(spread_item)
+            self.mark_dirty(bg.vt_symbol, spread_item.datetime)
 
-            chart: ChartWidget = self.charts[tick.vt_symbol]
-            bar: BarData = copy(bg.bar)
-            bar.datetime = bar.datetime.replace(second=0, microsecond=0)
-            chart.update_bar(bar)
+            if start_time:
+                monitor.observe("spread_handle_seconds", perf_counter() - start_time, bg.vt_symbol)
 
     def on_bar(self, bar: BarData) -> None:
         """K线合成回调"""
+        # Only feed data, drawing is left to flush of visible charts
+        self.feed_bar(bar)
+
+        self.chart_engine.save_bar(bar)
+
+    def feed_bar(self, bar: BarData, fields: Optional[Set[str]] = None) -> None:
+        """更新1分钟K线，并推送所在周期K线到图表"""
+        base: BarColumns = self.bases[bar.vt_symbol]
+        base.update_bar(bar)
+
+        window, interval = TIMEFRAMES[self.timeframes[bar.vt_symbol]]
+        window_bar: BarData = resample_bar(base, bar, window, interval)
+
         chart: ChartWidget = self.charts[bar.vt_symbol]
-        chart.update_bar(bar)
+        chart.feed_bar(window_bar, fields)
+
+    def mark_dirty(self, vt_symbol: str, dt: datetime = None) -> None:
+        """标记图表待刷新，合并同一帧内的Tick"""
+        self.tick_count += 1
+
+        if vt_symbol in self.dirty_symbols:
+            self.coalesced_count += 1
+        else:
+            self.dirty_symbols.add(vt_symbol)
+
+            # Latency to paint is measured from the first data of frame
+            if monitor.enabled and dt:
+                self.dirty_times[vt_symbol] = (perf_counter(), dt)
+
+        if monitor.enabled:
+            self.event_counts[vt_symbol] = self.event_counts.get(vt_symbol, 0) + 1
+
+    def flush_charts(self) -> None:
+        """刷新可见的待更新图表"""
+        flushed: bool = False
+
+        for vt_symbol in list(self.dirty_symbols):
+            chart: ChartWidget = self.charts[vt_symbol]
+
+            # Hidden charts are kept dirty until shown
+            if not chart.isVisible():
+                continue
+
+            self.flush_chart(vt_symbol)
+            flushed = True
+
+        if flushed:
+            self.frame_count += 1
+
+        for vt_symbol, count in self.event_counts.items():
+            monitor.count("events_total", vt_symbol, count)
+        self.event_counts.clear()
+
+        for vt_symbol in list(self.history_chunks):
+            self.prepend_history(vt_symbol)
+
+    def prepend_history(self, vt_symbol: str) -> None:
+        """将一段较早的历史数据插入图表"""
+        chunks: List[BarColumns] = self.history_chunks[vt_symbol]
+        history: BarColumns = chunks.pop(0)
+        if not chunks:
+            self.history_chunks.pop(vt_symbol)
+
+        base: BarColumns = self.bases[vt_symbol]
+        first_bar: BarData = base.get_bar(0)
+        base.update_history(history)
+
+        # Window bar of the first bar shown is completed with older bars
+        window, interval = TIMEFRAMES[self.timeframes[vt_symbol]]
+        ix: int = base.get_index(first_bar.datetime)
+
+        window_bars: BarColumns = resample_bars(base.slice(0, ix), window, interval)
+        window_bars.update_bar(resample_bar(base, first_bar, window, interval))
+
+        chart: ChartWidget = self.charts[vt_symbol]
+        chart.prepend_history(window_bars)
+        self.restore_bar_count(vt_symbol)
+
+    def restore_bar_count(self, vt_symbol: str) -> None:
+        """恢复图表保存的显示K线数量"""
+        bar_count: int = self.bar_counts.get(vt_symbol, 0)
+        if not bar_count:
+            return
+
+        chart: ChartWidget = self.charts[vt_symbol]
+        chart.show_recent(bar_count)
+
+        # Kept until enough bars are loaded progressively
+        if chart.get_bar_count() >= bar_count:
+            self.bar_counts.pop(vt_symbol)
+
+    def flush_chart(self, vt_symbol: str) -> None:
+        """将合成中的K线数据更新到图表"""
+        self.dirty_symbols.discard(vt_symbol)
+
+        start_time: float = perf_counter()
+        chart: ChartWidget = self.charts[vt_symbol]
+
+        # Forming bar is floored already, only fields changed since last flush are updated
+        bg: ChartBarGenerator = self.bgs[vt_symbol]
+        if bg.bar and bg.changed:
+            self.feed_bar(bg.bar, bg.changed)
+            bg.changed.clear()
+
+        chart.catch_up()
+
+        if vt_symbol in self.dirty_times:
+            chart.set_pending_time(*self.dirty_times.pop(vt_symbol))
+
+        monitor.observe("flush_seconds", perf_counter() - start_time, vt_symbol)
+
+    def set_recording(self, active: bool) -> None:
+        """开关图表行情录制"""
+        if active:
+            self.recorder = TickRecorder(self.event_engine, get_record_path(), set(self.charts))
+            self.recorder.start()
+
+            self.chart_engine.write_log(f"开始录制行情：{self.recorder.path}")
+        elif self.recorder:
+            self.recorder.stop()
+
+            self.chart_engine.write_log(f"停止录制行情，共{self.recorder.count}条：{self.recorder.path}")
+            self.recorder = None
+
+    def process_tab_changed(self, index: int) -> None:
+        """切换标签时立即刷新当前图表"""
+        vt_symbol: str = self.tab.tabText(index)
+
+        # Restored chart is loaded when shown first
+        if vt_symbol in self.pending_charts:
+            self.add_chart(vt_symbol)
+
+        if vt_symbol in self.timeframes:
+            self.timeframe_combo.blockSignals(True)
+            self.timeframe_combo.setCurrentText(self.timeframes[vt_symbol])
+            self.timeframe_combo.blockSignals(False)
+
+            self.layout_combo.blockSignals(True)
+            self.layout_combo.setCurrentText(self.chart_layouts[vt_symbol])
+            self.layout_combo.blockSignals(False)
+
+        if vt_symbol in self.dirty_symbols:
+            self.flush_chart(vt_symbol)
+
+    def change_timeframe(self, timeframe: str) -> None:
+        """切换当前图表的K线周期"""
+        vt_symbol: str = self.tab.tabText(self.tab.currentIndex())
+        if vt_symbol not in self.timeframes:
+            return
+
+        if self.timeframes[vt_symbol] == timeframe:
+            return
+        self.timeframes[vt_symbol] = timeframe
+
+        # Resample from 1-minute bars without querying history again
+        base: BarColumns = self.bases[vt_symbol]
+        window, interval = TIMEFRAMES[timeframe]
+
+        chart: ChartWidget = self.charts[vt_symbol]
+        chart.clear_all()
+        chart.set_data_key((vt_symbol, timeframe))
+
+        if len(base):
+            chart.update_history(resample_bars(base, window, interval))
+
+        self.save_workspace()
+
+    def change_layout(self, layout_name: str) -> None:
+        """切换当前图表的布局"""
+        vt_symbol: str = self.tab.tabText(self.tab.currentIndex())
+        if vt_symbol not in self.chart_layouts:
+            return
+
+        if self.chart_layouts[vt_symbol] == layout_name:
+            return
+        self.chart_layouts[vt_symbol] = layout_name
+
+        # Replace chart with the one of new layout in same tab
+        chart: ChartWidget = self.create_chart(self.layouts[layout_name])
+        chart.set_data_key((vt_symbol, self.timeframes[vt_symbol]))
+        old_chart: ChartWidget = self.charts[vt_symbol]
+        self.charts[vt_symbol] = chart
+
+        index: int = self.tab.currentIndex()
+        self.tab.blockSignals(True)
+        self.tab.removeTab(index)
+        self.tab.insertTab(index, chart, vt_symbol)
+        self.tab.setCurrentIndex(index)
+        self.tab.blockSignals(False)
+
+        base: BarColumns = self.bases[vt_symbol]
+        window, interval = TIMEFRAMES[self.timeframes[vt_symbol]]
+
+        if len(base):
+            chart.update_history(resample_bars(base, window, interval))
+
+        # Released after new chart is updated, so that shared indicator values are reused
+        old_chart.release()
+        old_chart.deleteLater()
+
+        self.save_workspace()
+
+    def restore_workspace(self) -> None:
+        """恢复上次打开的图表"""
+        if not self.workspace_filename:
+            return
+
+        workspace: dict = load_json(self.workspace_filename)
+
+        # Only placeholders are created here, charts are loaded when shown or idle
+        self.tab.blockSignals(True)
+
+        for setting in workspace.get("charts", []):
+            vt_symbol: str = setting["vt_symbol"]
+            if vt_symbol in self.pending_charts:
+                continue
+
+            if setting.get("timeframe", "") not in TIMEFRAMES:
+                setting.pop("timeframe", None)
+            if setting.get("layout", "") not in self.layouts:
+                setting.pop("layout", None)
+
+            placeholder: QtWidgets.QLabel = QtWidgets.QLabel(f"{vt_symbol}图表等待加载")
+            placeholder.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
+
+            self.pending_charts[vt_symbol] = setting
+            self.placeholders[vt_symbol] = placeholder
+            self.tab.addTab(placeholder, vt_symbol)
+
+        self.tab.setCurrentIndex(workspace.get("current", 0))
+        self.tab.blockSignals(False)
+
+        if not self.pending_charts:
+            return
+
+        self.process_tab_changed(self.tab.currentIndex())
+        self.idle_timer.start(self.idle_interval)
+
+    def load_idle_chart(self) -> None:
+        """空闲时在后台加载一个恢复的图表"""
+        if not self.pending_charts:
+            self.idle_timer.stop()
+            return
+
+        # Wait until history of charts loaded is drawn
+        if self.chart_engine.futures or self.history_chunks:
+            return
+
+        # Current one first, charts without contract yet are tried again later
+        current: str = self.tab.tabText(self.tab.currentIndex())
+        vt_symbols: List[str] = sorted(self.pending_charts, key=lambda vt_symbol: vt_symbol != current)
+
+        for vt_symbol in vt_symbols:
+            if self.add_chart(vt_symbol):
+                if vt_symbol == current:
+                    self.process_tab_changed(self.tab.currentIndex())
+                return
+
+    def save_workspace(self) -> None:
+        """保存当前打开的图表"""
+        if not self.workspace_filename:
+            return
+
+        charts: List[dict] = []
+
+        for index in range(self.tab.count()):
+            vt_symbol: str = self.tab.tabText(index)
+
+            if vt_symbol in self.pending_charts:
+                setting: dict = self.pending_charts[vt_symbol]
+            else:
+                setting: dict = {
+                    "timeframe": self.timeframes[vt_symbol],
+                    "layout": self.chart_layouts[vt_symbol],
+                    "bar_count": self.bar_counts.get(vt_symbol, 0) or self.charts[vt_symbol].get_bar_count(),
+                }
+
+            charts.append({"vt_symbol": vt_symbol, **setting})
+
+        workspace: dict = {
+            "charts": charts,
+            "current": self.tab.currentIndex(),
+        }
+        save_json(self.workspace_filename, workspace)
+
+    def closeEvent(self, event: QtGui.QCloseEvent) -> None:
+        """关闭时保存打开的图表"""
+        self.save_workspace()
+
+        super().closeEvent(event)